@@ -38,6 +38,17 @@ EXTRAS_REQUIRE = {
         'flask',
         'flask-admin',
     ],
+    'enrichment': [
+        'numpy',
+        'scipy',
+    ],
+    'zstd': [
+        'zstandard',
+    ],
+    'roaring': [
+        'numpy',
+        'pyroaring',
+    ],
     'docs': [
         'flask',
         'flask-admin',
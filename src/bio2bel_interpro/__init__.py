@@ -1,8 +1,12 @@
 # -*- coding: utf-8 -*-
 
-"""Bio2BEL InterPro."""
+"""Bio2BEL InterPro.
 
-from .manager import Manager  # noqa: F401
+The :class:`bio2bel_interpro.Manager` is loaded lazily on first access so that importing this package (e.g., during
+the discovery of Bio2BEL entry points) doesn't pay for SQLAlchemy, PyBEL, and pandas.
+"""
+
+import sys
 
 __version__ = '0.2.2-dev'
 
@@ -15,3 +19,16 @@ __email__ = 'charles.hoyt@scai.fraunhofer.de'
 
 __license__ = 'MIT License'
 __copyright__ = 'Copyright (c) 2017-2018 Charles Tapley Hoyt'
+
+
+def __getattr__(name: str):
+    """Lazily load the manager (PEP 562)."""
+    if name == 'Manager':
+        from .manager import Manager  # noqa: F811
+        return Manager
+
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+if sys.version_info < (3, 7):  # module-level __getattr__ is not supported before Python 3.7
+    from .manager import Manager  # noqa: F401
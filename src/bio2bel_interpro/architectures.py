@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+"""Domain architectures of proteins.
+
+The domain architecture of a protein is the sequence of the InterPro domains and repeats annotated to it, ordered by
+where they start. Overlapping hits of the same entry, like from the member databases' signatures that are integrated
+into it, count as a single occurrence, but separate occurrences of the same entry, like tandem repeats, each count.
+
+Architectures are written as the InterPro identifiers joined by ``~``, like ``IPR011527~IPR003439~IPR003593``, and
+are stored once in :class:`bio2bel_interpro.models.Architecture` with the MD5 hash of that string for lookups.
+"""
+
+import hashlib
+from difflib import SequenceMatcher
+from typing import Iterable, List, Sequence, Set, Union
+
+import pandas as pd
+
+from .constants import ARCHITECTURE_SEPARATOR
+
+__all__ = [
+    'get_architectures',
+    'join_architecture',
+    'split_architecture',
+    'hash_architecture',
+    'get_architecture_similarity',
+]
+
+
+def get_architectures(chunk: pd.DataFrame, domain_ids: Set[str]) -> pd.Series:
+    """Get the domain architectures of the proteins in a chunk of protein mappings.
+
+    :param chunk: A data frame with columns for the UniProt identifier, InterPro identifier, start, and end
+    :param domain_ids: The InterPro identifiers of the domains and repeats
+    :return: A series from UniProt identifiers to their architectures. Proteins without any domains are left out.
+    """
+    df = chunk.loc[chunk['interpro_id'].isin(domain_ids), ['uniprot_id', 'interpro_id', 'start', 'end']]
+    if df.empty:
+        return pd.Series([], dtype=object, index=pd.Index([], name='uniprot_id'), name='architecture')
+
+    df = df.sort_values(['uniprot_id', 'interpro_id', 'start'], kind='mergesort')
+
+    # A hit starts a new occurrence unless it overlaps an earlier hit of the same entry on the same protein
+    group = (df['uniprot_id'] + ' ' + df['interpro_id']).to_numpy()
+    previous_end = df.groupby(group, sort=False)['end'].cummax().shift().to_numpy()
+    is_new_group = group != pd.Series(group).shift().to_numpy()
+    is_new_occurrence = is_new_group | (df['start'].to_numpy() > previous_end)
+
+    occurrences = df[is_new_occurrence].sort_values(['uniprot_id', 'start', 'interpro_id'], kind='mergesort')
+    return occurrences.groupby('uniprot_id', sort=False)['interpro_id'].agg(ARCHITECTURE_SEPARATOR.join).rename(
+        'architecture',
+    )
+
+
+def join_architecture(architecture: Union[str, Iterable[str]]) -> str:
+    """Join a sequence of InterPro identifiers into an architecture string, if it's not one already."""
+    if isinstance(architecture, str):
+        return architecture
+    return ARCHITECTURE_SEPARATOR.join(architecture)
+
+
+def split_architecture(architecture: str) -> List[str]:
+    """Split an architecture string into its InterPro identifiers.
+
+    >>> split_architecture('IPR011527~IPR003439~IPR003593')
+    ['IPR011527', 'IPR003439', 'IPR003593']
+    """
+    return architecture.split(ARCHITECTURE_SEPARATOR) if architecture else []
+
+
+def hash_architecture(architecture: Union[str, Iterable[str]]) -> str:
+    """Hash an architecture for looking it up in the database.
+
+    >>> hash_architecture(['IPR011527', 'IPR003439']) == hash_architecture('IPR011527~IPR003439')
+    True
+    """
+    return hashlib.md5(join_architecture(architecture).encode('utf-8')).hexdigest()
+
+
+def get_architecture_similarity(a: Sequence[str], b: Sequence[str]) -> float:
+    """Get the similarity between two architectures, which takes the order of the domains into account.
+
+    It's twice the number of domains in the longest common subsequences divided by the total number of domains, so
+    it's 1 for identical architectures and 0 for architectures that share no domains.
+
+    >>> get_architecture_similarity(['IPR011527', 'IPR003439'], ['IPR011527', 'IPR003439', 'IPR003593'])
+    0.8
+    """
+    return SequenceMatcher(None, a, b, autojunk=False).ratio()
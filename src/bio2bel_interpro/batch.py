@@ -0,0 +1,384 @@
+# -*- coding: utf-8 -*-
+
+"""Enrich many BEL graphs with InterPro in parallel, from lookup data that's loaded once.
+
+Enriching a graph one process at a time pays for importing PyBEL and warming up the database every time.
+:func:`enrich_graphs` instead takes an :class:`AnnotationLookup`, which keeps all annotations in a few flat
+:mod:`numpy` arrays, and forks a pool of worker processes after setting it as a module global. The workers share the
+arrays with the parent copy-on-write. Since the arrays are buffers rather than many small Python objects, reading
+them doesn't write reference counts, so their pages stay shared. Each worker reads a graph, enriches it, and writes
+it to the output directory, so the enriched graphs are written as they finish.
+
+Where processes can't be forked, like on Windows, the lookup is pickled to each worker once instead.
+
+Graphs are read and written in the format given by their extension:
+
+- ``.bel``: a BEL script, like :func:`pybel.from_path`
+- ``.json``: node-link JSON, like :func:`pybel.from_json_path`
+- ``.pickle``, ``.gpickle``, or ``.pkl``: a pickle, like :func:`pybel.from_pickle`
+"""
+
+import gc
+import logging
+import multiprocessing
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from pybel import BELGraph
+from pybel.constants import FUNCTION, IDENTIFIER, NAME, NAMESPACE, PROTEIN, VARIANTS
+from pybel.dsl import protein
+from .constants import MODULE_NAME
+
+__all__ = [
+    'ENRICHMENTS',
+    'GRAPH_FORMATS',
+    'AnnotationLookup',
+    'EnrichedGraph',
+    'enrich_proteins',
+    'enrich_interpros',
+    'get_graph_paths',
+    'read_graph',
+    'write_graph',
+    'enrich_graphs',
+]
+
+log = logging.getLogger(__name__)
+
+#: The kinds of enrichment that can be run on each graph
+ENRICHMENTS = ('proteins', 'interpros')
+
+#: A dictionary from the extensions of graph files to their formats
+GRAPH_FORMATS = {
+    '.bel': 'bel',
+    '.json': 'json',
+    '.pickle': 'pickle',
+    '.gpickle': 'pickle',
+    '.pkl': 'pickle',
+}
+
+#: The namespaces of UniProt protein nodes
+UNIPROT_NAMESPACES = {'uniprot', 'up'}
+
+#: The lookup shared by the worker processes. Set before the pool is forked, or in each worker.
+_LOOKUP = None
+
+
+class AnnotationLookup:
+    """The InterPro entries of each protein and the proteins of each entry, in flat arrays.
+
+    The identifiers are kept in sorted arrays of UTF-8 bytes, and the annotations in compressed sparse rows, in both
+    directions, of indexes into the other array.
+    """
+
+    def __init__(self, uniprot_ids: np.ndarray, interpro_ids: np.ndarray, names: np.ndarray,
+                 protein_indptr: np.ndarray, protein_entries: np.ndarray,
+                 entry_indptr: np.ndarray, entry_proteins: np.ndarray):
+        """Build a lookup from its arrays. Use :meth:`from_pairs` instead.
+
+        :param uniprot_ids: The sorted UniProt identifiers of the proteins
+        :param interpro_ids: The sorted InterPro identifiers of the entries
+        :param names: The names of the entries, in the same order as their identifiers
+        :param protein_indptr: The offsets of the entries of each protein in ``protein_entries``
+        :param protein_entries: The indexes of the entries of each protein
+        :param entry_indptr: The offsets of the proteins of each entry in ``entry_proteins``
+        :param entry_proteins: The indexes of the proteins of each entry
+        """
+        self.uniprot_ids = uniprot_ids
+        self.interpro_ids = interpro_ids
+        self.names = names
+        self.protein_indptr = protein_indptr
+        self.protein_entries = protein_entries
+        self.entry_indptr = entry_indptr
+        self.entry_proteins = entry_proteins
+
+    @classmethod
+    def from_pairs(cls, pairs: Iterable[Tuple[str, str]], names: Mapping[str, str]) -> 'AnnotationLookup':
+        """Build a lookup from pairs of UniProt and InterPro identifiers.
+
+        :param pairs: Pairs of UniProt and InterPro identifiers, in any order and possibly repeated
+        :param names: A dictionary from InterPro identifiers to their names. Entries that aren't in it are left out.
+        """
+        uniprot_ids, interpro_ids = [], []
+        for uniprot_id, interpro_id in pairs:
+            if interpro_id in names:
+                uniprot_ids.append(uniprot_id.encode())
+                interpro_ids.append(interpro_id.encode())
+
+        uniprot_ids, protein_index = np.unique(np.array(uniprot_ids, dtype=bytes), return_inverse=True)
+        interpro_ids, entry_index = np.unique(np.array(interpro_ids, dtype=bytes), return_inverse=True)
+
+        # Sorting the pairs as single numbers removes duplicates and sorts them by protein
+        pairs = np.unique(protein_index.astype(np.int64) * len(interpro_ids) + entry_index)
+        protein_index, entry_index = np.divmod(pairs, max(len(interpro_ids), 1))
+
+        order = np.argsort(entry_index, kind='stable')
+        return cls(
+            uniprot_ids=uniprot_ids,
+            interpro_ids=interpro_ids,
+            names=np.array([names[interpro_id.decode()] for interpro_id in interpro_ids], dtype=str),
+            protein_indptr=np.searchsorted(protein_index, np.arange(len(uniprot_ids) + 1)),
+            protein_entries=entry_index.astype(np.int32),
+            entry_indptr=np.searchsorted(entry_index[order], np.arange(len(interpro_ids) + 1)),
+            entry_proteins=protein_index[order].astype(np.int32),
+        )
+
+    def __len__(self) -> int:  # noqa: D105
+        return len(self.protein_entries)
+
+    def get_entries(self, uniprot_ids: Iterable[str]) -> Mapping[str, List[Tuple[str, str]]]:
+        """Get the InterPro identifiers and names of the entries of each of the given proteins.
+
+        :return: A dictionary from UniProt identifiers to lists of pairs of InterPro identifiers and names. Proteins
+         without any annotations are left out.
+        """
+        return {
+            uniprot_id: [
+                (self.interpro_ids[i].decode(), str(self.names[i]))
+                for i in self.protein_entries[self.protein_indptr[index]:self.protein_indptr[index + 1]]
+            ]
+            for uniprot_id, index in _search(self.uniprot_ids, uniprot_ids)
+        }
+
+    def get_uniprot_ids(self, interpro_ids: Iterable[str]) -> Mapping[str, List[str]]:
+        """Get the UniProt identifiers of the proteins of each of the given entries.
+
+        :return: A dictionary from InterPro identifiers to lists of UniProt identifiers. Entries without any
+         annotations are left out.
+        """
+        return {
+            interpro_id: [
+                uniprot_id.decode()
+                for uniprot_id in self.uniprot_ids[
+                    self.entry_proteins[self.entry_indptr[index]:self.entry_indptr[index + 1]]
+                ]
+            ]
+            for interpro_id, index in _search(self.interpro_ids, interpro_ids)
+        }
+
+
+def _search(values: np.ndarray, keys: Iterable[str]) -> Iterable[Tuple[str, int]]:
+    """Iterate over the keys that are in a sorted array of bytes, with their indexes."""
+    keys = list(keys)
+    if not keys or not len(values):
+        return
+
+    indexes = np.searchsorted(values, np.array([key.encode() for key in keys], dtype=bytes))
+    for key, index in zip(keys, indexes.tolist()):
+        if index < len(values) and values[index] == key.encode():
+            yield key, index
+
+
+def _get_protein_nodes(graph: BELGraph, namespaces: Iterable[str]) -> Mapping[str, List[protein]]:
+    """Get the protein nodes without variants in the given namespaces, by their identifiers or else their names."""
+    rv = defaultdict(list)
+    for node in graph:
+        namespace = node.get(NAMESPACE)
+        if node.get(FUNCTION) != PROTEIN or VARIANTS in node or namespace is None:
+            continue
+        if namespace.lower() not in namespaces:
+            continue
+        rv[node.get(IDENTIFIER) or node[NAME]].append(node)
+    return rv
+
+
+def enrich_proteins(graph: BELGraph,
+                    get_entries: Callable[[Iterable[str]], Mapping[str, List[Tuple[str, str]]]]) -> int:
+    """Add the InterPro entries of the UniProt proteins in a graph, with ``isA`` edges from the proteins.
+
+    :param graph: A BEL graph, which is changed in place
+    :param get_entries: A function from UniProt identifiers to a dictionary from each to the pairs of InterPro
+     identifiers and names of its entries, like :meth:`AnnotationLookup.get_entries`
+    :return: The number of edges that were added
+    """
+    nodes = _get_protein_nodes(graph, UNIPROT_NAMESPACES)
+    number_of_edges = graph.number_of_edges()
+
+    for uniprot_id, entries in get_entries(nodes).items():
+        for interpro_id, name in entries:
+            entry = protein(namespace=MODULE_NAME, name=name, identifier=interpro_id)
+            for node in nodes[uniprot_id]:
+                graph.add_is_a(node, entry)
+
+    return graph.number_of_edges() - number_of_edges
+
+
+def enrich_interpros(graph: BELGraph, get_uniprot_ids: Callable[[Iterable[str]], Mapping[str, List[str]]]) -> int:
+    """Add the proteins of the InterPro entries in a graph, with ``isA`` edges to the entries.
+
+    Entries are found by their identifiers, or by their names if they don't have identifiers.
+
+    :param graph: A BEL graph, which is changed in place
+    :param get_uniprot_ids: A function from InterPro identifiers to a dictionary from each to the UniProt
+     identifiers of its proteins, like :meth:`AnnotationLookup.get_uniprot_ids`
+    :return: The number of edges that were added
+    """
+    nodes = _get_protein_nodes(graph, {MODULE_NAME})
+    number_of_edges = graph.number_of_edges()
+
+    for interpro_id, uniprot_ids in get_uniprot_ids(nodes).items():
+        for uniprot_id in uniprot_ids:
+            node = protein(namespace='uniprot', identifier=uniprot_id)
+            for entry in nodes[interpro_id]:
+                graph.add_is_a(node, entry)
+
+    return graph.number_of_edges() - number_of_edges
+
+
+def _get_format(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in GRAPH_FORMATS:
+        raise ValueError(f'unknown graph format: {path}. Should end with one of {sorted(GRAPH_FORMATS)}')
+    return GRAPH_FORMATS[extension]
+
+
+def read_graph(path: str) -> BELGraph:
+    """Read a BEL graph in the format given by the path's extension."""
+    import pybel
+
+    fmt = _get_format(path)
+    if fmt == 'bel':
+        return pybel.from_path(path)
+    if fmt == 'json':
+        return pybel.from_json_path(path)
+    return pybel.from_pickle(path)
+
+
+def write_graph(graph: BELGraph, path: str) -> None:
+    """Write a BEL graph in the format given by the path's extension."""
+    import pybel
+
+    fmt = _get_format(path)
+    if fmt == 'bel':
+        pybel.to_bel_path(graph, path)
+    elif fmt == 'json':
+        pybel.to_json_path(graph, path)
+    else:
+        pybel.to_pickle(graph, path)
+
+
+def get_graph_paths(source: str) -> List[str]:
+    """Get the paths of the graphs in a directory, or listed in a manifest file.
+
+    :param source: Either a directory, in which every file with the extension of a graph format is used, or a
+     manifest with the path of a graph on each line. Relative paths in a manifest are relative to its directory,
+     and blank lines and lines starting with ``#`` are skipped.
+    """
+    if os.path.isdir(source):
+        return [
+            os.path.join(source, name)
+            for name in sorted(os.listdir(source))
+            if os.path.splitext(name)[1].lower() in GRAPH_FORMATS and os.path.isfile(os.path.join(source, name))
+        ]
+
+    directory = os.path.dirname(os.path.abspath(source))
+    with open(source) as file:
+        return [
+            os.path.join(directory, line)
+            for line in (line.strip() for line in file)
+            if line and not line.startswith('#')
+        ]
+
+
+class EnrichedGraph(NamedTuple):
+    """The result of enriching one graph."""
+
+    #: The path of the graph that was read
+    path: str
+    #: The path the enriched graph was written to
+    output: str
+    #: The number of edges that were added
+    edges: int
+    #: How long reading, enriching, and writing the graph took
+    seconds: float
+    #: The error that stopped the graph from being enriched, if any
+    error: Optional[str] = None
+
+
+def enrich_graphs(paths: Sequence[str], directory: str, lookup: AnnotationLookup,
+                  enrichments: Iterable[str] = ENRICHMENTS,
+                  max_workers: Optional[int] = None) -> Iterable[EnrichedGraph]:
+    """Enrich graphs in a pool of worker processes, writing each to the output directory with the same name.
+
+    A graph that can't be read, enriched, or written doesn't stop the others. Its result has the error instead.
+
+    :param paths: The paths of the graphs
+    :param directory: The directory in which to write the enriched graphs
+    :param lookup: The annotations, from :meth:`bio2bel_interpro.Manager.get_annotation_lookup`
+    :param enrichments: Which of :data:`ENRICHMENTS` to run on each graph
+    :param max_workers: The number of worker processes. If 0, enriches the graphs in this process. Defaults to
+     the number of CPUs.
+    :return: The results in the order the graphs finished
+    :raises ValueError: If an enrichment is unknown, or two graphs have the same name
+    """
+    global _LOOKUP
+
+    enrichments = tuple(enrichments)
+    unknown = set(enrichments) - set(ENRICHMENTS)
+    if unknown:
+        raise ValueError(f'unknown enrichments: {sorted(unknown)}. Should be from {ENRICHMENTS}')
+
+    outputs = [os.path.join(directory, os.path.basename(path)) for path in paths]
+    if len(set(outputs)) < len(outputs):
+        raise ValueError('graphs to enrich have to have distinct names, since they are written to one directory')
+
+    os.makedirs(directory, exist_ok=True)
+
+    if max_workers == 0:
+        _set_lookup(lookup)
+        try:
+            for path, output in zip(paths, outputs):
+                yield _enrich_path(path, output, enrichments)
+        finally:
+            _LOOKUP = None
+        return
+
+    if 'fork' in multiprocessing.get_all_start_methods():
+        _LOOKUP = lookup
+        # Objects from before the fork are left out of garbage collection in the workers, so it never writes to them.
+        # Freezing was added in Python 3.7.
+        if hasattr(gc, 'freeze'):
+            gc.freeze()
+        executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('fork'))
+    else:
+        executor = ProcessPoolExecutor(max_workers=max_workers, initializer=_set_lookup, initargs=(lookup,))
+
+    try:
+        with executor:
+            futures = [
+                executor.submit(_enrich_path, path, output, enrichments)
+                for path, output in zip(paths, outputs)
+            ]
+            for future in as_completed(futures):
+                yield future.result()
+    finally:
+        if hasattr(gc, 'unfreeze'):
+            gc.unfreeze()
+        _LOOKUP = None
+
+
+def _set_lookup(lookup: AnnotationLookup) -> None:
+    global _LOOKUP
+    _LOOKUP = lookup
+
+
+def _enrich_path(path: str, output: str, enrichments: Tuple[str, ...]) -> EnrichedGraph:
+    """Read, enrich, and write one graph with the shared lookup."""
+    t = time.time()
+    try:
+        graph = read_graph(path)
+        edges = 0
+        if 'proteins' in enrichments:
+            edges += enrich_proteins(graph, _LOOKUP.get_entries)
+        if 'interpros' in enrichments:
+            edges += enrich_interpros(graph, _LOOKUP.get_uniprot_ids)
+        write_graph(graph, output)
+    except Exception as e:
+        log.exception('could not enrich %s', path)
+        return EnrichedGraph(path, output, 0, time.time() - t, error=f'{type(e).__name__}: {e}')
+
+    return EnrichedGraph(path, output, edges, time.time() - t)
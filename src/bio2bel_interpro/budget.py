@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+
+"""Choose how many protein mappings to load at a time from a memory budget instead of a fixed number of rows.
+
+How much memory a chunk takes depends on the database driver, the width of the rows, and what's already in memory,
+so :class:`AdaptiveChunker` measures the resident set size (RSS) of the process and the throughput after each chunk
+and adjusts the size of the next one:
+
+- while the RSS stays under the budget, the chunk size moves towards the number of rows that are estimated to fit
+  in the budget, from the memory taken per row by the largest chunk so far, by at most a factor of two each time
+- when the RSS goes over :data:`HIGH_WATER` of the budget, the chunk size is halved
+- when growing the chunks made the throughput drop, they're shrunk back and never grown past that size again
+
+The RSS is read with :mod:`psutil` if it's installed, from ``/proc`` on Linux, and otherwise the peak RSS from
+:mod:`resource` is used.
+"""
+
+import logging
+import os
+import re
+from typing import Iterable, Optional, Union
+
+import pandas as pd
+
+__all__ = [
+    'AdaptiveChunker',
+    'get_rss',
+    'iterate_adaptive_chunks',
+    'parse_memory',
+]
+
+log = logging.getLogger(__name__)
+
+#: The number of rows in the first chunk
+INITIAL_CHUNKSIZE = 10000
+
+#: The smallest and largest number of rows in a chunk
+MIN_CHUNKSIZE = 1000
+MAX_CHUNKSIZE = 5000000
+
+#: The fraction of the budget that the chunk size is chosen to fill
+TARGET = 0.8
+
+#: The fraction of the budget over which the chunk size is halved
+HIGH_WATER = 0.9
+
+#: The relative drop in throughput after growing the chunks for which they're shrunk back
+THROUGHPUT_TOLERANCE = 0.1
+
+_UNITS = {'': 1, 'K': 2 ** 10, 'M': 2 ** 20, 'G': 2 ** 30, 'T': 2 ** 40}
+_MEMORY_PATTERN = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([KMGT]?)(?:I?B)?\s*$', re.IGNORECASE)
+
+
+def parse_memory(value: Union[int, str]) -> int:
+    """Parse an amount of memory, in bytes or with a unit in powers of 1024, like ``512MB`` or ``2GiB``.
+
+    >>> parse_memory('2GB')
+    2147483648
+    >>> parse_memory('1.5k')
+    1536
+    >>> parse_memory(100)
+    100
+    """
+    if isinstance(value, int):
+        return value
+
+    match = _MEMORY_PATTERN.match(value)
+    if match is None:
+        raise ValueError(f'invalid amount of memory: {value!r}')
+
+    number, unit = match.groups()
+    return int(float(number) * _UNITS[unit.upper()])
+
+
+def get_rss() -> int:
+    """Get the resident set size of this process in bytes."""
+    try:
+        import psutil
+    except ImportError:
+        pass
+    else:
+        return psutil.Process().memory_info().rss
+
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+
+    import resource
+    import sys
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # The peak is in kilobytes on Linux and in bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class AdaptiveChunker:
+    """Adjust the number of rows in each chunk to fit in a memory budget."""
+
+    def __init__(self, max_memory: Union[int, str], chunksize: Optional[int] = None,
+                 baseline: Optional[int] = None):
+        """Start adjusting chunk sizes.
+
+        :param max_memory: The budget for the RSS of the process, in bytes or like ``2GB``
+        :param chunksize: The number of rows in the first chunk. Defaults to :data:`INITIAL_CHUNKSIZE`.
+        :param baseline: The RSS before loading anything. Defaults to the current RSS.
+        """
+        self.max_memory = parse_memory(max_memory)
+        self.chunksize = chunksize or INITIAL_CHUNKSIZE
+        self.baseline = get_rss() if baseline is None else baseline
+
+        self.ceiling = MAX_CHUNKSIZE
+        self.bytes_per_row = None
+        self._largest = 0
+        self._last = None  # the chunk size and throughput of the previous chunk
+
+    def update(self, rows: int, seconds: float, rss: Optional[int] = None) -> int:
+        """Record how a chunk went and choose the size of the next one.
+
+        :param rows: The number of rows in the chunk
+        :param seconds: How long the chunk took to load
+        :param rss: The RSS while the chunk was loaded. Defaults to the current RSS.
+        :return: The number of rows in the next chunk
+        """
+        if rss is None:
+            rss = get_rss()
+
+        if rows >= self._largest and rows:
+            self._largest = rows
+            self.bytes_per_row = max(rss - self.baseline, 0) / rows
+
+        throughput = rows / seconds if seconds > 0 else None
+        previous, self._last = self._last, (self.chunksize, throughput)
+
+        if rss > HIGH_WATER * self.max_memory:
+            chunksize = self.chunksize // 2
+        elif (
+            previous is not None
+            and self.chunksize > previous[0]
+            and throughput is not None and previous[1] is not None
+            and throughput < (1 - THROUGHPUT_TOLERANCE) * previous[1]
+        ):
+            self.ceiling = previous[0]
+            chunksize = previous[0]
+        elif not self.bytes_per_row:
+            chunksize = 2 * self.chunksize
+        else:
+            target = (TARGET * self.max_memory - self.baseline) / self.bytes_per_row
+            chunksize = int(min(max(target, self.chunksize / 2), 2 * self.chunksize))
+
+        self.chunksize = max(MIN_CHUNKSIZE, min(chunksize, self.ceiling))
+        log.debug(
+            'loaded %d rows in %.2f seconds with an RSS of %d bytes. Next chunk size is %d',
+            rows, seconds, rss, self.chunksize,
+        )
+        return self.chunksize
+
+
+def iterate_adaptive_chunks(reader, chunker: AdaptiveChunker) -> Iterable[pd.DataFrame]:
+    """Iterate over chunks from a reader, like from :func:`pandas.read_csv`, with sizes chosen by the chunker.
+
+    The size of each chunk is read from the chunker right before the chunk is read, so updating the chunker after
+    processing a chunk changes the size of the next one.
+    """
+    while True:
+        try:
+            chunk = reader.get_chunk(chunker.chunksize)
+        except StopIteration:
+            return
+        yield chunk
@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+
+"""A compact, read-only catalog of the InterPro entries for read-heavy workers.
+
+The catalog holds one small record with ``__slots__`` for each entry instead of a SQLAlchemy model, so it doesn't
+depend on a session and can be shared with forked workers or pickled. It's pickled as parallel lists of interned
+strings rather than as records, then the records and indexes are rebuilt with the strings interned again when it's
+unpickled.
+
+It can be built with one query per table from the database with :meth:`bio2bel_interpro.Manager.get_entry_catalog`,
+or directly from the source files with :meth:`EntryCatalog.from_files`.
+"""
+
+import sys
+from collections import defaultdict
+from typing import Iterable, List, Mapping, Optional, Tuple
+
+__all__ = [
+    'EntryRecord',
+    'EntryCatalog',
+]
+
+
+class EntryRecord:
+    """An InterPro entry in an :class:`EntryCatalog`.
+
+    Records are immutable, since they're hashed and indexed by the catalog.
+    """
+
+    __slots__ = ('interpro_id', 'name', 'type', 'parent_id', 'go_ids')
+
+    def __init__(self, interpro_id: str, name: str, type: Optional[str] = None, parent_id: Optional[str] = None,
+                 go_ids: Tuple[str, ...] = ()):
+        object.__setattr__(self, 'interpro_id', interpro_id)
+        object.__setattr__(self, 'name', name)
+        object.__setattr__(self, 'type', type)
+        object.__setattr__(self, 'parent_id', parent_id)
+        object.__setattr__(self, 'go_ids', tuple(go_ids))
+
+    def __setattr__(self, key, value):  # noqa: D105
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def __delattr__(self, key):  # noqa: D105
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def __reduce__(self):  # noqa: D105
+        return type(self), tuple(getattr(self, attribute) for attribute in self.__slots__)
+
+    def __str__(self):  # noqa: D105
+        return self.name
+
+    def __repr__(self):  # noqa: D105
+        return f'EntryRecord({self.interpro_id!r}, {self.name!r})'
+
+    def __eq__(self, other):  # noqa: D105
+        return isinstance(other, EntryRecord) and all(
+            getattr(self, attribute) == getattr(other, attribute)
+            for attribute in self.__slots__
+        )
+
+    def __hash__(self):  # noqa: D105
+        return hash(tuple(getattr(self, attribute) for attribute in self.__slots__))
+
+
+class EntryCatalog:
+    """Look up InterPro entries, their hierarchy, and their GO terms without a database."""
+
+    def __init__(self, entries: Iterable[EntryRecord], go_names: Optional[Mapping[str, str]] = None):
+        """Build a catalog.
+
+        :param entries: The entries' records
+        :param go_names: A dictionary from GO identifiers to their names
+        """
+        self._by_id = {}
+        self._by_name = {}
+        self._children = defaultdict(list)
+
+        for entry in entries:
+            self._by_id[entry.interpro_id] = entry
+            self._by_name[entry.name] = entry
+            if entry.parent_id is not None:
+                self._children[entry.parent_id].append(entry.interpro_id)
+
+        self._children = dict(self._children)
+        self.go_names = dict(go_names or {})
+
+    @classmethod
+    def from_rows(cls, entries: Iterable[Tuple[str, str, Optional[str]]], parents: Iterable[Tuple[str, str]],
+                  go_mappings: Iterable[Tuple[str, str, str]]) -> 'EntryCatalog':
+        """Build a catalog, interning all of its strings.
+
+        :param entries: Triples of InterPro identifiers, names, and type names
+        :param parents: Pairs of the InterPro identifiers of children and their parents
+        :param go_mappings: Triples of InterPro identifiers, GO identifiers, and GO names
+        """
+        parent_ids = dict(parents)
+
+        go_ids = defaultdict(list)
+        go_names = {}
+        for interpro_id, go_id, go_name in go_mappings:
+            go_id = _intern(go_id)
+            go_ids[interpro_id].append(go_id)
+            go_names[go_id] = _intern(go_name)
+
+        return cls(
+            (
+                EntryRecord(
+                    interpro_id=_intern(interpro_id),
+                    name=_intern(name),
+                    type=_intern(entry_type),
+                    parent_id=_intern(parent_ids.get(interpro_id)),
+                    go_ids=tuple(sorted(go_ids.get(interpro_id, ()))),
+                )
+                for interpro_id, name, entry_type in entries
+            ),
+            go_names=go_names,
+        )
+
+    @classmethod
+    def from_files(cls, entries_url: Optional[str] = None, tree_url: Optional[str] = None,
+                   go_mapping_path: Optional[str] = None, force_download: bool = False) -> 'EntryCatalog':
+        """Build a catalog from the source files, like :meth:`bio2bel_interpro.Manager.populate` would."""
+        from .parser.entries import get_entries_df
+        from .parser.interpro_to_go import get_interpro_go_mappings
+        from .parser.tree import get_interpro_tree
+
+        df = get_entries_df(url=entries_url, force_download=force_download)
+        entries = list(zip(df['ENTRY_AC'], df['ENTRY_NAME'], df['ENTRY_TYPE']))
+        interpro_ids = set(df['ENTRY_AC'])
+
+        tree = get_interpro_tree(path=tree_url, force_download=force_download)
+        parents = (
+            (tree.nodes[child]['interpro_id'], tree.nodes[parent]['interpro_id'])
+            for parent, child in tree.edges()
+        )
+        parents = [
+            (child_id, parent_id)
+            for child_id, parent_id in parents
+            if child_id in interpro_ids and parent_id in interpro_ids
+        ]
+
+        go_mappings = [
+            (interpro_id, go_id, go_name)
+            for interpro_id, go_id, go_name in get_interpro_go_mappings(path=go_mapping_path,
+                                                                        force_download=force_download)
+            if interpro_id in interpro_ids
+        ]
+
+        return cls.from_rows(entries, parents, go_mappings)
+
+    def __len__(self) -> int:  # noqa: D105
+        return len(self._by_id)
+
+    def __iter__(self) -> Iterable[EntryRecord]:  # noqa: D105
+        return iter(self._by_id.values())
+
+    def __contains__(self, interpro_id: str) -> bool:  # noqa: D105
+        return interpro_id in self._by_id
+
+    def __getstate__(self):  # noqa: D105
+        entries = list(self._by_id.values())
+        return (
+            [entry.interpro_id for entry in entries],
+            [entry.name for entry in entries],
+            [entry.type for entry in entries],
+            [entry.parent_id for entry in entries],
+            [entry.go_ids for entry in entries],
+            self.go_names,
+        )
+
+    def __setstate__(self, state):  # noqa: D105
+        *columns, go_names = state
+        self.__init__(
+            (
+                EntryRecord(
+                    interpro_id=_intern(interpro_id),
+                    name=_intern(name),
+                    type=_intern(entry_type),
+                    parent_id=_intern(parent_id),
+                    go_ids=tuple(_intern(go_id) for go_id in go_ids),
+                )
+                for interpro_id, name, entry_type, parent_id, go_ids in zip(*columns)
+            ),
+            go_names={_intern(go_id): _intern(go_name) for go_id, go_name in go_names.items()},
+        )
+
+    def get_interpro_by_interpro_id(self, interpro_id: str) -> Optional[EntryRecord]:
+        """Get an InterPro entry by its identifier if it exists."""
+        return self._by_id.get(interpro_id)
+
+    def get_interpro_by_name(self, name: str) -> Optional[EntryRecord]:
+        """Get an InterPro entry by its name if it exists."""
+        return self._by_name.get(name)
+
+    def get_interpros_by_ids(self, interpro_ids: Iterable[str]) -> Mapping[str, EntryRecord]:
+        """Get InterPro entries by their identifiers. Identifiers that don't exist are left out."""
+        return {
+            interpro_id: self._by_id[interpro_id]
+            for interpro_id in interpro_ids
+            if interpro_id in self._by_id
+        }
+
+    def get_parent(self, interpro_id: str) -> Optional[EntryRecord]:
+        """Get the parent of an InterPro entry if it has one."""
+        entry = self._by_id.get(interpro_id)
+        if entry is not None and entry.parent_id is not None:
+            return self._by_id[entry.parent_id]
+
+    def get_children(self, interpro_id: str) -> List[EntryRecord]:
+        """Get the children of an InterPro entry."""
+        return [self._by_id[child_id] for child_id in self._children.get(interpro_id, ())]
+
+    def get_descendant_ids(self, interpro_id: str) -> List[str]:
+        """Get the identifiers of an InterPro entry and all of its descendants."""
+        rv = []
+        stack = [interpro_id]
+        while stack:
+            interpro_id = stack.pop()
+            rv.append(interpro_id)
+            stack.extend(self._children.get(interpro_id, ()))
+        return rv
+
+    def get_go_terms(self, interpro_id: str) -> List[Tuple[str, str]]:
+        """Get the pairs of identifiers and names of the GO terms annotated to an InterPro entry."""
+        entry = self._by_id.get(interpro_id)
+        if entry is None:
+            return []
+
+        return [(go_id, self.go_names.get(go_id)) for go_id in entry.go_ids]
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return None if value is None else sys.intern(str(value))
@@ -34,6 +34,34 @@ INTERPRO_PROTEIN_COLUMNS = [
 
 CHUNKSIZE = 500000
 
+#: The number of bytes of protein mappings to sort in memory at a time if they have to be sorted externally
+SORT_MEMORY = 512 * 2 ** 20
+
+#: The environment variable with the connection string of a read replica, like the primary's ``BIO2BEL_CONNECTION``
+REPLICA_CONNECTION_ENVIRONMENT = 'BIO2BEL_INTERPRO_REPLICA_CONNECTION'
+
+#: The types of InterPro entries that make up the domain architectures of proteins
+ARCHITECTURE_TYPES = ('Domain', 'Repeat')
+
+#: The separator between the InterPro identifiers in a domain architecture
+ARCHITECTURE_SEPARATOR = '~'
+
+#: The maximum number of bound parameters to put in a single ``IN`` clause for each SQL dialect
+MAX_IN_PARAMETERS = {
+    'sqlite': 999,
+    'mssql': 2000,
+}
+DEFAULT_MAX_IN_PARAMETERS = 10000
+
+#: The number of rows to buffer when streaming large query results
+YIELD_PER = 10000
+
+#: The kinds of values that can be put in a protein × entry matrix
+MATRIX_VALUES = ('binary', 'count', 'coverage')
+
+#: The output formats for streaming the source files to BEL
+BEL_FORMATS = ('nodelink', 'bel')
+
 #: Data source for protein-interpro mappings
 INTERPRO_PROTEIN_HASH_URL = 'ftp://ftp.ebi.ac.uk/pub/databases/interpro/current/protein2ipr.dat.gz.md5'
 INTERPRO_PROTEIN_HASH_PATH = os.path.join(DATA_DIR, 'protein2ipr.dat.gz.md5')
@@ -0,0 +1,328 @@
+# -*- coding: utf-8 -*-
+
+"""Downloaders for the InterPro source files.
+
+All sources go through :func:`download`, which:
+
+1. resumes partial transfers over HTTP(S) and FTP from the size of the partially downloaded file,
+2. checks the MD5 checksum when one is available,
+3. only moves the file to its final location once it's complete, and
+4. optionally compresses the file at rest with gzip or zstd.
+
+The parsers in :mod:`bio2bel_interpro.parser` find and read the compressed files transparently.
+Compressing with zstd requires :mod:`zstandard`, which can be installed with the zstd extra like:
+
+.. source-code:: sh
+
+    pip install bio2bel_interpro[zstd]
+"""
+
+import ftplib
+import gzip
+import hashlib
+import io
+import logging
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Mapping, NamedTuple, Optional, TextIO
+from urllib.error import HTTPError
+from urllib.parse import urlparse
+from urllib.request import Request, urlopen
+
+from .constants import (
+    INTERPRO_ENTRIES_PATH, INTERPRO_ENTRIES_URL, INTERPRO_GO_MAPPING_PATH, INTERPRO_GO_MAPPING_URL,
+    INTERPRO_PROTEIN_HASH_PATH, INTERPRO_PROTEIN_HASH_URL, INTERPRO_PROTEIN_PATH, INTERPRO_PROTEIN_URL,
+    INTERPRO_TREE_PATH, INTERPRO_TREE_URL,
+)
+
+__all__ = [
+    'COMPRESSION_SUFFIXES',
+    'ChecksumError',
+    'Source',
+    'SOURCES',
+    'download',
+    'download_all',
+    'make_downloader',
+    'get_cached_path',
+    'open_text',
+]
+
+log = logging.getLogger(__name__)
+
+#: The file suffixes for each kind of at-rest compression
+COMPRESSION_SUFFIXES = {
+    'gzip': '.gz',
+    'zstd': '.zst',
+}
+
+#: The number of bytes to read and write at a time
+BLOCK_SIZE = 1 << 20
+
+
+class ChecksumError(ValueError):
+    """Raised when a downloaded file doesn't match its checksum."""
+
+
+class Source(NamedTuple):
+    """A file to download."""
+
+    #: The URL of the file
+    url: str
+    #: The path where the file is cached, before adding a compression suffix
+    path: str
+    #: The URL of a file containing the MD5 checksum of this file
+    md5_url: Optional[str] = None
+    #: The path where the MD5 checksum file is cached
+    md5_path: Optional[str] = None
+    #: Can this file be compressed at rest? False for files that are already compressed
+    compressible: bool = True
+
+
+SOURCES = {
+    'entries': Source(INTERPRO_ENTRIES_URL, INTERPRO_ENTRIES_PATH),
+    'tree': Source(INTERPRO_TREE_URL, INTERPRO_TREE_PATH),
+    'go': Source(INTERPRO_GO_MAPPING_URL, INTERPRO_GO_MAPPING_PATH),
+    'proteins': Source(
+        INTERPRO_PROTEIN_URL,
+        INTERPRO_PROTEIN_PATH,
+        md5_url=INTERPRO_PROTEIN_HASH_URL,
+        md5_path=INTERPRO_PROTEIN_HASH_PATH,
+        compressible=False,
+    ),
+}
+
+
+def get_cached_path(path: str) -> Optional[str]:
+    """Get the path of the cached file, with or without a compression suffix, if it exists."""
+    for candidate in _iterate_variants(path):
+        if os.path.exists(candidate):
+            return candidate
+
+
+def _iterate_variants(path: str):
+    yield path
+    for suffix in COMPRESSION_SUFFIXES.values():
+        yield path + suffix
+
+
+def download(url: str, path: str, force_download: bool = False, compression: Optional[str] = None,
+             md5: Optional[str] = None) -> str:
+    """Download a file, or use the cached version at the given path.
+
+    :param url: The URL of the file. Supports HTTP(S), FTP, and local paths.
+    :param path: The path where the file should be cached, before adding a compression suffix
+    :param force_download: If true, overwrites a previously cached file
+    :param compression: Either ``gzip`` or ``zstd`` to compress the file at rest
+    :param md5: The expected MD5 checksum of the downloaded file
+    :return: The path of the cached file, including the compression suffix if it was compressed
+    :raises ChecksumError: if the downloaded file doesn't match the given checksum
+    """
+    if compression is not None and compression not in COMPRESSION_SUFFIXES:
+        raise ValueError(f'invalid compression: {compression}. Should be one of {sorted(COMPRESSION_SUFFIXES)}')
+
+    cached_path = get_cached_path(path)
+    if cached_path is not None and not force_download:
+        log.info('using cached data at %s', cached_path)
+        return cached_path
+
+    log.info('downloading %s to %s', url, path)
+    part_path = f'{path}.part'
+    if force_download and os.path.exists(part_path):
+        os.remove(part_path)
+    _fetch(url, part_path)
+
+    if md5 is not None:
+        actual = _get_md5(part_path)
+        if actual != md5.lower():
+            os.remove(part_path)
+            raise ChecksumError(f'{url} has MD5 {actual} but expected {md5}')
+
+    if compression is None:
+        final_path = path
+        os.replace(part_path, final_path)
+    else:
+        final_path = path + COMPRESSION_SUFFIXES[compression]
+        tmp_path = f'{final_path}.tmp'
+        log.info('compressing %s with %s', path, compression)
+        with open(part_path, 'rb') as source, _open_compressed(tmp_path, compression) as target:
+            shutil.copyfileobj(source, target, BLOCK_SIZE)
+        os.replace(tmp_path, final_path)
+        os.remove(part_path)
+
+    # Remove other variants so they don't shadow the new file
+    for variant in _iterate_variants(path):
+        if variant != final_path and os.path.exists(variant):
+            os.remove(variant)
+
+    return final_path
+
+
+def make_downloader(source: Source) -> Callable[..., str]:
+    """Make a function that downloads the given source, or uses a cached version."""
+
+    def download_source(force_download: bool = False, compression: Optional[str] = None) -> str:
+        """Download the data.
+
+        :param force_download: If true, overwrites a previously cached file
+        :param compression: Either ``gzip`` or ``zstd`` to compress the file at rest
+        """
+        md5 = None
+        if source.md5_url is not None:
+            md5_path = download(source.md5_url, source.md5_path, force_download=force_download)
+            with open_text(md5_path) as file:
+                md5 = file.read().split()[0]
+
+        return download(
+            source.url,
+            source.path,
+            force_download=force_download,
+            compression=compression if source.compressible else None,
+            md5=md5,
+        )
+
+    return download_source
+
+
+def download_all(force_download: bool = False, compression: Optional[str] = None,
+                 sources: Optional[Mapping[str, Source]] = None,
+                 max_workers: Optional[int] = None) -> Mapping[str, str]:
+    """Download all sources concurrently.
+
+    :param force_download: If true, overwrites previously cached files
+    :param compression: Either ``gzip`` or ``zstd`` to compress the files at rest
+    :param sources: The sources to download. Defaults to :data:`SOURCES`.
+    :param max_workers: The number of concurrent downloads. Defaults to one per source.
+    :return: A dictionary from the names of the sources to the paths of their cached files
+    """
+    if sources is None:
+        sources = SOURCES
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(sources)) as executor:
+        futures = {
+            name: executor.submit(make_downloader(source), force_download=force_download, compression=compression)
+            for name, source in sources.items()
+        }
+        return {
+            name: future.result()
+            for name, future in futures.items()
+        }
+
+
+def open_text(path: str) -> TextIO:
+    """Open a file as text, transparently decompressing it based on its suffix."""
+    if path.endswith(COMPRESSION_SUFFIXES['gzip']):
+        return gzip.open(path, 'rt')
+
+    if path.endswith(COMPRESSION_SUFFIXES['zstd']):
+        import zstandard
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True))
+
+    return open(path)
+
+
+def _open_compressed(path: str, compression: str):
+    """Open a file for writing compressed binary data."""
+    if compression == 'gzip':
+        return gzip.open(path, 'wb')
+
+    import zstandard
+    return zstandard.ZstdCompressor().stream_writer(open(path, 'wb'), closefd=True)
+
+
+def _fetch(url: str, part_path: str) -> None:
+    """Fetch the URL into the partial file, resuming from its current size if it already exists."""
+    parsed = urlparse(url)
+
+    if parsed.scheme in {'http', 'https'}:
+        _fetch_http(url, part_path)
+    elif parsed.scheme == 'ftp':
+        _fetch_ftp(parsed.hostname, parsed.path, part_path)
+    elif parsed.scheme == 'file':
+        shutil.copyfile(parsed.path, part_path)
+    elif not parsed.scheme and os.path.exists(url):
+        shutil.copyfile(url, part_path)
+    else:
+        raise ValueError(f'unsupported URL: {url}')
+
+
+def _get_offset(part_path: str) -> int:
+    return os.path.getsize(part_path) if os.path.exists(part_path) else 0
+
+
+def _fetch_http(url: str, part_path: str) -> None:
+    offset = _get_offset(part_path)
+    request = Request(url)
+    if offset:
+        log.info('resuming %s from byte %d', url, offset)
+        request.add_header('Range', f'bytes={offset}-')
+
+    try:
+        response = urlopen(request)
+    except HTTPError as e:
+        if not offset or e.code != 416:
+            raise
+
+        # Servers answer a range that starts at the end of the file with 416, so the partial file is complete
+        if _get_content_length(e.headers.get('Content-Range')) in {None, offset}:
+            log.info('%s was already completely downloaded', url)
+            return
+
+        log.warning('%s is longer than %s. Downloading it again', part_path, url)
+        os.remove(part_path)
+        return _fetch_http(url, part_path)
+
+    with response:
+        # Servers that ignore the range send the whole file back with status 200
+        mode = 'ab' if offset and response.status == 206 else 'wb'
+        with open(part_path, mode) as file:
+            shutil.copyfileobj(response, file, BLOCK_SIZE)
+
+
+def _get_content_length(content_range: Optional[str]) -> Optional[int]:
+    """Get the length of the complete file from a ``Content-Range`` header like ``bytes */1234``, if it's known.
+
+    >>> _get_content_length('bytes */1234')
+    1234
+    >>> _get_content_length('bytes */*') is None
+    True
+    """
+    if content_range is None:
+        return None
+    length = content_range.rsplit('/', 1)[-1]
+    return int(length) if length.isdigit() else None
+
+
+def _fetch_ftp(host: str, path: str, part_path: str) -> None:
+    offset = _get_offset(part_path)
+    if offset:
+        log.info('resuming ftp://%s%s from byte %d', host, path, offset)
+
+    with ftplib.FTP(host) as ftp:
+        ftp.login()
+
+        if offset:
+            ftp.voidcmd('TYPE I')
+            try:
+                size = ftp.size(path)
+            except ftplib.error_perm:  # the server doesn't support SIZE
+                size = None
+            # A partial file of the right size is complete, which the MD5 checksum confirms if there is one
+            if size is not None and offset == size:
+                log.info('ftp://%s%s was already completely downloaded', host, path)
+                return
+            if size is not None and offset > size:
+                log.warning('%s is longer than ftp://%s%s. Downloading it again', part_path, host, path)
+                os.remove(part_path)
+                offset = 0
+
+        with open(part_path, 'ab' if offset else 'wb') as file:
+            ftp.retrbinary(f'RETR {path}', file.write, blocksize=BLOCK_SIZE, rest=offset or None)
+
+
+def _get_md5(path: str) -> str:
+    md5 = hashlib.md5()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(BLOCK_SIZE), b''):
+            md5.update(block)
+    return md5.hexdigest()
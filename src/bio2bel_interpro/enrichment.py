@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+
+"""Over-representation analysis of InterPro entries and GO terms in sets of proteins.
+
+The hypergeometric tests and the Benjamini-Hochberg correction are calculated for all query sets at once over the
+sparse protein incidence matrices from :mod:`bio2bel_interpro.matrices`.
+
+This module requires :mod:`scipy`. When installing, use the enrichment extra like:
+
+.. source-code:: sh
+
+    pip install bio2bel_interpro[enrichment]
+"""
+
+from typing import Iterable, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.stats import hypergeom
+
+from .matrices import IncidenceMatrix
+
+__all__ = [
+    'ENRICHMENT_COLUMNS',
+    'calculate_enrichments',
+    'benjamini_hochberg',
+]
+
+ENRICHMENT_COLUMNS = [
+    'query',
+    'identifier',
+    'name',
+    'query_count',
+    'query_size',
+    'background_count',
+    'background_size',
+    'fold_enrichment',
+    'p_value',
+    'q_value',
+]
+
+
+def calculate_enrichments(incidence: IncidenceMatrix, query_sets: Mapping[str, Iterable[str]],
+                          background: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """Calculate the over-representation of the columns of the incidence matrix in each of the query sets.
+
+    :param incidence: A binary matrix whose rows are proteins and whose columns are the features to test
+    :param query_sets: A dictionary from the names of query sets to the row labels in each
+    :param background: The row labels to use as the background. Defaults to all rows.
+    :return: A data frame with one row for each pair of query set and feature that share at least one protein,
+     sorted by query set and p-value
+    """
+    keys = list(query_sets)
+    queries = _build_query_matrix(incidence, [query_sets[key] for key in keys])
+    matrix = incidence.matrix
+
+    if background is not None:
+        background_indices = incidence.get_row_indices(background)
+        matrix = matrix[background_indices]
+        queries = queries[:, background_indices]
+
+    background_size = matrix.shape[0]
+    background_counts = np.asarray(matrix.sum(axis=0)).ravel()
+    query_sizes = np.asarray(queries.sum(axis=1)).ravel()
+
+    counts = (queries @ matrix).tocoo()
+    groups, features, query_counts = counts.row, counts.col, counts.data
+
+    p_values = hypergeom.sf(
+        query_counts - 1,
+        background_size,
+        background_counts[features],
+        query_sizes[groups],
+    )
+    q_values = benjamini_hochberg(groups, p_values, n_tests=np.count_nonzero(background_counts))
+
+    column_labels = np.asarray(incidence.column_labels, dtype=object)
+    df = pd.DataFrame({
+        'query': np.asarray(keys, dtype=object)[groups],
+        'identifier': column_labels[features],
+        'name': (
+            np.asarray(incidence.column_names, dtype=object)[features]
+            if incidence.column_names is not None else
+            None
+        ),
+        'query_count': query_counts,
+        'query_size': query_sizes[groups],
+        'background_count': background_counts[features],
+        'background_size': background_size,
+        'fold_enrichment': (
+            (query_counts / query_sizes[groups]) / (background_counts[features] / background_size)
+        ),
+        'p_value': p_values,
+        'q_value': q_values,
+    }, columns=ENRICHMENT_COLUMNS)
+
+    return df.sort_values(['query', 'p_value']).reset_index(drop=True)
+
+
+def _build_query_matrix(incidence: IncidenceMatrix, query_sets: Iterable[Iterable[str]]) -> sparse.csr_matrix:
+    """Build a binary matrix whose rows are the query sets and whose columns are the rows of the incidence matrix."""
+    indices = [incidence.get_row_indices(query_set) for query_set in query_sets]
+    indptr = np.cumsum([0] + [len(row) for row in indices])
+    columns = np.concatenate(indices) if indices else np.empty(0, dtype=np.int64)
+
+    return sparse.csr_matrix(
+        (np.ones(len(columns), dtype=np.int32), columns, indptr),
+        shape=(len(indices), incidence.shape[0]),
+    )
+
+
+def benjamini_hochberg(groups: np.ndarray, p_values: np.ndarray, n_tests: int) -> np.ndarray:
+    """Apply the Benjamini-Hochberg correction to the p-values of several groups of tests at once.
+
+    :param groups: The non-negative integer group of each p-value
+    :param p_values: The p-values
+    :param n_tests: The number of tests in each group. Tests that aren't given are assumed to have a p-value of one.
+    :return: The q-values, in the same order as the given p-values
+
+    >>> benjamini_hochberg(np.array([0, 0, 0, 0]), np.array([0.01, 0.04, 0.03, 0.2]), 4).round(4)
+    array([0.04  , 0.0533, 0.0533, 0.2   ])
+    """
+    groups = np.asarray(groups)
+    order = np.lexsort((p_values, groups))
+    sorted_groups = groups[order]
+
+    starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]]) if len(order) else order
+    lengths = np.diff(np.r_[starts, len(order)])
+    ranks = np.arange(1, len(order) + 1) - np.repeat(starts, lengths)
+
+    q_values = np.minimum(p_values[order] * n_tests / ranks, 1.0)
+
+    # Take the running minimum from the largest p-value down, restarting at each group
+    q_values = pd.Series(q_values[::-1]).groupby(sorted_groups[::-1]).cummin().to_numpy()[::-1]
+
+    rv = np.empty(len(order))
+    rv[order] = q_values
+    return rv
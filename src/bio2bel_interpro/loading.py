@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+"""Presets for loading the models together with their relationships.
+
+By default, each relationship is loaded lazily with its own query the first time it's accessed, so traversing
+relationships of many models causes a query for each model. The presets load the relationships that are usually
+needed together up front, with ``SELECT ... IN`` queries for collections and joins for single models:
+
+- ``entry`` loads InterPro entries with their types, parents, children, and GO terms
+- ``protein`` loads proteins with their architectures and annotations, and the entries of the annotations
+- ``annotation`` loads annotations with their entries and proteins
+
+In strict mode, every other relationship of the loaded models raises an error instead of running a query when
+it's accessed, so accidental lazy loads make tests fail instead of silently running a query for each model.
+Relationships that can be filled from the models already in the session are still allowed.
+
+Use them with :meth:`bio2bel_interpro.Manager.query_preset` or with the ``load`` argument of the manager's lookups.
+"""
+
+from typing import List, Mapping, Sequence, Tuple, Type
+
+from sqlalchemy import orm
+from sqlalchemy.orm.strategy_options import Load
+
+from .models import Annotation, Base, Entry, Protein
+
+__all__ = [
+    'LOADING_PRESETS',
+    'get_loading_options',
+    'get_strict_options',
+]
+
+# The relationships that are declared as backrefs only exist once the mappers are configured
+orm.configure_mappers()
+
+#: For each preset, its model and pairs of loading strategies and the paths of relationships they apply to
+LOADING_PRESETS: Mapping[str, Tuple[Type[Base], List[Tuple[str, Sequence]]]] = {
+    'entry': (Entry, [
+        ('joinedload', (Entry.type,)),
+        ('joinedload', (Entry.parent,)),
+        ('selectinload', (Entry.children,)),
+        ('selectinload', (Entry.go_terms,)),
+    ]),
+    'protein': (Protein, [
+        ('joinedload', (Protein.architecture,)),
+        ('selectinload', (Protein.annotations,)),
+        ('joinedload', (Protein.annotations, Annotation.entry)),
+    ]),
+    'annotation': (Annotation, [
+        ('joinedload', (Annotation.entry,)),
+        ('joinedload', (Annotation.protein,)),
+    ]),
+}
+
+
+def get_loading_options(preset: str, strict: bool = False) -> Tuple[Type[Base], List[Load]]:
+    """Get the model of a preset and the options to give its query.
+
+    :param preset: The name of a preset in :data:`LOADING_PRESETS`
+    :param strict: Should the relationships that aren't loaded by the preset raise errors when they're accessed?
+    :raises ValueError: If the preset doesn't exist
+    """
+    if preset not in LOADING_PRESETS:
+        raise ValueError(f'invalid loading preset {preset!r}. Use one of: {", ".join(LOADING_PRESETS)}')
+
+    model, strategies = LOADING_PRESETS[preset]
+
+    options = [_build_option(strategy, path) for strategy, path in strategies]
+    if strict:
+        options.extend(get_strict_options())
+        options.extend(
+            _build_option('defaultload', path).raiseload('*', sql_only=True)
+            for _, path in strategies
+        )
+
+    return model, options
+
+
+def get_strict_options() -> List[Load]:
+    """Get the options that make the relationships of the queried models raise errors when they're lazily loaded."""
+    return [orm.raiseload('*', sql_only=True)]
+
+
+def _build_option(strategy: str, path: Sequence) -> Load:
+    """Build an option that loads the last relationship in the path with the strategy, and the others by default."""
+    *parents, attribute = path
+
+    option = orm
+    for parent in parents:
+        option = option.defaultload(parent)
+    return getattr(option, strategy)(attribute)
@@ -3,38 +3,100 @@
 """Manager for Bio2BEL InterPro."""
 
 import logging
+import os
 import time
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import partial, wraps
 from itertools import groupby
 from operator import itemgetter
-from typing import List, Mapping, Optional
+from typing import Iterable, List, Mapping, Optional, Sequence, Set, TYPE_CHECKING, TextIO, Tuple, Union
 
+import click
+from sqlalchemy import distinct, func
+from sqlalchemy.orm import Query, aliased, scoped_session
 from tqdm import tqdm
 
 from bio2bel.manager.bel_manager import BELManagerMixin
 from bio2bel.manager.flask_manager import FlaskMixin
 from bio2bel.manager.namespace_manager import BELNamespaceManagerMixin
 from compath_utils import CompathManager
-from pybel import BELGraph
-from pybel.manager.models import Namespace, NamespaceEntry
-from .constants import CHUNKSIZE, MODULE_NAME
-from .models import Annotation, Base, Entry, GoTerm, Protein, Type, entry_go
-from .parser.entries import get_entries_df
-from .parser.interpro_to_go import get_interpro_go_mappings
-from .parser.proteins import get_proteins_chunks
-from .parser.tree import get_interpro_tree
+from .constants import (
+    ARCHITECTURE_TYPES, BEL_FORMATS, CHUNKSIZE, DEFAULT_MAX_IN_PARAMETERS, MATRIX_VALUES, MAX_IN_PARAMETERS,
+    MODULE_NAME, REPLICA_CONNECTION_ENVIRONMENT, SORT_MEMORY, YIELD_PER,
+)
+from .downloading import COMPRESSION_SUFFIXES
+from .models import (
+    Annotation, Architecture, Base, Entry, EntryStats, GoClosure, GoTerm, LshBucket, Membership, ModelCount, Protein,
+    ProteinSignature, Release, ReleaseRangeMixin, SearchToken, Type,
+    architecture_entry, entry_go, entry_go_in_release,
+)
+from .utils import iterate_chunks
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from pybel import BELGraph
+    from pybel.manager.models import Namespace, NamespaceEntry
+    from .batch import AnnotationLookup
+    from .budget import AdaptiveChunker
+    from .catalog import EntryCatalog
+    from .matrices import IncidenceMatrix
+    from .memberships import GoEntryIndex, MembershipIndex
+    from .profiling import Profiler
 
 __all__ = ['Manager']
 
 log = logging.getLogger(__name__)
 
 
+def _on_primary(f):
+    """Run a method of a manager with all of its statements sent to the primary database."""
+
+    # The manager isn't called self here, so the profiler attributes statements to the method rather than this wrapper
+    @wraps(f)
+    def wrapped(manager, *args, **kwargs):
+        with manager.primary():
+            return f(manager, *args, **kwargs)
+
+    return wrapped
+
+
+def _refreshes_stats(f):
+    """Refresh the precomputed aggregates after a method of a manager that loads data.
+
+    The memberships are built again too if loading cleared them. When the method is run by another one that loads
+    data, like :meth:`Manager.populate`, the aggregates are only refreshed once the outermost one finishes. Only the
+    aggregates of the entries that the methods recorded with :meth:`Manager._record_changed_entries` are refreshed.
+    """
+
+    @wraps(f)
+    def wrapped(manager, *args, **kwargs):
+        if not manager._loading_depth:
+            manager._changed_entry_ids = set()
+
+        manager._loading_depth += 1
+        try:
+            rv = f(manager, *args, **kwargs)
+        finally:
+            manager._loading_depth -= 1
+
+        if not manager._loading_depth:
+            if manager._stale_memberships:
+                manager.build_memberships()
+            manager._refresh_stats(manager._changed_entry_ids)
+        return rv
+
+    return wrapped
+
+
 class Manager(CompathManager, BELNamespaceManagerMixin, BELManagerMixin, FlaskMixin):
     """Protein-family and protein-domain memberships."""
 
     _base = Base
     module_name = MODULE_NAME
 
-    flask_admin_models = [Entry, Protein, Type, Annotation, GoTerm]
+    flask_admin_models = [Entry, Protein, Type, Annotation, GoTerm, EntryStats, Architecture]
 
     edge_model = [entry_go, Annotation]
     pathway_model = Entry
@@ -48,28 +110,230 @@ class Manager(CompathManager, BELNamespaceManagerMixin, BELManagerMixin, FlaskMi
     identifiers_namespace = 'interpro'
     identifiers_url = 'http://identifiers.org/interpro/'
 
-    def __init__(self, *args, **kwargs):  # noqa: D105, D107
+    def __init__(self, *args, read_only: bool = False, strict_loading: bool = False,
+                 replica_connection: Optional[str] = None, pool_size: Optional[int] = None,
+                 max_overflow: Optional[int] = None, pool_pre_ping: bool = False,
+                 statement_timeout: Optional[float] = None, **kwargs):  # noqa: D105, D107
+        """Build a manager.
+
+        :param read_only: If true, opens the SQLite database given by the connection as read-only and immutable,
+         like a snapshot from :func:`bio2bel_interpro.snapshot.build_snapshot`
+        :param strict_loading: If true, relationships that weren't loaded up front by the lookups raise errors when
+         they're accessed instead of running a query for each model. See :mod:`bio2bel_interpro.loading`.
+        :param replica_connection: The connection string of a read replica that queries are sent to, while loading
+         data goes to the primary. Defaults to the ``BIO2BEL_INTERPRO_REPLICA_CONNECTION`` environment variable.
+         See :mod:`bio2bel_interpro.routing`.
+        :param pool_size: The number of connections to keep open in each engine's pool
+        :param max_overflow: The number of connections each engine can open beyond its pool size
+        :param pool_pre_ping: Should connections be tested before they're used?
+        :param statement_timeout: The number of seconds after which statements are cancelled
+        """
+        if read_only:
+            args, kwargs = self._get_read_only_arguments(*args, **kwargs)
+
+        #: The engine of the read replica, if there is one
+        self.replica_engine = None
+        if kwargs.get('engine') is None and kwargs.get('session') is None:
+            args, kwargs = self._get_routing_arguments(
+                *args,
+                replica_connection=replica_connection or os.environ.get(REPLICA_CONNECTION_ENVIRONMENT),
+                pool_size=pool_size,
+                max_overflow=max_overflow,
+                pool_pre_ping=pool_pre_ping,
+                statement_timeout=statement_timeout,
+                **kwargs,
+            )
+
         super().__init__(*args, **kwargs)
 
         self.types = {}
         self.interpros = {}
         self.go_terms = {}
+        self.architectures = {}
+
+        self.strict_loading = strict_loading
+
+        #: The number of methods that load data on the stack, so the aggregates are only refreshed by the outermost
+        self._loading_depth = 0
+
+        #: Whether loading data cleared the memberships, so they have to be built again once it finishes
+        self._stale_memberships = False
+
+        #: The database identifiers of the entries whose aggregates are changed by the data that's being loaded, or
+        #: None if they all can be
+        self._changed_entry_ids = None
+
+        #: Cache for the incidence matrices used in enrichment analysis, built once on first use
+        self._incidence_matrices = {}
+
+        #: The trigram index over the vocabulary of search tokens, built once on first use
+        self._token_matcher = None
+
+    def _get_routing_arguments(self, connection: Optional[str] = None, echo: bool = False,
+                               autoflush: Optional[bool] = None, autocommit: Optional[bool] = None,
+                               expire_on_commit: Optional[bool] = None, **kwargs):
+        """Build the engines and the routing session instead of letting Bio2BEL build them."""
+        from .routing import build_engine_session
+
+        options = dict(autoflush=autoflush, autocommit=autocommit, expire_on_commit=expire_on_commit)
+        engine, self.replica_engine, session = build_engine_session(
+            self._get_connection(connection),
+            echo=echo,
+            **{key: value for key, value in options.items() if value is not None},
+            **kwargs,
+        )
+        return (), dict(engine=engine, session=session)
+
+    @contextmanager
+    def primary(self):
+        """Send all statements in a block to the primary database, so reads see writes that aren't replicated yet.
+
+        >>> with manager.primary():  # doctest: +SKIP
+        ...     manager.count_interpros()
+        """
+        from .routing import RoutingSession
+
+        session = self.session() if isinstance(self.session, scoped_session) else self.session
+        if not isinstance(session, RoutingSession):
+            yield
+            return
+
+        session.primary_depth += 1
+        try:
+            yield
+        finally:
+            session.primary_depth -= 1
+
+    def remove_session(self) -> None:
+        """Close the session of the current scope, like at the end of a request to a multi-threaded server."""
+        if isinstance(self.session, scoped_session):
+            self.session.remove()
+        else:
+            self.session.close()
+
+    def profile(self, slowest: int = 10, explain: bool = True) -> 'Profiler':
+        """Count and time the SQL statements run in a block, attributing them to the manager's methods.
+
+        :param slowest: The number of the slowest statements to keep with their parameters and query plans
+        :param explain: Should the query plans of the slowest statements be looked up once the block ends?
+
+        >>> with manager.profile() as report:  # doctest: +SKIP
+        ...     manager.to_bel()
+        >>> report.get_count('to_bel')  # doctest: +SKIP
+        4
+        """
+        from .profiling import Profiler
+
+        return Profiler(self.engine, manager=self, slowest=slowest, explain=explain, replica=self.replica_engine)
+
+    @classmethod
+    def _get_read_only_arguments(cls, connection: Optional[str] = None, **kwargs):
+        """Replace the SQLite connection with one that opens it as read-only and immutable."""
+        from sqlalchemy.engine.url import make_url
+        from .snapshot import get_snapshot_connection
+
+        url = make_url(connection or cls._get_connection())
+        if url.drivername != 'sqlite' or not url.database:
+            raise ValueError(f'can only open a SQLite database file as read-only: {url}')
+
+        return (), dict(kwargs, connection=get_snapshot_connection(url.database))
 
     def is_populated(self) -> bool:
         """Check if the database is already populated."""
         return 0 < self.count_interpros()
 
-    def count_interpros(self) -> int:
-        """Count the number of InterPro entries in the database."""
-        return self._count_model(Entry)
+    def count_interpros(self, release: Optional[str] = None) -> int:
+        """Count the number of InterPro entries in the database.
 
-    def list_interpros(self) -> List[Entry]:
-        """List the InterPro entries in the database."""
-        return self._list_model(Entry)
+        :param release: The InterPro release to look at. Defaults to the latest.
+        """
+        return self.session.query(Entry).filter(Entry.in_release(self._get_release_id(release))).count()
+
+    def list_interpros(self, release: Optional[str] = None) -> List[Entry]:
+        """List the InterPro entries in the database.
+
+        :param release: The InterPro release to look at. Defaults to the latest.
+        """
+        release_id = self._get_release_id(release)
+        rv = self.session.query(Entry).filter(Entry.in_release(release_id)).all()
+        self._check_unchanged(rv, release_id)
+        return rv
 
-    def count_annotations(self) -> int:
-        """Count the number of protein-interpro associations."""
-        return self._count_model(Annotation)
+    def count_annotations(self, release: Optional[str] = None) -> int:
+        """Count the number of protein-interpro associations.
+
+        :param release: The InterPro release to look at. Defaults to the latest.
+        """
+        return self.session.query(Annotation).filter(Annotation.in_release(self._get_release_id(release))).count()
+
+    def list_releases(self) -> List[Release]:
+        """List the InterPro releases that were loaded, from the oldest to the latest."""
+        return self.session.query(Release).order_by(Release.id).all()
+
+    def get_release_by_name(self, name: str) -> Optional[Release]:
+        """Get a loaded InterPro release by its name, like ``72.0``, if it exists."""
+        return self.session.query(Release).filter(Release.name == name).one_or_none()
+
+    def _get_release_id(self, release: Optional[str]) -> Optional[int]:
+        """Get the database identifier of a release, or None for the latest release.
+
+        :raises ValueError: If the release wasn't loaded
+        """
+        if release is None:
+            return None
+
+        model = self.get_release_by_name(release)
+        if model is None:
+            raise ValueError(f'InterPro release {release} was not loaded')
+
+        return model.id
+
+    @staticmethod
+    def _check_unchanged(entries: Iterable[Entry], release_id: Optional[int]) -> None:
+        """Check that the names and types of the entries are the ones they had in the given release.
+
+        Only the latest names and types are kept, so an entry that was renamed after the release can't be shown as
+        it was in it.
+
+        :raises ValueError: If any of the entries was renamed after the given release
+        """
+        if release_id is None:
+            return
+
+        for entry in entries:
+            if entry.renamed_in_id is not None and entry.renamed_in_id > release_id:
+                raise ValueError(f'{entry.interpro_id} was renamed after the requested release')
+
+    def _check_hierarchy_unchanged(self, release_id: Optional[int], renamed: bool = False) -> None:
+        """Check that the hierarchy of the entries is the one it was in the given release.
+
+        :param renamed: Should the names and types of all of the entries in the release be checked too?
+        :raises ValueError: If any entry in the release was moved, or renamed if checked, after it
+        """
+        from sqlalchemy import and_, exists, or_
+
+        if release_id is None:
+            return
+
+        changed = Entry.moved_in_id > release_id
+        if renamed:
+            changed = or_(changed, Entry.renamed_in_id > release_id)
+
+        if self.session.query(exists().where(and_(Entry.in_release(release_id), changed))).scalar():
+            raise ValueError('entries were moved or renamed after the requested release')
+
+    def _add_release(self, name: str) -> Release:
+        """Add a new InterPro release, which has to come after all of the ones that were already loaded.
+
+        :raises ValueError: If the release was already loaded
+        """
+        if self.get_release_by_name(name) is not None:
+            raise ValueError(f'InterPro release {name} was already loaded')
+
+        release = Release(name=name)
+        self.session.add(release)
+        self.session.commit()
+        return release
 
     def count_proteins(self) -> int:
         """Count the number of protein entries in the database."""
@@ -83,11 +347,22 @@ class Manager(CompathManager, BELNamespaceManagerMixin, BELManagerMixin, FlaskMi
         """Count the GO terms in the database."""
         return self._count_model(GoTerm)
 
-    def summarize(self) -> Mapping[str, int]:
-        """Summarize the database."""
+    def summarize(self, release: Optional[str] = None) -> Mapping[str, int]:
+        """Summarize the database.
+
+        Uses the counts precomputed by :meth:`refresh_stats` for the latest release if they're available, which are
+        refreshed whenever entries, annotations, or GO terms are loaded.
+
+        :param release: The InterPro release to count the entries and annotations of. Defaults to the latest.
+        """
+        if release is None:
+            counts = dict(self.session.query(ModelCount.name, ModelCount.count))
+            if counts:
+                return counts
+
         return dict(
-            interpros=self.count_interpros(),
-            annotations=self.count_annotations(),
+            interpros=self.count_interpros(release=release),
+            annotations=self.count_annotations(release=release),
             proteins=self.count_proteins(),
             go_terms=self.count_go_terms(),
         )
@@ -96,21 +371,69 @@ class Manager(CompathManager, BELNamespaceManagerMixin, BELManagerMixin, FlaskMi
         """Get an InterPro entry type by its name if it exists."""
         return self.session.query(Type).filter(Type.name == name).one_or_none()
 
-    def get_interpro_by_interpro_id(self, interpro_id: str) -> Optional[Entry]:
-        """Get a InterPro entry by its identifier if it exists."""
-        return self.session.query(Entry).filter(Entry.interpro_id == interpro_id).one_or_none()
+    def query_preset(self, preset: str) -> Query:
+        """Query a model, loading the relationships of the given preset up front.
+
+        :param preset: The name of a preset in :data:`bio2bel_interpro.loading.LOADING_PRESETS`, like ``entry``
+        """
+        from .loading import get_loading_options
+
+        model, options = get_loading_options(preset, strict=self.strict_loading)
+        return self.session.query(model).options(*options)
+
+    def _query(self, model: type, load: Optional[str] = None) -> Query:
+        """Query a model with a loading preset, or with none of its relationships loaded up front."""
+        if load is not None:
+            query = self.query_preset(load)
+            if query.column_descriptions[0]['type'] is not model:
+                raise ValueError(f'loading preset {load!r} is not for {model.__name__}')
+            return query
+
+        # Eager loading of collections doesn't work with yield_per, so it's only used without a preset
+        query = self.session.query(model).yield_per(YIELD_PER)
+        if self.strict_loading:
+            from .loading import get_strict_options
+            query = query.options(*get_strict_options())
+        return query
+
+    def get_interpro_by_interpro_id(self, interpro_id: str, load: Optional[str] = None,
+                                    release: Optional[str] = None) -> Optional[Entry]:
+        """Get a InterPro entry by its identifier if it exists.
+
+        :param interpro_id: An InterPro identifier
+        :param load: The name of a loading preset for entries, like ``entry``
+        :param release: The InterPro release to look at. Defaults to the latest.
+        """
+        release_id = self._get_release_id(release)
+        entry = (
+            self._query(Entry, load)
+            .filter(Entry.interpro_id == interpro_id, Entry.in_release(release_id))
+            .one_or_none()
+        )
+        if entry is not None:
+            self._check_unchanged([entry], release_id)
+        return entry
 
     def get_go_by_go_identifier(self, go_id: str) -> Optional[GoTerm]:
         """Get a GO term by its identifier if it exists."""
         return self.session.query(GoTerm).filter(GoTerm.go_id == go_id).one_or_none()
 
+    def get_protein_by_uniprot_id(self, uniprot_id: str, load: Optional[str] = None) -> Optional[Protein]:
+        """Get a protein by its UniProt identifier if it exists.
+
+        :param uniprot_id: A UniProt identifier
+        :param load: The name of a loading preset for proteins, like ``protein``
+        """
+        return self._query(Protein, load).filter(Protein.uniprot_id == uniprot_id).first()
+
     def get_or_create_interpro(self, interpro_id: str, **kwargs) -> Entry:
         """Get an InterPro entry by its identifier if it exists, or create one."""
         interpro = self.interpros.get(interpro_id)
         if interpro is not None:
             return interpro
 
-        interpro = self.get_interpro_by_interpro_id(interpro_id)
+        # Entries that were removed in an earlier release are found too, so they can be reopened
+        interpro = self.session.query(Entry).filter(Entry.interpro_id == interpro_id).one_or_none()
         if interpro is not None:
             self.interpros[interpro_id] = interpro
             return interpro
@@ -135,13 +458,20 @@ class Manager(CompathManager, BELNamespaceManagerMixin, BELManagerMixin, FlaskMi
         self.session.add(go)
         return go
 
+    @_refreshes_stats
+    @_on_primary
     def populate(
             self,
             entries_url: Optional[str] = None,
             tree_url: Optional[str] = None,
             go_mapping_path: Optional[str] = None,
             populate_proteins: bool = False,
-            proteins_url: Optional[str] = None
+            proteins_url: Optional[str] = None,
+            n_shards: Optional[int] = None,
+            build_memberships: bool = False,
+            release: Optional[str] = None,
+            max_memory: Union[None, int, str] = None,
+            go_obo_path: Optional[str] = None,
     ) -> None:
         """Populate the database.
 
@@ -149,17 +479,145 @@ class Manager(CompathManager, BELNamespaceManagerMixin, BELManagerMixin, FlaskMi
         :param Optional[str] tree_url:
         :param Optional[str] go_mapping_path:
         :param Optional[str] proteins_url:
+        :param n_shards: The number of worker processes with which to load the proteins. See
+         :mod:`bio2bel_interpro.sharding`.
+        :param build_memberships: Should the transitive memberships of the proteins in the entries be precomputed
+         afterwards? See :meth:`build_memberships`.
+        :param release: The name of the InterPro release that's loaded, like ``72.0``. If given, only the differences
+         from the previously loaded release are written, and the previous releases can still be queried. See
+         :mod:`bio2bel_interpro.releases`.
+        :param max_memory: A memory budget for loading the proteins, in bytes or like ``2GB``. See
+         :mod:`bio2bel_interpro.budget`.
+        :param go_obo_path: The path to a local copy of the Gene Ontology in the OBO format. If given, the GO
+         hierarchy is loaded so lookups by GO terms include their descendants. See :meth:`populate_go_hierarchy`.
+        :raises ValueError: If the release was already loaded. Like any other error, it's only recorded as a failed
+         population unless this is run with :meth:`populate_or_raise`.
+
+        If loading a release fails, what was loaded of it is removed again, so the database stays at the previous
+        release and the release can be loaded again.
         """
-        self._populate_entries(entry_url=entries_url, tree_url=tree_url)
-        self._populate_go(path=go_mapping_path)
-        if populate_proteins:
-            self._populate_proteins(url=proteins_url)
+        release_model = self._add_release(release) if release is not None else None
+        # Only the latest attributes of the entries are kept, so they're restored from these if loading fails
+        attributes = self._get_entry_attributes() if release_model is not None else None
+
+        try:
+            self._populate_entries(entry_url=entries_url, tree_url=tree_url, release=release_model)
+            self._populate_go(path=go_mapping_path, release=release_model)
+            if go_obo_path is not None:
+                self.populate_go_hierarchy(go_obo_path)
+            if populate_proteins:
+                self._populate_proteins(
+                    url=proteins_url, n_shards=n_shards, release=release_model, max_memory=max_memory,
+                )
+        except Exception:
+            if release_model is not None:
+                self._discard_release(release_model, attributes)
+            raise
+
+        if build_memberships:
+            self.build_memberships()
+        self._incidence_matrices.clear()
+        self._token_matcher = None
+
+    def _get_entry_attributes(self) -> List[Mapping]:
+        """Get the attributes of the entries that a release can change, keyed by the names of their columns."""
+        columns = [Entry.id, Entry.name, Entry.type_id, Entry.parent_id, Entry.renamed_in_id, Entry.moved_in_id]
+        return [
+            dict(zip((column.key for column in columns), row))
+            for row in self.session.query(*columns).yield_per(YIELD_PER)
+        ]
+
+    def _discard_release(self, release: Release, attributes: List[Mapping]) -> None:
+        """Remove what was loaded of a release that failed to load, and the release itself.
+
+        The ranges that the release closed are reopened, the rows that it added are deleted, and the attributes of
+        the entries that it changed are restored. The proteins aren't versioned, so new ones are kept.
+
+        :param attributes: The attributes of the entries from before the release was loaded, from
+         :meth:`_get_entry_attributes`
+        """
+        from sqlalchemy import or_
+
+        self.session.rollback()
+        release_id = release.id
+        log.warning('discarding what was loaded of release %s', release)
+
+        for model in (Entry, Annotation):
+            self.session.query(model).filter(model.valid_to_id == release_id).update(
+                {model.valid_to_id: None}, synchronize_session=False,
+            )
+        self.session.execute(entry_go.update().where(entry_go.c.valid_to_id == release_id).values(valid_to_id=None))
+        self.session.query(Annotation).filter(Annotation.valid_from_id == release_id).delete(synchronize_session=False)
+        self.session.execute(entry_go.delete().where(entry_go.c.valid_from_id == release_id))
+
+        changed = {
+            entry_id
+            for entry_id, in self.session.query(Entry.id).filter(
+                or_(Entry.renamed_in_id == release_id, Entry.moved_in_id == release_id),
+            )
+        }
+        self.session.bulk_update_mappings(Entry, [row for row in attributes if row['id'] in changed])
+
+        new_entry_ids = [
+            entry_id
+            for entry_id, in self.session.query(Entry.id).filter(Entry.valid_from_id == release_id)
+        ]
+        for chunk in self._iterate_in_chunks(new_entry_ids):
+            for model in (SearchToken, EntryStats, Membership):
+                self.session.query(model).filter(model.entry_id.in_(chunk)).delete(synchronize_session=False)
+            self.session.execute(architecture_entry.delete().where(architecture_entry.c.entry_id.in_(chunk)))
+            self.session.query(Entry).filter(Entry.id.in_(chunk)).update(
+                {Entry.parent_id: None}, synchronize_session=False,
+            )
+        for chunk in self._iterate_in_chunks(new_entry_ids):
+            self.session.query(Entry).filter(Entry.id.in_(chunk)).delete(synchronize_session=False)
+
+        self.session.query(Release).filter(Release.id == release_id).delete(synchronize_session=False)
+        self.session.commit()
+
+        # The cached models can be deleted, and the names of the entries can be the ones they had again
+        self.interpros.clear()
+        self.go_terms.clear()
+        self._index_search_tokens(Entry, SearchToken.entry_id)
+        if self._stale_memberships:
+            self.build_memberships()
 
+    def populate_or_raise(self, **kwargs) -> None:
+        """Populate the database like :meth:`populate`, but raise errors instead of only recording that it failed.
+
+        The ``populate`` method is wrapped by :mod:`bio2bel` so that errors are logged as a failed population, which
+        hides them from code that needs to know whether the data was loaded, like building snapshots.
+
+        :param kwargs: Keyword arguments to pass to :meth:`populate`
+        """
+        try:
+            self._populate_original(**kwargs)
+        except Exception:
+            self.session.rollback()
+            self._store_populate_failed()
+            raise
+        self._store_populate()
+
+    @_refreshes_stats
     def _populate_entries(self, entry_url: Optional[str] = None, tree_url: Optional[str] = None,
-                          force_download: bool = False) -> None:
-        """Populate the database."""
+                          force_download: bool = False, release: Optional[Release] = None) -> None:
+        """Populate the database.
+
+        :param release: If given, the entries that aren't in this release are closed, and the names and types of the
+         entries that are in it are updated
+        """
+        from .parser.entries import get_entries_df
+        from .parser.tree import get_interpro_tree
+
         df = get_entries_df(url=entry_url, force_download=force_download)
 
+        # The cached models can be detached from the session by an earlier population, like of a previous release
+        self.interpros.clear()
+        self.types = {family_type.name: family_type for family_type in self.session.query(Type)}
+
+        # The entries that came back, were removed, or were moved, and their former parents
+        changed = set()
+
         for _, interpro_id, entry_type, name in tqdm(df.itertuples(), desc='Entries', total=len(df.index)):
             family_type = self.types.get(entry_type)
 
@@ -167,19 +625,50 @@ class Manager(CompathManager, BELNamespaceManagerMixin, BELManagerMixin, FlaskMi
                 family_type = self.types[entry_type] = Type(name=entry_type)
                 self.session.add(family_type)
 
-            self.get_or_create_interpro(
+            interpro = self.get_or_create_interpro(
                 interpro_id=interpro_id,
                 type=family_type,
                 name=name,
             )
 
+            if release is not None:
+                if interpro.valid_to_id is not None:
+                    changed.add(interpro.id)
+                self._update_entry_release(interpro, release, type=family_type, name=name)
+
+        if release is not None:
+            changed.update(self._close_removed_entries(set(df['ENTRY_AC']), release))
+
         t = time.time()
         log.info('committing entries')
         self.session.commit()
         log.info('committed entries in %.2f seconds', time.time() - t)
 
         graph = get_interpro_tree(path=tree_url, force_download=force_download)
+        changed.update(self._build_tree(graph, release))
+
+        self._clear_memberships()
 
+        t = time.time()
+        log.info('committing tree')
+        self.session.commit()
+        log.info('committed tree in %.2f seconds', time.time() - t)
+
+        if release is None:
+            self._record_changed_entries(None)
+        else:
+            new = self.session.query(Entry.id).filter(Entry.valid_from_id == release.id)
+            self._record_changed_entries(changed.union(entry_id for entry_id, in new))
+
+        self._index_search_tokens(Entry, SearchToken.entry_id)
+
+    def _build_tree(self, graph, release: Optional[Release] = None) -> Set[int]:
+        """Set the parents of the cached entries from the InterPro tree, without committing.
+
+        :param release: If given, the entries that were moved in this release are recorded
+        :return: The database identifiers of the entries that were moved and of their former parents
+        """
+        moved = set()
         for parent_name, child_name in tqdm(graph.edges(), desc='Building Tree', total=graph.number_of_edges()):
             child_id = graph.nodes[child_name]['interpro_id']
             parent_id = graph.nodes[parent_name]['interpro_id']
@@ -195,23 +684,82 @@ class Manager(CompathManager, BELNamespaceManagerMixin, BELManagerMixin, FlaskMi
                 log.warning('missing %s/%s', parent_id, parent_name)
                 continue
 
+            if release is not None and child.valid_from_id != release.id and child.parent_id != parent.id:
+                child.moved_in_id = release.id
+                moved.update(entry_id for entry_id in (child.id, child.parent_id) if entry_id is not None)
             child.parent = parent
 
-        t = time.time()
-        log.info('committing tree')
-        self.session.commit()
-        log.info('committed tree in %.2f seconds', time.time() - t)
+        return moved
+
+    def _close_removed_entries(self, interpro_ids: Set[str], release: Release) -> List[int]:
+        """Close the entries of the latest release that aren't in the new release, along with their annotations and
+        mappings to GO, even if the new release's proteins or mappings aren't loaded.
 
-    def _populate_go(self, path: Optional[str] = None):
+        :return: The database identifiers of the closed entries
+        """
+        from sqlalchemy import and_
+
+        removed = [
+            interpro
+            for interpro in self.session.query(Entry).filter(Entry.in_release())
+            if interpro.interpro_id not in interpro_ids
+        ]
+        for interpro in removed:
+            interpro.valid_to_id = release.id
+        log.info('closed %d entries that were removed in release %s', len(removed), release)
+
+        closed = 0
+        for chunk in self._iterate_in_chunks(interpro.id for interpro in removed):
+            closed += (
+                self.session.query(Annotation)
+                .filter(Annotation.entry_id.in_(chunk), Annotation.in_release())
+                .update({Annotation.valid_to_id: release.id}, synchronize_session=False)
+            )
+            self.session.execute(
+                entry_go.update()
+                .where(and_(entry_go.c.entry_id.in_(chunk), entry_go_in_release()))
+                .values(valid_to_id=release.id)
+            )
+        log.info('closed %d annotations of the removed entries', closed)
+        return [interpro.id for interpro in removed]
+
+    @staticmethod
+    def _update_entry_release(interpro: Entry, release: Release, **kwargs) -> None:
+        """Start the range of a new entry, or reopen an existing entry and update its attributes.
+
+        The attributes aren't versioned, so the release in which they changed is recorded instead.
+        """
+        if interpro.id is None:
+            interpro.valid_from_id = release.id
+            return
+
+        for key, value in kwargs.items():
+            if getattr(interpro, key) != value:
+                setattr(interpro, key, value)
+                interpro.renamed_in_id = release.id
+        interpro.valid_to_id = None
+
+    @_refreshes_stats
+    def _populate_go(self, path: Optional[str] = None, release: Optional[Release] = None):
         """Populate the InterPro-GO mappings.
 
         Assumes entries are populated.
+
+        :param release: If given, the mappings of this release are loaded as the differences from the latest release,
+         even if mappings were already loaded
         """
+        if release is not None:
+            self._populate_go_release(path=path, release=release)
+            return
+
+        self._record_changed_entries(None)
         go_count = self.count_go_terms()
         if go_count > 0:
             log.info('GO terms (%d) already populated', go_count)
             return
 
+        from .parser.interpro_to_go import get_interpro_go_mappings
+
         go_mappings = get_interpro_go_mappings(path=path)
 
         for interpro_id, go_id, go_name in tqdm(go_mappings, desc='Mappings to GO'):
@@ -228,40 +776,276 @@ class Manager(CompathManager, BELNamespaceManagerMixin, BELManagerMixin, FlaskMi
         self.session.commit()
         log.info('committed go terms in %.2f seconds', time.time() - t)
 
-    def _populate_proteins(self, url: Optional[str] = None, chunksize: Optional[int] = None) -> None:
-        """Populate the InterPro-protein mappings."""
-        chunksize = chunksize or CHUNKSIZE
+        self._index_search_tokens(GoTerm, SearchToken.go_term_id)
+
+    def _populate_go_release(self, path: Optional[str], release: Release) -> None:
+        """Load the InterPro-GO mappings of a release, closing the ones that were removed and opening the new ones."""
+        from sqlalchemy import and_, bindparam
+
+        from .parser.interpro_to_go import get_interpro_go_mappings
+
+        entry_ids = dict(self.session.query(Entry.interpro_id, Entry.id).filter(Entry.in_release()))
+        # The cached GO terms can be detached from the session by the population of a previous release
+        self.go_terms.clear()
 
-        log.info('precaching interpros')
-        interpros = {
-            interpro.interpro_id: interpro
-            for interpro in self.list_interpros()
+        go_terms = []
+        interpro_ids = []
+        for interpro_id, go_id, go_name in tqdm(get_interpro_go_mappings(path=path), desc='Mappings to GO'):
+            if interpro_id not in entry_ids:
+                log.warning('could not find %s', interpro_id)
+                continue
+            interpro_ids.append(interpro_id)
+            go_terms.append(self.get_or_create_go_term(go_id=go_id, name=go_name))
+        self.session.flush()
+
+        pairs = {(entry_ids[interpro_id], go_term.id) for interpro_id, go_term in zip(interpro_ids, go_terms)}
+        existing = {
+            (entry_id, go_id): valid_to_id
+            for entry_id, go_id, valid_to_id in self.session.query(
+                entry_go.c.entry_id, entry_go.c.go_id, entry_go.c.valid_to_id,
+            )
         }
 
-        log.info('cached %d interpros', len(interpros))
+        closed = [
+            dict(b_entry_id=entry_id, b_go_id=go_id)
+            for (entry_id, go_id), valid_to_id in existing.items()
+            if valid_to_id is None and (entry_id, go_id) not in pairs
+        ]
+        reopened = [
+            dict(b_entry_id=entry_id, b_go_id=go_id)
+            for entry_id, go_id in pairs
+            if (entry_id, go_id) in existing and existing[entry_id, go_id] is not None
+        ]
+        inserted = [
+            dict(entry_id=entry_id, go_id=go_id, valid_from_id=release.id)
+            for entry_id, go_id in sorted(pairs)
+            if (entry_id, go_id) not in existing
+        ]
+
+        where = and_(entry_go.c.entry_id == bindparam('b_entry_id'), entry_go.c.go_id == bindparam('b_go_id'))
+        if closed:
+            self.session.execute(entry_go.update().where(where).values(valid_to_id=release.id), closed)
+        if reopened:
+            self.session.execute(entry_go.update().where(where).values(valid_to_id=None), reopened)
+        if inserted:
+            self.session.execute(entry_go.insert(), inserted)
+        self._record_changed_entries(row['b_entry_id'] for row in closed + reopened)
+        self._record_changed_entries(row['entry_id'] for row in inserted)
+        log.info('closed %d, reopened %d, and added %d mappings to GO in release %s', len(closed), len(reopened),
+                 len(inserted), release)
 
-        log.info('building protein models')
+        self.session.commit()
+        self._index_search_tokens(GoTerm, SearchToken.go_term_id)
 
-        # Assumes ordered by uniprot_id
+    @_on_primary
+    def populate_go_hierarchy(self, path: str) -> int:
+        """Load the GO hierarchy from an OBO file and precompute its transitive closure, replacing any from before.
 
-        missing = set()
+        The GO terms mapped to InterPro entries are given their namespaces, and their ancestors are added, so the
+        entries mapped to a GO term or any of its descendants can be looked up with
+        :meth:`get_entries_for_go_terms`.
+
+        :param path: The path to a local copy of the Gene Ontology in the OBO format, like ``go-basic.obo``
+        :return: The number of pairs of GO terms and their descendants, including themselves
+        """
+        from .parser.go import get_go_ontology
+
+        t = time.time()
+        terms, edges = get_go_ontology(path)
+
+        parents = defaultdict(list)
+        for child, parent in edges:
+            parents[child].append(parent)
+
+        go_term_ids = dict(self.session.query(GoTerm.go_id, GoTerm.id))
+        ancestors = {
+            ancestor
+            for go_id in go_term_ids
+            if go_id in terms
+            for ancestor in _get_ancestor_distances(parents, go_id)
+        }
+        # The ancestors get their own ancestors too, so the closure stays the same when it's loaded again
+        distances = {go_id: _get_ancestor_distances(parents, go_id) for go_id in ancestors}
+
+        self.session.bulk_insert_mappings(GoTerm, [
+            {'go_id': go_id, 'name': terms[go_id][0], 'namespace': terms[go_id][1]}
+            for go_id in sorted(ancestors - set(go_term_ids))
+        ])
+        self.session.bulk_update_mappings(GoTerm, [
+            {'id': go_term_id, 'namespace': terms[go_id][1]}
+            for go_id, go_term_id in go_term_ids.items()
+            if go_id in terms
+        ])
+        go_term_ids = dict(self.session.query(GoTerm.go_id, GoTerm.id))
+
+        self.session.query(GoClosure).delete(synchronize_session=False)
+        closure = [
+            {'ancestor_id': go_term_ids[ancestor], 'descendant_id': go_term_ids[go_id], 'distance': distance}
+            for go_id, ancestor_distances in distances.items()
+            for ancestor, distance in ancestor_distances.items()
+        ]
+        if closure:
+            self.session.execute(GoClosure.__table__.insert(), closure)
+        self.session.commit()
+        log.info(
+            'loaded %d GO terms and %d pairs in their closure in %.2f seconds',
+            len(go_term_ids), len(closure), time.time() - t,
+        )
+
+        self._index_search_tokens(GoTerm, SearchToken.go_term_id)
+        self._incidence_matrices.clear()
+        self._token_matcher = None
+
+        # The ancestors are new GO terms, so the counts used by summarize are out of date
+        self._refresh_model_counts()
+        self.session.commit()
+        return len(closure)
+
+    def count_go_closure(self) -> int:
+        """Count the pairs of GO terms and their descendants, including themselves, in the GO hierarchy."""
+        return self._count_model(GoClosure)
+
+    @_refreshes_stats
+    def _populate_proteins(self, url: Optional[str] = None, chunksize: Optional[int] = None,
+                           n_shards: Optional[int] = None, release: Optional[Release] = None,
+                           sort_memory: Optional[int] = None, max_memory: Union[None, int, str] = None) -> None:
+        """Populate the InterPro-protein mappings.
+
+        The mappings should be sorted by UniProt identifier. If they're not, that's found while they're loaded, the
+        proteins loaded so far are removed, and they're loaded again after an external merge sort. See
+        :mod:`bio2bel_interpro.sorting`.
+
+        :param url: The path to the protein mappings
+        :param chunksize: The number of protein mappings to read at a time. With a memory budget, the number to read
+         in the first chunk.
+        :param n_shards: If more than one, load the proteins with this many worker processes
+        :param release: If given, only load the differences from the previous release. Not done with shards.
+        :param sort_memory: The number of bytes of mappings to sort in memory at a time if they have to be sorted.
+         Defaults to half of the memory budget if one is given, and otherwise to
+         :data:`bio2bel_interpro.constants.SORT_MEMORY`.
+        :param max_memory: A memory budget for the process, in bytes or like ``2GB``. If given, the number of
+         mappings in each chunk is adjusted to it as they're loaded. See :mod:`bio2bel_interpro.budget`. Not done
+         with shards or releases.
+        """
+        from .budget import AdaptiveChunker, parse_memory
+        from .sorting import UnsortedError
+
+        chunker = None
+        if max_memory is not None:
+            if sort_memory is None:
+                sort_memory = parse_memory(max_memory) // 2
+            if release is None and (n_shards is None or n_shards <= 1):
+                chunker = AdaptiveChunker(max_memory, chunksize=chunksize)
+
+        chunksize = chunksize or CHUNKSIZE
+
+        # The memberships and the similarity index are derived from the proteins' annotations, so they have to be
+        # built again afterwards
+        self._clear_memberships()
+        self.session.query(LshBucket).delete(synchronize_session=False)
+        self.session.query(ProteinSignature).delete(synchronize_session=False)
+        self.session.commit()
+
+        if release is not None:
+            self._populate_proteins_release(url=url, chunksize=chunksize, release=release)
+            return
+
+        self._record_changed_entries(None)
+        if n_shards is not None and n_shards > 1:
+            load = partial(self._populate_proteins_sharded, n_shards=n_shards)
+        else:
+            load = partial(self._populate_proteins_serial, chunker=chunker)
+
+        offset = self.session.query(func.max(Protein.id)).scalar() or 0
+        try:
+            load(self._iterate_protein_chunks(url=url, chunksize=chunksize, chunker=chunker))
+        except UnsortedError as e:
+            log.warning('protein mappings are not sorted (%s). Sorting them externally', e)
+            self._remove_proteins_after(offset)
+            load(self._iterate_protein_chunks(
+                url=url,
+                chunksize=chunker.chunksize if chunker is not None else chunksize,
+                presorted=False,
+                sort_memory=sort_memory,
+            ))
+
+    @staticmethod
+    def _iterate_protein_chunks(url: Optional[str], chunksize: int, presorted: bool = True,
+                                sort_memory: Optional[int] = None,
+                                chunker: Optional['AdaptiveChunker'] = None) -> Iterable['pd.DataFrame']:
+        """Iterate over chunks of protein mappings that never split a protein.
+
+        :param presorted: If true, check that the mappings are sorted while reading them. Otherwise, sort them.
+        :param chunker: If given and the mappings are presorted, it chooses the number of mappings to read each time
+        :raises bio2bel_interpro.sorting.UnsortedError: If the mappings were supposed to be sorted but aren't
+        """
+        from .budget import iterate_adaptive_chunks
+        from .parser.proteins import get_proteins_chunks, iterate_protein_group_chunks
+        from .sorting import check_sorted_chunks, sort_chunks
 
         chunks = get_proteins_chunks(url=url, chunksize=chunksize)
-        for chunk in tqdm(chunks, desc=f'Protein mapping chunks of {chunksize}'):
+        if presorted:
+            if chunker is not None:
+                chunks = iterate_adaptive_chunks(chunks, chunker)
+            chunks = check_sorted_chunks(chunks)
+        else:
+            chunks = sort_chunks(chunks, max_memory=sort_memory or SORT_MEMORY, chunksize=chunksize)
+        return iterate_protein_group_chunks(chunks)
+
+    def _remove_proteins_after(self, offset: int) -> None:
+        """Remove the proteins, and their annotations, with database identifiers after the offset."""
+        self.session.rollback()
+        self.architectures.clear()
+        self.session.query(Annotation).filter(Annotation.protein_id > offset).delete(synchronize_session=False)
+        self.session.query(Protein).filter(Protein.id > offset).delete(synchronize_session=False)
+        self.session.commit()
+
+    def _populate_proteins_serial(self, chunks: Iterable['pd.DataFrame'],
+                                  chunker: Optional['AdaptiveChunker'] = None) -> None:
+        """Populate the InterPro-protein mappings from chunks that never split a protein.
+
+        The session is cleared after each chunk is committed, so it never holds more than one chunk of models.
+
+        :param chunker: If given, it's told how much memory and time each chunk took
+        """
+        from .architectures import get_architectures
+        from .budget import get_rss
+
+        entry_ids = dict(self.session.query(Entry.interpro_id, Entry.id).filter(Entry.in_release()))
+        domain_ids = self._get_domain_ids()
+        log.info('cached %d interpros', len(entry_ids))
+
+        # The cached entries would be detached when the session is cleared
+        self.session.commit()
+        self.session.expunge_all()
+        self.interpros.clear()
+
+        log.info('building protein models')
+
+        missing = set()
+
+        t = time.time()
+        for chunk in tqdm(chunks, desc='Protein mapping chunks'):
+            architectures = get_architectures(chunk, domain_ids)
+            architecture_ids = self._get_architecture_ids(set(architectures.tolist()), entry_ids)
 
             it = (x for _, x in chunk.iterrows())
             grouped = groupby(it, key=itemgetter(0))
 
             for uniprot_id, lines in tqdm(grouped):
-                protein = Protein(uniprot_id=uniprot_id)
+                architecture = architectures.get(uniprot_id)
+                protein = Protein(
+                    uniprot_id=uniprot_id,
+                    architecture_id=architecture_ids[architecture] if architecture is not None else None,
+                )
                 for (_, interpro_id, xref, start, end) in lines:
-                    interpro = interpros.get(interpro_id)
-                    if interpro is None:
+                    entry_id = entry_ids.get(interpro_id)
+                    if entry_id is None:
                         missing.add(interpro_id)
                         continue
 
                     annotation = Annotation(
-                        entry=interpro,
+                        entry_id=entry_id,
                         protein=protein,
                         xref=xref,
                         start=start,
@@ -269,31 +1053,1347 @@ class Manager(CompathManager, BELNamespaceManagerMixin, BELManagerMixin, FlaskMi
                     )
                     self.session.add(annotation)
 
-            t = time.time()
+            rss = get_rss() if chunker is not None else None
+
+            commit_time = time.time()
             log.info('committing proteins from chunk')
             self.session.commit()
-            log.info('committed proteins from chunk in %.2f seconds', time.time() - t)
+            self.session.expunge_all()
+            log.info('committed proteins from chunk in %.2f seconds', time.time() - commit_time)
+
+            if chunker is not None:
+                chunker.update(len(chunk.index), time.time() - t, rss=rss)
+            t = time.time()
 
         for m in missing:
             log.warning('missing %s', m)
 
-    def get_interpro_by_name(self, name: str) -> Optional[Entry]:
-        """Get an InterPro family by name, if exists."""
-        return self.session.query(Entry).filter(Entry.name == name).one_or_none()
+    def _populate_proteins_release(self, url: Optional[str], chunksize: int, release: Release) -> None:
+        """Populate the differences of a release's InterPro-protein mappings from the previous release."""
+        from sqlalchemy import or_
+
+        from .parser.proteins import get_proteins_chunks, iterate_protein_group_chunks
+        from .releases import load_annotation_delta
+
+        entry_ids = dict(self.session.query(Entry.interpro_id, Entry.id).filter(Entry.in_release()))
+        chunks = iterate_protein_group_chunks(get_proteins_chunks(url=url, chunksize=chunksize))
+
+        t = time.time()
+        log.info('loading the differences of release %s', release)
+        counts = load_annotation_delta(self.session.connection(), chunks, entry_ids, release.id)
+        self.session.commit()
+        self._record_changed_entries(
+            entry_id
+            for entry_id, in self.session.query(Annotation.entry_id).filter(
+                or_(Annotation.valid_from_id == release.id, Annotation.valid_to_id == release.id),
+            ).distinct()
+        )
+        log.info(
+            'loaded the differences of release %s in %.2f seconds: %s',
+            release, time.time() - t, ', '.join(f'{value} {key}' for key, value in counts.items()),
+        )
+
+    def _populate_proteins_sharded(self, chunks: Iterable['pd.DataFrame'], n_shards: int) -> None:
+        """Populate the InterPro-protein mappings from chunks that never split a protein with worker processes."""
+        from .sharding import populate_proteins_sharded
+
+        entry_ids = dict(self.session.query(Entry.interpro_id, Entry.id).filter(Entry.in_release()))
+        domain_ids = self._get_domain_ids()
+        self.session.commit()
+
+        t = time.time()
+        log.info('loading proteins in %d shards', n_shards)
+        missing = populate_proteins_sharded(self.engine, chunks, entry_ids, n_shards, domain_ids=domain_ids)
+        log.info('loaded proteins in %d shards in %.2f seconds', n_shards, time.time() - t)
+
+        self._link_architecture_entries(entry_ids)
+
+        for m in missing:
+            log.warning('missing %s', m)
+
+    def _get_domain_ids(self) -> Set[str]:
+        """Get the InterPro identifiers of the entries that make up domain architectures."""
+        query = self.session.query(Entry.interpro_id).join(Type).filter(Type.name.in_(ARCHITECTURE_TYPES))
+        return {interpro_id for interpro_id, in query}
+
+    def _get_architecture_ids(self, architectures: Iterable[str], entry_ids: Mapping[str, int]) -> Mapping[str, int]:
+        """Get the database identifiers of architectures from the cache or the database, or create them.
+
+        :param architectures: Architectures as strings of InterPro identifiers joined by ``~``
+        :param entry_ids: A dictionary from InterPro identifiers to the database identifiers of their entries
+        :return: A dictionary from the architectures to their database identifiers
+        """
+        from .architectures import hash_architecture, split_architecture
+
+        hashes = {architecture: hash_architecture(architecture) for architecture in architectures}
+
+        uncached = {
+            architecture_hash: architecture
+            for architecture, architecture_hash in hashes.items()
+            if architecture_hash not in self.architectures
+        }
+        for chunk in self._iterate_in_chunks(uncached):
+            query = (
+                self.session.query(Architecture.architecture_hash, Architecture.id)
+                .filter(Architecture.architecture_hash.in_(chunk))
+            )
+            self.architectures.update(query)
+
+        models = []
+        for architecture_hash, architecture in uncached.items():
+            if architecture_hash in self.architectures:
+                continue
+            interpro_ids = split_architecture(architecture)
+            models.append(Architecture(
+                architecture_hash=architecture_hash,
+                architecture=architecture,
+                length=len(interpro_ids),
+            ))
+
+        if models:
+            self.session.add_all(models)
+            self.session.flush()
+            self.session.execute(architecture_entry.insert(), [
+                {'architecture_id': model.id, 'entry_id': entry_ids[interpro_id]}
+                for model in models
+                for interpro_id in set(split_architecture(model.architecture))
+            ])
+            self.architectures.update((model.architecture_hash, model.id) for model in models)
+
+        return {
+            architecture: self.architectures[architecture_hash]
+            for architecture, architecture_hash in hashes.items()
+        }
+
+    def _link_architecture_entries(self, entry_ids: Mapping[str, int]) -> None:
+        """Link the architectures that were loaded without an ORM to their entries."""
+        from .architectures import split_architecture
+
+        unlinked = self.session.query(Architecture.id, Architecture.architecture).filter(~Architecture.entries.any())
+        self.session.execute(architecture_entry.insert(), [
+            {'architecture_id': architecture_id, 'entry_id': entry_ids[interpro_id]}
+            for architecture_id, architecture in unlinked.all()
+            for interpro_id in set(split_architecture(architecture))
+        ] or None)
+        self.session.commit()
+
+    def get_architecture(self, architecture: Union[str, Sequence[str]]) -> Optional[Architecture]:
+        """Get a domain architecture if it exists.
+
+        :param architecture: A sequence of InterPro identifiers or a string of them joined by ``~``
+        """
+        from .architectures import hash_architecture
 
-    def enrich_proteins(self, graph: BELGraph):
-        """Find UniProt entries and annotates their InterPro entries."""
-        raise NotImplementedError
+        return (
+            self.session.query(Architecture)
+            .filter(Architecture.architecture_hash == hash_architecture(architecture))
+            .one_or_none()
+        )
 
-    def enrich_interpros(self, graph: BELGraph):
-        """Find InterPro entries and annotates their proteins."""
-        raise NotImplementedError
+    def count_architectures(self) -> int:
+        """Count the distinct domain architectures in the database."""
+        return self._count_model(Architecture)
+
+    def get_proteins_by_architecture(self, architecture: Union[str, Sequence[str]]) -> List[Protein]:
+        """Get the proteins with exactly the given domain architecture.
+
+        :param architecture: A sequence of InterPro identifiers or a string of them joined by ``~``
+        """
+        from .architectures import hash_architecture
+
+        return (
+            self.session.query(Protein)
+            .join(Architecture)
+            .filter(Architecture.architecture_hash == hash_architecture(architecture))
+            .all()
+        )
+
+    def get_architecture_frequencies(self, limit: Optional[int] = None) -> List[Tuple[Architecture, int]]:
+        """Get the domain architectures with the numbers of proteins that have them, from most to least common."""
+        count = func.count(Protein.id)
+        query = (
+            self.session.query(Architecture, count)
+            .join(Protein)
+            .group_by(Architecture.id)
+            .order_by(count.desc(), Architecture.id)
+        )
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+
+    def get_similar_architectures(self, architecture: Union[str, Sequence[str]],
+                                  limit: int = 10) -> List[Tuple[Architecture, float]]:
+        """Get the domain architectures that share domains with the given one, ranked by their similarity.
+
+        :param architecture: A sequence of InterPro identifiers or a string of them joined by ``~``
+        :param limit: The maximum number of architectures to return
+        :return: Pairs of architectures and their similarities as calculated with
+         :func:`bio2bel_interpro.architectures.get_architecture_similarity`, from most to least similar. The given
+         architecture itself is left out.
+        """
+        from .architectures import get_architecture_similarity, join_architecture, split_architecture
+
+        architecture = join_architecture(architecture)
+        interpro_ids = split_architecture(architecture)
+
+        candidate_ids = set()
+        for chunk in self._iterate_in_chunks(interpro_ids):
+            candidate_ids.update(
+                architecture_id
+                for architecture_id, in (
+                    self.session.query(architecture_entry.c.architecture_id)
+                    .join(Entry)
+                    .filter(Entry.interpro_id.in_(chunk))
+                )
+            )
+
+        scores = []
+        for chunk in self._iterate_in_chunks(candidate_ids):
+            query = self.session.query(Architecture.id, Architecture.architecture).filter(Architecture.id.in_(chunk))
+            scores.extend(
+                (get_architecture_similarity(interpro_ids, split_architecture(candidate)), candidate_id)
+                for candidate_id, candidate in query
+                if candidate != architecture
+            )
+
+        scores = sorted(scores, key=lambda pair: (-pair[0], pair[1]))[:limit]
+        if not scores:
+            return []
+
+        models = {
+            model.id: model
+            for model in self.session.query(Architecture).filter(Architecture.id.in_([i for _, i in scores]))
+        }
+        return [(models[architecture_id], score) for score, architecture_id in scores]
+
+    def get_interpro_by_name(self, name: str, release: Optional[str] = None) -> Optional[Entry]:
+        """Get an InterPro family by name, if exists.
+
+        :param name: The name of an InterPro entry
+        :param release: The InterPro release to look at. Defaults to the latest.
+        """
+        release_id = self._get_release_id(release)
+        entry = self.session.query(Entry).filter(Entry.name == name, Entry.in_release(release_id)).one_or_none()
+        if entry is not None:
+            self._check_unchanged([entry], release_id)
+        return entry
+
+    def _iterate_in_chunks(self, values: Iterable) -> Iterable[List]:
+        """Split the unique values into chunks that fit in an ``IN`` clause for this manager's SQL dialect."""
+        size = MAX_IN_PARAMETERS.get(self.engine.dialect.name, DEFAULT_MAX_IN_PARAMETERS)
+        return iterate_chunks(sorted(set(values)), size)
+
+    def get_interpros_by_ids(self, interpro_ids: Iterable[str], load: Optional[str] = None,
+                             release: Optional[str] = None) -> Mapping[str, Entry]:
+        """Get InterPro entries by their identifiers. Identifiers that don't exist are left out.
+
+        :param interpro_ids: InterPro identifiers
+        :param load: The name of a loading preset for entries, like ``entry``
+        :param release: The InterPro release to look at. Defaults to the latest.
+        """
+        release_id = self._get_release_id(release)
+        rv = {}
+        for chunk in self._iterate_in_chunks(interpro_ids):
+            query = self._query(Entry, load).filter(Entry.interpro_id.in_(chunk), Entry.in_release(release_id))
+            rv.update((entry.interpro_id, entry) for entry in query)
+        self._check_unchanged(rv.values(), release_id)
+        return rv
+
+    def get_proteins_by_uniprot_ids(self, uniprot_ids: Iterable[str],
+                                    load: Optional[str] = None) -> Mapping[str, List[Protein]]:
+        """Get proteins by their UniProt identifiers. Identifiers that don't exist are left out.
+
+        :param uniprot_ids: UniProt identifiers
+        :param load: The name of a loading preset for proteins, like ``protein``
+        """
+        rv = defaultdict(list)
+        for chunk in self._iterate_in_chunks(uniprot_ids):
+            query = self._query(Protein, load).filter(Protein.uniprot_id.in_(chunk))
+            for protein in query:
+                rv[protein.uniprot_id].append(protein)
+        return dict(rv)
+
+    def get_entries_for_proteins(self, uniprot_ids: Iterable[str],
+                                 release: Optional[str] = None) -> Mapping[str, List[Entry]]:
+        """Get the InterPro entries annotated to each of the given proteins.
+
+        :param uniprot_ids: UniProt identifiers
+        :param release: The InterPro release to look at. Defaults to the latest.
+        :return: A dictionary from UniProt identifiers to lists of their InterPro entries. Proteins without any
+         annotations are left out.
+        """
+        release_id = self._get_release_id(release)
+        rv = defaultdict(list)
+        for chunk in self._iterate_in_chunks(uniprot_ids):
+            query = (
+                self.session.query(Protein.uniprot_id, Entry)
+                .select_from(Annotation)
+                .join(Protein, Annotation.protein)
+                .join(Entry, Annotation.entry)
+                .filter(Protein.uniprot_id.in_(chunk), Annotation.in_release(release_id))
+                .distinct()
+            )
+
+            for uniprot_id, entry in query.yield_per(YIELD_PER):
+                self._check_unchanged([entry], release_id)
+                rv[uniprot_id].append(entry)
+        return dict(rv)
+
+    def get_proteins_for_entries(self, interpro_ids: Iterable[str], include_descendants: bool = False,
+                                 release: Optional[str] = None) -> Mapping[str, List[Protein]]:
+        """Get the proteins annotated to each of the given InterPro entries.
+
+        :param interpro_ids: InterPro identifiers
+        :param include_descendants: Should proteins annotated to the descendants of each entry be included?
+        :param release: The InterPro release to look at. Defaults to the latest.
+        :return: A dictionary from InterPro identifiers to lists of their proteins. Entries without any
+         annotations are left out.
+        :raises ValueError: If descendants are included for a release after which any entry was moved
+        """
+        release_id = self._get_release_id(release)
+        if include_descendants and release_id is None and self._has_model(Membership):
+            return self._get_proteins_for_entries_from_memberships(interpro_ids)
+
+        entry_id_to_interpro_ids = self._get_entry_id_to_interpro_ids(
+            interpro_ids,
+            include_descendants=include_descendants,
+            release=release,
+        )
+
+        rv = defaultdict(list)
+        seen = defaultdict(set)
+        for chunk in self._iterate_in_chunks(entry_id_to_interpro_ids):
+            query = (
+                self.session.query(Annotation.entry_id, Protein)
+                .join(Protein, Annotation.protein)
+                .filter(Annotation.entry_id.in_(chunk), Annotation.in_release(release_id))
+                .distinct()
+            )
+
+            for entry_id, protein in query.yield_per(YIELD_PER):
+                for interpro_id in entry_id_to_interpro_ids[entry_id]:
+                    if protein.id in seen[interpro_id]:
+                        continue
+                    seen[interpro_id].add(protein.id)
+                    rv[interpro_id].append(protein)
+        return dict(rv)
+
+    def _get_proteins_for_entries_from_memberships(self, interpro_ids: Iterable[str]) -> Mapping[str, List[Protein]]:
+        """Get the proteins in each of the given InterPro entries and their descendants from the memberships."""
+        rv = defaultdict(list)
+        for chunk in self._iterate_in_chunks(interpro_ids):
+            query = (
+                self.session.query(Entry.interpro_id, Protein)
+                .select_from(Membership)
+                .join(Entry, Membership.entry)
+                .join(Protein, Membership.protein)
+                .filter(Entry.interpro_id.in_(chunk))
+            )
+
+            for interpro_id, protein in query.yield_per(YIELD_PER):
+                rv[interpro_id].append(protein)
+        return dict(rv)
+
+    def _get_entry_id_to_interpro_ids(self, interpro_ids: Iterable[str], include_descendants: bool = False,
+                                      release: Optional[str] = None) -> Mapping[int, Set[str]]:
+        """Map the database identifiers of entries to the given InterPro identifiers that they count towards.
+
+        :param interpro_ids: InterPro identifiers
+        :param include_descendants: Should the descendants of each entry count towards it?
+        :param release: The InterPro release to look at. Defaults to the latest.
+        """
+        release_id = self._get_release_id(release)
+        if not include_descendants:
+            rv = {}
+            for chunk in self._iterate_in_chunks(interpro_ids):
+                query = self.session.query(Entry.id, Entry.interpro_id).filter(
+                    Entry.interpro_id.in_(chunk), Entry.in_release(release_id),
+                )
+                rv.update((entry_id, {interpro_id}) for entry_id, interpro_id in query)
+            return rv
+
+        # Only the latest parents are kept
+        self._check_hierarchy_unchanged(release_id)
+
+        interpro_id_to_entry_id = dict(
+            self.session.query(Entry.interpro_id, Entry.id).filter(Entry.in_release(release_id))
+        )
+        children = self._get_entry_children()
+
+        rv = defaultdict(set)
+        for interpro_id in set(interpro_ids):
+            entry_id = interpro_id_to_entry_id.get(interpro_id)
+            if entry_id is None:
+                continue
+
+            for descendant_id in _iterate_subtree(children, entry_id):
+                rv[descendant_id].add(interpro_id)
+
+        return dict(rv)
+
+    @_on_primary
+    def build_memberships(self) -> int:
+        """Precompute which proteins are in each entry, through their annotations to the entry or its descendants.
+
+        The memberships are built level by level up the hierarchy with ``INSERT ... SELECT`` statements, starting
+        from the annotations, and replace any memberships that were built before.
+
+        :return: The number of memberships
+        """
+        from sqlalchemy import and_, exists, literal, select
+
+        memberships = Membership.__table__
+        entries = Entry.__table__
+
+        t = time.time()
+        self.session.query(Membership).delete(synchronize_session=False)
+        self._stale_memberships = False
+        count = self.session.execute(memberships.insert().from_select(
+            ['entry_id', 'protein_id', 'distance'],
+            select([Annotation.entry_id, Annotation.protein_id, literal(0)]).where(Annotation.in_release()).distinct(),
+        )).rowcount
+
+        distance = 0
+        while True:
+            distance += 1
+            previous = memberships.alias('previous')
+            existing = memberships.alias('existing')
+            inserted = self.session.execute(memberships.insert().from_select(
+                ['entry_id', 'protein_id', 'distance'],
+                select([entries.c.parent_id, previous.c.protein_id, literal(distance)])
+                .select_from(previous.join(entries, entries.c.id == previous.c.entry_id))
+                .where(and_(
+                    previous.c.distance == distance - 1,
+                    entries.c.parent_id.isnot(None),
+                    ~exists().where(and_(
+                        existing.c.entry_id == entries.c.parent_id,
+                        existing.c.protein_id == previous.c.protein_id,
+                    )),
+                ))
+                .distinct(),
+            )).rowcount
+            if not inserted:
+                break
+            count += inserted
+
+        self.session.commit()
+        log.info('built %d memberships over %d levels in %.2f seconds', count, distance, time.time() - t)
+        return count
+
+    def _clear_memberships(self) -> None:
+        """Delete the memberships, which are derived from the tree and the annotations, without committing.
+
+        If there were any, they're built again once the outermost method that loads data finishes.
+        """
+        if self.session.query(Membership).delete(synchronize_session=False):
+            self._stale_memberships = True
+
+    def count_memberships(self) -> int:
+        """Count the precomputed memberships of the proteins in the entries."""
+        return self._count_model(Membership)
+
+    def _has_model(self, model) -> bool:
+        """Check if there are any rows of the model with an ``EXISTS`` query, rather than counting all of them."""
+        return self.session.query(self.session.query(model).exists()).scalar()
+
+    def get_membership_index(self, use_roaring: Optional[bool] = None) -> 'MembershipIndex':
+        """Get the bitmaps of the proteins in each entry and its descendants, building the memberships if needed.
+
+        :param use_roaring: Should Roaring bitmaps be used? Defaults to whether :mod:`pyroaring` is installed.
+        """
+        import numpy as np
+        from .memberships import MembershipIndex
+
+        if not self._has_model(Membership):
+            self.build_memberships()
+
+        max_protein_id = self.session.query(func.max(Protein.id)).scalar() or 0
+        labels = np.full(max_protein_id + 1, '', dtype=object)
+        for protein_id, uniprot_id in self.session.query(Protein.id, Protein.uniprot_id).yield_per(YIELD_PER):
+            labels[protein_id] = uniprot_id
+
+        pairs = (
+            self.session.query(Entry.interpro_id, Membership.protein_id)
+            .join(Membership.entry)
+            .order_by(Entry.interpro_id)
+            .yield_per(YIELD_PER)
+        )
+        return MembershipIndex.from_pairs(pairs, labels=labels.astype(str), use_roaring=use_roaring)
+
+    def get_entries_for_go_terms(self, go_ids: Iterable[str], include_descendants: bool = True,
+                                 release: Optional[str] = None) -> Mapping[str, List[Entry]]:
+        """Get the InterPro entries mapped to each of the given GO terms.
+
+        :param go_ids: GO identifiers, with or without the ``GO:`` prefix
+        :param include_descendants: Should entries mapped to the descendants of each GO term be included? Only
+         possible after :meth:`populate_go_hierarchy`.
+        :param release: The name of the release to look in. Defaults to the latest release.
+        :return: A dictionary from the given GO identifiers to lists of their entries. GO terms without any entries
+         are left out.
+        """
+        from sqlalchemy import and_
+
+        keys = defaultdict(list)
+        for go_id in go_ids:
+            keys[go_id[len('GO:'):] if go_id.upper().startswith('GO:') else go_id].append(go_id)
+
+        release_id = self._get_release_id(release)
+        in_release = and_(Entry.id == entry_go.c.entry_id, Entry.in_release(release_id))
+        if include_descendants and self._has_model(GoClosure):
+            ancestor = aliased(GoTerm)
+            query = (
+                self.session.query(ancestor.go_id, Entry)
+                .select_from(GoClosure)
+                .join(ancestor, GoClosure.ancestor_id == ancestor.id)
+                .join(entry_go, entry_go.c.go_id == GoClosure.descendant_id)
+                .join(Entry, in_release)
+            )
+            go_id_column = ancestor.go_id
+        else:
+            query = (
+                self.session.query(GoTerm.go_id, Entry)
+                .select_from(entry_go)
+                .join(GoTerm)
+                .join(Entry, in_release)
+            )
+            go_id_column = GoTerm.go_id
+        query = query.filter(entry_go_in_release(release_id))
+
+        rv = defaultdict(list)
+        for chunk in self._iterate_in_chunks(keys):
+            for go_id, entry in query.filter(go_id_column.in_(chunk)).distinct().order_by(Entry.interpro_id):
+                self._check_unchanged([entry], release_id)
+                for key in keys[go_id]:
+                    rv[key].append(entry)
+        return dict(rv)
+
+    def get_go_entry_index(self, use_roaring: Optional[bool] = None) -> 'GoEntryIndex':
+        """Get bitmaps of the database identifiers of the entries mapped to each GO term or any of its descendants.
+
+        The bitmaps are keyed by GO identifiers without the ``GO:`` prefix, and their labels are the InterPro
+        identifiers of the entries. Without the GO hierarchy, only the direct mappings are included.
+
+        :param use_roaring: Should Roaring bitmaps be used? Defaults to whether :mod:`pyroaring` is installed.
+        """
+        import numpy as np
+        from .memberships import GoEntryIndex
+
+        max_entry_id = self.session.query(func.max(Entry.id)).scalar() or 0
+        labels = np.full(max_entry_id + 1, '', dtype=object)
+        for entry_id, interpro_id in self.session.query(Entry.id, Entry.interpro_id).filter(Entry.in_release()):
+            labels[entry_id] = interpro_id
+
+        if self._has_model(GoClosure):
+            pairs = (
+                self.session.query(GoTerm.go_id, entry_go.c.entry_id)
+                .select_from(GoClosure)
+                .join(GoTerm, GoClosure.ancestor_id == GoTerm.id)
+                .join(entry_go, entry_go.c.go_id == GoClosure.descendant_id)
+            )
+        else:
+            pairs = self.session.query(GoTerm.go_id, entry_go.c.entry_id).select_from(entry_go).join(GoTerm)
+
+        return GoEntryIndex.from_pairs(
+            pairs.filter(entry_go_in_release()).order_by(GoTerm.go_id).yield_per(YIELD_PER),
+            labels=labels.astype(str),
+            use_roaring=use_roaring,
+        )
+
+    @_on_primary
+    def build_similarity_index(self, num_perm: Optional[int] = None, bands: Optional[int] = None,
+                               chunksize: Optional[int] = None) -> int:
+        """Compute the MinHash signatures and LSH buckets of the proteins' InterPro entries, replacing any from before.
+
+        See :mod:`bio2bel_interpro.similarity`.
+
+        :param num_perm: The number of permutations in each signature. Defaults to
+         :data:`bio2bel_interpro.similarity.NUM_PERM`.
+        :param bands: The number of bands the signatures are split into, which has to divide the number of
+         permutations. Defaults to :data:`bio2bel_interpro.similarity.BANDS`. More bands with fewer rows find
+         candidates that are less similar.
+        :param chunksize: The number of protein database identifiers to compute signatures for at a time
+        :return: The number of proteins with signatures
+        """
+        import numpy as np
+        from .similarity import BANDS, NUM_PERM, get_band_hashes, get_signatures
+
+        num_perm = num_perm or NUM_PERM
+        bands = bands or BANDS
+        chunksize = chunksize or YIELD_PER
+
+        t = time.time()
+        self.session.query(LshBucket).delete(synchronize_session=False)
+        self.session.query(ProteinSignature).delete(synchronize_session=False)
+
+        count = 0
+        max_protein_id = self.session.query(func.max(Protein.id)).scalar() or 0
+        for low in range(0, max_protein_id + 1, chunksize):
+            pairs = np.array(
+                self.session.query(Annotation.protein_id, Annotation.entry_id)
+                .filter(Annotation.protein_id.between(low, low + chunksize - 1), Annotation.in_release())
+                .distinct()
+                .order_by(Annotation.protein_id)
+                .all(),
+                dtype=np.int64,
+            )
+            if not len(pairs):
+                continue
+
+            protein_ids, signatures = get_signatures(pairs[:, 0], pairs[:, 1], num_perm=num_perm)
+            buckets = get_band_hashes(signatures, bands=bands)
+
+            self.session.execute(ProteinSignature.__table__.insert(), [
+                {'protein_id': int(protein_id), 'signature': signature.astype('<u4').tobytes()}
+                for protein_id, signature in zip(protein_ids, signatures)
+            ])
+            self.session.execute(LshBucket.__table__.insert(), [
+                {'band': band, 'protein_id': int(protein_id), 'bucket': int(bucket)}
+                for protein_id, protein_buckets in zip(protein_ids, buckets)
+                for band, bucket in enumerate(protein_buckets)
+            ])
+            count += len(protein_ids)
+
+        self.session.commit()
+        log.info('built the similarity index of %d proteins in %.2f seconds', count, time.time() - t)
+        return count
+
+    def get_similar_proteins(self, uniprot_id: str, limit: int = 10) -> List[Tuple[Protein, float, float]]:
+        """Get the proteins with the most similar sets of InterPro entries, building the similarity index if needed.
+
+        The candidates are the proteins that share an LSH bucket with the given one. The candidates with the highest
+        similarities estimated from their MinHash signatures are kept, and their exact similarities are calculated.
+
+        :param uniprot_id: A UniProt identifier
+        :param limit: The maximum number of proteins to return
+        :return: Triples of proteins, their estimated Jaccard indexes, and their exact Jaccard indexes with the given
+         protein, sorted by the exact Jaccard indexes. Empty if the protein doesn't exist or has no entries.
+        """
+        import numpy as np
+        from sqlalchemy import and_
+        from .similarity import estimate_similarities, get_jaccard
+
+        if not self._has_model(ProteinSignature):
+            self.build_similarity_index()
+
+        protein = self.get_protein_by_uniprot_id(uniprot_id)
+        if protein is None:
+            return []
+
+        signature = (
+            self.session.query(ProteinSignature.signature)
+            .filter(ProteinSignature.protein_id == protein.id)
+            .scalar()
+        )
+        if signature is None:
+            return []
+
+        mine, other = aliased(LshBucket), aliased(LshBucket)
+        candidate_ids = [
+            protein_id
+            for protein_id, in (
+                self.session.query(other.protein_id)
+                .select_from(mine)
+                .join(other, and_(other.band == mine.band, other.bucket == mine.bucket))
+                .filter(mine.protein_id == protein.id, other.protein_id != protein.id)
+                .distinct()
+            )
+        ]
+        if not candidate_ids:
+            return []
+
+        protein_ids, signatures = [], []
+        for chunk in self._iterate_in_chunks(candidate_ids):
+            query = (
+                self.session.query(ProteinSignature.protein_id, ProteinSignature.signature)
+                .filter(ProteinSignature.protein_id.in_(chunk))
+            )
+            for protein_id, candidate_signature in query:
+                protein_ids.append(protein_id)
+                signatures.append(np.frombuffer(candidate_signature, dtype='<u4'))
+
+        estimates = estimate_similarities(np.frombuffer(signature, dtype='<u4'), np.vstack(signatures))
+        best = np.argsort(-estimates, kind='stable')[:limit]
+        best_ids = [protein_ids[i] for i in best]
+
+        entry_ids = defaultdict(set)
+        query = (
+            self.session.query(Annotation.protein_id, Annotation.entry_id)
+            .filter(Annotation.protein_id.in_([protein.id, *best_ids]), Annotation.in_release())
+        )
+        for protein_id, entry_id in query:
+            entry_ids[protein_id].add(entry_id)
+
+        proteins = {
+            candidate.id: candidate
+            for candidate in self.session.query(Protein).filter(Protein.id.in_(best_ids))
+        }
+        rv = [
+            (proteins[protein_id], float(estimates[i]), get_jaccard(entry_ids[protein.id], entry_ids[protein_id]))
+            for i, protein_id in zip(best, best_ids)
+        ]
+        return sorted(rv, key=lambda triple: (-triple[2], -triple[1], triple[0].uniprot_id))
+
+    def _get_entry_children(self) -> Mapping[int, List[int]]:
+        """Map the database identifiers of entries to the database identifiers of their children."""
+        rv = defaultdict(list)
+        for entry_id, parent_id in self.session.query(Entry.id, Entry.parent_id).filter(Entry.parent_id.isnot(None)):
+            rv[parent_id].append(entry_id)
+        return dict(rv)
+
+    def _index_search_tokens(self, model, column) -> None:
+        """Rebuild the inverted index of the tokens in the names of the given model."""
+        from .search import tokenize
+
+        self.session.query(SearchToken).filter(column.isnot(None)).delete(synchronize_session=False)
+
+        self.session.bulk_insert_mappings(SearchToken, [
+            {'token': token, column.key: model_id}
+            for model_id, name in self.session.query(model.id, model.name).yield_per(YIELD_PER)
+            for token in set(tokenize(name))
+        ])
+
+        t = time.time()
+        log.info('committing search tokens for %s', model.__tablename__)
+        self.session.commit()
+        log.info('committed search tokens in %.2f seconds', time.time() - t)
+
+    def search_entries(self, query: str, limit: int = 10) -> List[Entry]:
+        """Search InterPro entries by their identifiers or names, tolerating typos and incomplete words.
+
+        :param query: An InterPro identifier or part of a name
+        :param limit: The maximum number of entries to return
+        :return: The best matching entries, from best to worst
+        """
+        entry = self.get_interpro_by_interpro_id(query.strip().upper())
+        if entry is not None:
+            return [entry]
+
+        return self._search(Entry, SearchToken.entry_id, query, limit)
+
+    def search_go_terms(self, query: str, limit: int = 10) -> List[GoTerm]:
+        """Search GO terms by their identifiers or names, tolerating typos and incomplete words.
+
+        :param query: A GO identifier, with or without the ``GO:`` prefix, or part of a name
+        :param limit: The maximum number of GO terms to return
+        :return: The best matching GO terms, from best to worst
+        """
+        go_id = query.strip()
+        go_term = self.get_go_by_go_identifier(go_id[len('GO:'):] if go_id.upper().startswith('GO:') else go_id)
+        if go_term is not None:
+            return [go_term]
+
+        return self._search(GoTerm, SearchToken.go_term_id, query, limit)
+
+    def _search(self, model, column, query: str, limit: int) -> List:
+        from .search import TokenMatcher, rank_names, tokenize
+
+        if self._token_matcher is None:
+            self._token_matcher = TokenMatcher(token for token, in self.session.query(distinct(SearchToken.token)))
+
+        matches = [self._token_matcher.match(token) for token in tokenize(query)]
+        if not matches:
+            return []
+
+        postings = []
+        for chunk in self._iterate_in_chunks(set().union(*matches)):
+            postings.extend(
+                self.session
+                .query(column, SearchToken.token)
+                .filter(column.isnot(None), SearchToken.token.in_(chunk))
+            )
+
+        # Entries that were removed in the latest release aren't found
+        filters = [model.in_release()] if issubclass(model, ReleaseRangeMixin) else []
+
+        names = {}
+        for chunk in self._iterate_in_chunks(target_id for target_id, _ in postings):
+            names.update(self.session.query(model.id, model.name).filter(model.id.in_(chunk), *filters))
+        postings = [(target_id, token) for target_id, token in postings if target_id in names]
+
+        ranked = [target_id for _, target_id in rank_names(query, names, postings, matches)[:limit]]
+        if not ranked:
+            return []
+
+        models = {
+            result.id: result
+            for result in self.session.query(model).filter(model.id.in_(ranked))
+        }
+        return [models[target_id] for target_id in ranked]
+
+    def get_entry_catalog(self, release: Optional[str] = None) -> 'EntryCatalog':
+        """Get a compact catalog of the entries, their hierarchy, and their GO terms that doesn't need a session.
+
+        :param release: The InterPro release to look at. Defaults to the latest.
+        :raises ValueError: If any entry was renamed or moved after the given release
+        """
+        from .catalog import EntryCatalog
+
+        release_id = self._get_release_id(release)
+        self._check_hierarchy_unchanged(release_id, renamed=True)
+        parent = aliased(Entry)
+        return EntryCatalog.from_rows(
+            entries=(
+                self.session
+                .query(Entry.interpro_id, Entry.name, Type.name)
+                .outerjoin(Type)
+                .filter(Entry.in_release(release_id))
+                .yield_per(YIELD_PER)
+            ),
+            parents=(
+                self.session
+                .query(Entry.interpro_id, parent.interpro_id)
+                .join(parent, Entry.parent_id == parent.id)
+                .filter(Entry.in_release(release_id), parent.in_release(release_id))
+            ),
+            go_mappings=(
+                self.session
+                .query(Entry.interpro_id, GoTerm.go_id, GoTerm.name)
+                .select_from(entry_go)
+                .join(Entry)
+                .join(GoTerm)
+                .filter(Entry.in_release(release_id), entry_go_in_release(release_id))
+            ),
+        )
+
+    def get_entry_stats(self, interpro_id: str) -> Optional[EntryStats]:
+        """Get the precomputed aggregates for an InterPro entry, if they exist."""
+        return self.session.query(EntryStats).join(Entry).filter(Entry.interpro_id == interpro_id).one_or_none()
+
+    def get_entry_stats_by_ids(self, interpro_ids: Iterable[str]) -> Mapping[str, EntryStats]:
+        """Get the precomputed aggregates for several InterPro entries. Identifiers that don't exist are left out."""
+        rv = {}
+        for chunk in self._iterate_in_chunks(interpro_ids):
+            query = self.session.query(Entry.interpro_id, EntryStats).join(Entry).filter(Entry.interpro_id.in_(chunk))
+            rv.update(query)
+        return rv
+
+    @_on_primary
+    def refresh_stats(self, interpro_ids: Optional[Iterable[str]] = None) -> None:
+        """Recompute the precomputed entry-level aggregates and the model counts used by :meth:`summarize`.
+
+        :param interpro_ids: If given, only refresh the aggregates of these entries and their ancestors
+        """
+        if interpro_ids is None:
+            self._refresh_stats()
+        else:
+            self._refresh_stats([entry.id for entry in self.get_interpros_by_ids(interpro_ids).values()])
+
+    def _record_changed_entries(self, entry_ids: Optional[Iterable[int]]) -> None:
+        """Record the database identifiers of entries whose aggregates are changed by the data that's being loaded.
+
+        :param entry_ids: The database identifiers of the entries, or None if the aggregates of all of them can be
+         changed
+        """
+        if entry_ids is None:
+            self._changed_entry_ids = None
+        elif self._changed_entry_ids is not None:
+            self._changed_entry_ids.update(entry_ids)
+
+    @_on_primary
+    def _refresh_stats(self, entry_ids: Optional[Iterable[int]] = None) -> None:
+        """Recompute the aggregates of the entries with the given database identifiers and their ancestors, or of
+        all of the entries, and the model counts.
+        """
+        children = self._get_entry_children()
+
+        if entry_ids is None:
+            entry_ids = [entry_id for entry_id, in self.session.query(Entry.id)]
+        else:
+            parents = {
+                child_id: parent_id
+                for parent_id, child_ids in children.items()
+                for child_id in child_ids
+            }
+            changed_entry_ids, entry_ids = entry_ids, set()
+            for entry_id in changed_entry_ids:
+                while entry_id is not None and entry_id not in entry_ids:
+                    entry_ids.add(entry_id)
+                    entry_id = parents.get(entry_id)
+
+        for chunk in tqdm(self._iterate_in_chunks(entry_ids), desc='Entry statistics'):
+            self.session.query(EntryStats).filter(EntryStats.entry_id.in_(chunk)).delete(synchronize_session=False)
+            self.session.bulk_insert_mappings(EntryStats, list(self._iterate_entry_stats(chunk, children)))
+
+        self._refresh_model_counts()
+
+        t = time.time()
+        log.info('committing statistics')
+        self.session.commit()
+        log.info('committed statistics in %.2f seconds', time.time() - t)
+
+    def _refresh_model_counts(self) -> None:
+        """Recompute the model counts used by :meth:`summarize`, without committing."""
+        self.session.query(ModelCount).delete(synchronize_session=False)
+        self.session.add_all(
+            ModelCount(name=name, count=count)
+            for name, count in self._count_models().items()
+        )
+
+    def _iterate_entry_stats(self, entry_ids: List[int], children: Mapping[int, List[int]]) -> Iterable[Mapping]:
+        """Calculate the aggregates for the given entries."""
+        annotation_counts = {
+            entry_id: (protein_count, annotation_count)
+            for entry_id, protein_count, annotation_count in (
+                self.session.query(
+                    Annotation.entry_id,
+                    func.count(distinct(Annotation.protein_id)),
+                    func.count(Annotation.id),
+                )
+                .filter(Annotation.entry_id.in_(entry_ids), Annotation.in_release())
+                .group_by(Annotation.entry_id)
+            )
+        }
+
+        go_term_counts = dict(
+            self.session.query(entry_go.c.entry_id, func.count(entry_go.c.go_id))
+            .filter(entry_go.c.entry_id.in_(entry_ids), entry_go_in_release())
+            .group_by(entry_go.c.entry_id)
+        )
+
+        descendant_protein_counts = self._count_descendant_proteins(entry_ids, children)
+
+        for entry_id in entry_ids:
+            protein_count, annotation_count = annotation_counts.get(entry_id, (0, 0))
+
+            if entry_id in children:
+                descendant_protein_count = descendant_protein_counts.get(entry_id, 0)
+            else:
+                descendant_protein_count = protein_count
+
+            yield dict(
+                entry_id=entry_id,
+                protein_count=protein_count,
+                annotation_count=annotation_count,
+                descendant_protein_count=descendant_protein_count,
+                go_term_count=go_term_counts.get(entry_id, 0),
+            )
+
+    def _count_descendant_proteins(self, entry_ids: Iterable[int],
+                                   children: Mapping[int, List[int]]) -> Mapping[int, int]:
+        """Count the distinct proteins annotated to each of the given entries with children or to their descendants.
+
+        The subtrees are expanded with a recursive common table expression, so the proteins are counted by the
+        database with one query for each chunk of entries, without loading the pairs of entries and proteins.
+        """
+        from sqlalchemy import select
+
+        entries = Entry.__table__
+
+        rv = {}
+        for chunk in self._iterate_in_chunks(entry_id for entry_id in entry_ids if entry_id in children):
+            subtrees = (
+                select([entries.c.id.label('ancestor_id'), entries.c.id.label('descendant_id')])
+                .where(entries.c.id.in_(chunk))
+                .cte('subtrees', recursive=True)
+            )
+            subtrees = subtrees.union_all(
+                select([subtrees.c.ancestor_id, entries.c.id]).where(entries.c.parent_id == subtrees.c.descendant_id)
+            )
+            query = (
+                self.session.query(subtrees.c.ancestor_id, func.count(distinct(Annotation.protein_id)))
+                .select_from(subtrees)
+                .join(Annotation, Annotation.entry_id == subtrees.c.descendant_id)
+                .filter(Annotation.in_release())
+                .group_by(subtrees.c.ancestor_id)
+            )
+            rv.update(query)
+        return rv
+
+    def _count_models(self) -> Mapping[str, int]:
+        """Count the models in the database, using the entry-level aggregates for the annotations."""
+        return dict(
+            interpros=self.count_interpros(),
+            annotations=self.session.query(func.sum(EntryStats.annotation_count)).scalar() or 0,
+            proteins=self.count_proteins(),
+            go_terms=self.count_go_terms(),
+        )
+
+    def get_protein_entry_matrix(self, propagate: bool = False, values: str = 'binary') -> 'IncidenceMatrix':
+        """Get the protein × InterPro entry incidence matrix.
+
+        The matrix is built on first use and cached on the manager.
+
+        :param propagate: Should proteins also count towards all ancestors of the entries they're annotated to?
+        :param values: Either ``binary`` for membership, ``count`` for the number of annotations, or ``coverage`` for
+         the number of residues covered by the annotations
+        """
+        key = 'entry', propagate, values
+        incidence = self._incidence_matrices.get(key)
+        if incidence is not None:
+            return incidence
+
+        from .matrices import IncidenceMatrix, stack_blocks
+
+        blocks, uniprot_ids, interpro_ids, names = self._get_protein_entry_blocks(propagate=propagate, values=values)
+        incidence = self._incidence_matrices[key] = IncidenceMatrix(
+            matrix=stack_blocks(blocks, shape=(len(uniprot_ids), len(interpro_ids))),
+            row_labels=uniprot_ids,
+            column_labels=interpro_ids,
+            column_names=names,
+        )
+        return incidence
+
+    def export_protein_entry_matrix(self, directory: str, propagate: bool = False, values: str = 'binary') -> None:
+        """Write the protein × InterPro entry incidence matrix to a directory, with memory-mappable arrays.
+
+        The matrix is built from chunks of annotations and spilled to disk as it goes, so it never needs to be held
+        in memory. Load it with :func:`bio2bel_interpro.matrices.load_incidence_matrix`.
+
+        :param directory: The directory in which to write the matrix
+        :param propagate: Should proteins also count towards all ancestors of the entries they're annotated to?
+        :param values: Either ``binary`` for membership, ``count`` for the number of annotations, or ``coverage`` for
+         the number of residues covered by the annotations
+        """
+        from .matrices import save_blocks
+
+        blocks, uniprot_ids, interpro_ids, names = self._get_protein_entry_blocks(propagate=propagate, values=values)
+        save_blocks(blocks, directory, row_labels=uniprot_ids, column_labels=interpro_ids, column_names=names)
+
+    def _get_protein_entry_blocks(self, propagate: bool = False, values: str = 'binary'):
+        """Get an iterator over blocks of the protein × entry matrix and the labels of its rows and columns."""
+        import numpy as np
+        from .matrices import build_ancestor_matrix, iterate_annotation_blocks
+
+        protein_ids, uniprot_ids = self._get_labeled_ids(Protein.id, Protein.uniprot_id)
+        entry_ids, interpro_ids, names = self._get_labeled_ids(Entry.id, Entry.interpro_id, Entry.name)
+
+        if propagate:
+            parents = dict(self.session.query(Entry.id, Entry.parent_id).filter(Entry.parent_id.isnot(None)))
+            ancestors = build_ancestor_matrix(entry_ids, parents)
+        else:
+            ancestors = None
+
+        query = (
+            self.session.query(Annotation.protein_id, Annotation.entry_id, Annotation.start, Annotation.end)
+            .filter(Annotation.in_release())
+            .order_by(Annotation.protein_id)
+            .yield_per(YIELD_PER)
+        )
+        chunks = (
+            np.array(chunk, dtype=np.int64)
+            for chunk in iterate_chunks(query, CHUNKSIZE)
+        )
+        blocks = iterate_annotation_blocks(chunks, protein_ids, entry_ids, values=values, ancestors=ancestors)
+
+        return blocks, uniprot_ids, interpro_ids, names
+
+    def get_protein_go_matrix(self, propagate: bool = False) -> 'IncidenceMatrix':
+        """Get the binary protein × GO term incidence matrix, going through the InterPro-GO mappings.
+
+        The matrix is built on first use and cached on the manager.
+
+        :param propagate: Should proteins also count towards the GO terms of all ancestors of the entries they're
+         annotated to?
+        """
+        key = 'go', propagate
+        incidence = self._incidence_matrices.get(key)
+        if incidence is not None:
+            return incidence
+
+        import numpy as np
+        from .matrices import build_incidence_matrix
+
+        entry_ids, _ = self._get_labeled_ids(Entry.id, Entry.interpro_id)
+        go_term_ids, go_ids, names = self._get_labeled_ids(GoTerm.id, GoTerm.go_id, GoTerm.name)
+
+        pairs = self.session.query(entry_go.c.entry_id, entry_go.c.go_id).filter(entry_go_in_release()).all()
+        entry_go_matrix = build_incidence_matrix(
+            [np.array(pairs).T] if pairs else [],
+            entry_ids,
+            go_term_ids,
+        )
+
+        incidence = self._incidence_matrices[key] = self.get_protein_entry_matrix(propagate=propagate).compose(
+            entry_go_matrix,
+            column_labels=go_ids,
+            column_names=names,
+        )
+        return incidence
+
+    def _get_labeled_ids(self, id_column, *label_columns):
+        """Get the sorted database identifiers of a model and the corresponding arrays of labels."""
+        import numpy as np
+
+        query = self.session.query(id_column, *label_columns).order_by(id_column).yield_per(YIELD_PER)
+
+        ids, labels = [np.empty(0, dtype=np.int64)], [[np.empty(0, dtype=str)] for _ in label_columns]
+        for chunk in iterate_chunks(query, CHUNKSIZE):
+            chunk_ids, *chunk_labels = zip(*chunk)
+            ids.append(np.array(chunk_ids, dtype=np.int64))
+            for column, chunk_column in zip(labels, chunk_labels):
+                column.append(np.array(chunk_column, dtype=str))
+
+        return (np.concatenate(ids),) + tuple(np.concatenate(column) for column in labels)
+
+    def get_entry_enrichment(self, uniprot_ids: Iterable[str], background: Optional[Iterable[str]] = None,
+                             propagate: bool = False) -> 'pd.DataFrame':
+        """Calculate the over-representation of InterPro entries in the given proteins.
+
+        :param uniprot_ids: The UniProt identifiers of the query proteins
+        :param background: The UniProt identifiers of the background proteins. Defaults to all proteins.
+        :param propagate: Should proteins also count towards all ancestors of the entries they're annotated to?
+        :return: A data frame with the InterPro entries that contain at least one query protein, sorted by p-value
+        """
+        df = self.get_entry_enrichments({'query': uniprot_ids}, background=background, propagate=propagate)
+        return df.drop(columns='query')
+
+    def get_entry_enrichments(self, query_sets: Mapping[str, Iterable[str]],
+                              background: Optional[Iterable[str]] = None,
+                              propagate: bool = False) -> 'pd.DataFrame':
+        """Calculate the over-representation of InterPro entries in each of several sets of proteins at once.
+
+        :param query_sets: A dictionary from the names of query sets to the UniProt identifiers in each
+        :param background: The UniProt identifiers of the background proteins. Defaults to all proteins.
+        :param propagate: Should proteins also count towards all ancestors of the entries they're annotated to?
+        :return: A data frame with a ``query`` column, sorted by query set and p-value
+        """
+        from .enrichment import calculate_enrichments
+        return calculate_enrichments(self.get_protein_entry_matrix(propagate=propagate), query_sets, background)
+
+    def get_go_enrichment(self, uniprot_ids: Iterable[str], background: Optional[Iterable[str]] = None,
+                          propagate: bool = False) -> 'pd.DataFrame':
+        """Calculate the over-representation of GO terms in the given proteins via their InterPro entries.
+
+        :param uniprot_ids: The UniProt identifiers of the query proteins
+        :param background: The UniProt identifiers of the background proteins. Defaults to all proteins.
+        :param propagate: Should proteins also count towards the GO terms of all ancestors of the entries they're
+         annotated to?
+        :return: A data frame with the GO terms that contain at least one query protein, sorted by p-value
+        """
+        df = self.get_go_enrichments({'query': uniprot_ids}, background=background, propagate=propagate)
+        return df.drop(columns='query')
+
+    def get_go_enrichments(self, query_sets: Mapping[str, Iterable[str]],
+                           background: Optional[Iterable[str]] = None,
+                           propagate: bool = False) -> 'pd.DataFrame':
+        """Calculate the over-representation of GO terms in each of several sets of proteins at once.
+
+        :param query_sets: A dictionary from the names of query sets to the UniProt identifiers in each
+        :param background: The UniProt identifiers of the background proteins. Defaults to all proteins.
+        :param propagate: Should proteins also count towards the GO terms of all ancestors of the entries they're
+         annotated to?
+        :return: A data frame with a ``query`` column, sorted by query set and p-value
+        """
+        from .enrichment import calculate_enrichments
+        return calculate_enrichments(self.get_protein_go_matrix(propagate=propagate), query_sets, background)
+
+    @staticmethod
+    def _cli_add_export_matrix(main: click.Group) -> click.Group:  # noqa: D202
+        """Add the export-matrix command."""
+
+        @main.command(name='export-matrix')
+        @click.option('-d', '--directory', required=True, type=click.Path(file_okay=False),
+                      help='Directory in which to write the matrix')
+        @click.option('--values', type=click.Choice(MATRIX_VALUES), default='binary', show_default=True,
+                      help='Values to put in the matrix')
+        @click.option('--propagate', is_flag=True, help='Count proteins towards the ancestors of their entries')
+        @click.pass_obj
+        def export_matrix(manager: Manager, directory: str, values: str, propagate: bool):
+            """Export the sparse protein × InterPro entry matrix."""
+            manager.export_protein_entry_matrix(directory, propagate=propagate, values=values)
+
+        return main
+
+    @staticmethod
+    def _cli_add_download(main: click.Group) -> click.Group:  # noqa: D202
+        """Add the download command."""
+
+        @main.command()
+        @click.option('--compression', type=click.Choice(sorted(COMPRESSION_SUFFIXES)),
+                      help='Compress the downloaded files at rest')
+        @click.option('-f', '--force', is_flag=True, help='Re-download files that are already cached')
+        @click.option('--max-workers', type=int, help='Number of concurrent downloads. Defaults to one per file.')
+        def download(compression: Optional[str], force: bool, max_workers: Optional[int]):
+            """Download the source files concurrently."""
+            from .downloading import download_all
+
+            for name, path in download_all(force_download=force, compression=compression,
+                                           max_workers=max_workers).items():
+                click.echo(f'{name}\t{path}')
+
+        return main
+
+    @staticmethod
+    def _cli_add_stream_bel(main: click.Group) -> click.Group:  # noqa: D202
+        """Add the stream-bel command."""
+
+        @main.command(name='stream-bel')
+        @click.option('-o', '--output', type=click.File('w'), default='-', help='Defaults to standard out')
+        @click.option('-f', '--fmt', type=click.Choice(BEL_FORMATS), default='nodelink', show_default=True)
+        @click.option('--entries-url', help='Path to the InterPro entries file')
+        @click.option('--tree-url', help='Path to the InterPro tree file')
+        @click.option('--proteins-url', help='Path to the protein mappings')
+        @click.option('--chunksize', type=int, help='Number of protein mappings to read at a time')
+        @click.option('--max-workers', type=int, help='Number of worker processes. Use 0 to convert in one process.')
+        def stream_bel(output, fmt: str, entries_url: Optional[str], tree_url: Optional[str],
+                       proteins_url: Optional[str], chunksize: Optional[int], max_workers: Optional[int]):
+            """Convert the source files to BEL without using the database."""
+            from .streaming import write_bel
+
+            counts = write_bel(
+                output,
+                fmt=fmt,
+                entries_url=entries_url,
+                tree_url=tree_url,
+                proteins_url=proteins_url,
+                chunksize=chunksize,
+                max_workers=max_workers,
+            )
+            click.echo(', '.join(f'{count} {name}' for name, count in counts.items()), err=True)
+
+        return main
+
+    @staticmethod
+    def _cli_add_build_snapshot(main: click.Group) -> click.Group:  # noqa: D202
+        """Add the build-snapshot command."""
+
+        @main.command(name='build-snapshot')
+        @click.option('-o', '--output', required=True, type=click.Path(dir_okay=False),
+                      help='Path of the SQLite snapshot')
+        @click.option('--proteins/--no-proteins', default=True, show_default=True,
+                      help='Include the protein mappings')
+        @click.option('--n-shards', type=int, help='Number of worker processes with which to load the proteins')
+        @click.option('-f', '--force', is_flag=True, help='Replace an existing snapshot')
+        def build_snapshot(output: str, proteins: bool, n_shards: Optional[int], force: bool):
+            """Build a read-only SQLite snapshot for serving."""
+            from .snapshot import build_snapshot
+
+            connection = build_snapshot(output, force=force, populate_proteins=proteins, n_shards=n_shards)
+            click.echo(connection)
+
+        return main
+
+    @staticmethod
+    def _cli_add_load_go(main: click.Group) -> click.Group:  # noqa: D202
+        """Add the load-go command."""
+
+        @main.command(name='load-go')
+        @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+        @click.pass_obj
+        def load_go(manager: Manager, path: str):
+            """Load the GO hierarchy from a local OBO file, like go-basic.obo."""
+            count = manager.populate_go_hierarchy(path)
+            click.echo(f'{count} pairs of GO terms and their descendants')
+
+        return main
+
+    @staticmethod
+    def _cli_add_enrich_graphs(main: click.Group) -> click.Group:  # noqa: D202
+        """Add the enrich-graphs command."""
+
+        @main.command(name='enrich-graphs')
+        @click.argument('source', type=click.Path(exists=True))
+        @click.option('-d', '--directory', required=True, type=click.Path(file_okay=False),
+                      help='Directory in which to write the enriched graphs')
+        @click.option('--proteins/--no-proteins', default=True, show_default=True,
+                      help='Add the InterPro entries of UniProt proteins')
+        @click.option('--interpros/--no-interpros', default=True, show_default=True,
+                      help='Add the proteins of InterPro entries')
+        @click.option('--max-workers', type=int, help='Number of worker processes. Use 0 to enrich in one process.')
+        @click.pass_context
+        def enrich_graphs(ctx: click.Context, source: str, directory: str, proteins: bool, interpros: bool,
+                          max_workers: Optional[int]):
+            """Enrich the BEL graphs in a directory, or listed in a manifest, with InterPro."""
+            from .batch import enrich_graphs, get_graph_paths
+
+            manager: Manager = ctx.obj
+            paths = get_graph_paths(source)
+            enrichments = [name for name, flag in (('proteins', proteins), ('interpros', interpros)) if flag]
+
+            t = time.time()
+            lookup = manager.get_annotation_lookup()
+            # The workers don't use the database, so they shouldn't inherit its connections
+            manager.session.close()
+            manager.engine.dispose()
+            if manager.replica_engine is not None:
+                manager.replica_engine.dispose()
+            click.echo(f'Loaded {len(lookup)} annotations in {time.time() - t:.2f} seconds', err=True)
+
+            t = time.time()
+            edges, failed = 0, 0
+            for result in enrich_graphs(paths, directory, lookup, enrichments=enrichments, max_workers=max_workers):
+                if result.error is not None:
+                    failed += 1
+                    click.echo(f'{result.path}\tfailed: {result.error}', err=True)
+                else:
+                    edges += result.edges
+                    click.echo(f'{result.output}\t{result.edges}')
+
+            seconds = time.time() - t
+            click.echo(
+                f'Enriched {len(paths) - failed} graphs ({failed} failed) with {edges} edges in {seconds:.2f} seconds'
+                f' ({len(paths) / seconds if seconds else 0:.2f} graphs per second)',
+                err=True,
+            )
+            if failed:
+                ctx.exit(1)
+
+        return main
+
+    @classmethod
+    def get_cli(cls) -> click.Group:
+        """Get the :mod:`click` main function to use as a command line interface."""
+        main = super().get_cli()
+        cls._cli_add_export_matrix(main)
+        cls._cli_add_download(main)
+        cls._cli_add_stream_bel(main)
+        cls._cli_add_build_snapshot(main)
+        cls._cli_add_load_go(main)
+        cls._cli_add_enrich_graphs(main)
+        return main
+
+    def enrich_proteins(self, graph: 'BELGraph') -> int:
+        """Find UniProt entries and annotates their InterPro entries.
+
+        :return: The number of edges that were added
+        """
+        from .batch import enrich_proteins
+        return enrich_proteins(graph, self._get_entry_names_for_proteins)
+
+    def _get_entry_names_for_proteins(self, uniprot_ids: Iterable[str]) -> Mapping[str, List[Tuple[str, str]]]:
+        return {
+            uniprot_id: [(entry.interpro_id, entry.name) for entry in entries]
+            for uniprot_id, entries in self.get_entries_for_proteins(uniprot_ids).items()
+        }
+
+    def enrich_interpros(self, graph: 'BELGraph') -> int:
+        """Find InterPro entries and annotates their proteins.
+
+        :return: The number of edges that were added
+        """
+        from .batch import enrich_interpros
+        return enrich_interpros(graph, self._get_uniprot_ids_for_entries)
+
+    def _get_uniprot_ids_for_entries(self, interpro_ids: Iterable[str]) -> Mapping[str, List[str]]:
+        return {
+            interpro_id: [protein.uniprot_id for protein in proteins]
+            for interpro_id, proteins in self.get_proteins_for_entries(interpro_ids).items()
+        }
+
+    def get_annotation_lookup(self) -> 'AnnotationLookup':
+        """Load the annotations of the latest release into flat arrays for enriching many graphs.
+
+        See :func:`bio2bel_interpro.batch.enrich_graphs`.
+        """
+        from .batch import AnnotationLookup
+
+        names = dict(self.session.query(Entry.interpro_id, Entry.name).filter(Entry.in_release()))
+        pairs = (
+            self.session.query(Protein.uniprot_id, Entry.interpro_id)
+            .select_from(Annotation)
+            .join(Protein, Annotation.protein)
+            .join(Entry, Annotation.entry)
+            .filter(Annotation.in_release())
+        )
+        return AnnotationLookup.from_pairs(pairs.yield_per(YIELD_PER), names)
 
     @staticmethod
     def _get_identifier(entry: Entry) -> str:
         return entry.interpro_id
 
-    def _create_namespace_entry_from_model(self, entry: Entry, namespace: Namespace) -> NamespaceEntry:
+    def _create_namespace_entry_from_model(self, entry: Entry, namespace: 'Namespace') -> 'NamespaceEntry':
+        from pybel.manager.models import NamespaceEntry
+
         return NamespaceEntry(
             encoding='P',
             name=entry.name,
@@ -301,23 +2401,176 @@ class Manager(CompathManager, BELNamespaceManagerMixin, BELManagerMixin, FlaskMi
             namespace=namespace,
         )
 
-    def to_bel(self) -> BELGraph:
-        """Get the InterPro hierarchy and annotations as BEL."""
+    def _get_namespace_values(self) -> List[Tuple[str, str]]:
+        """Get the pairs of InterPro identifiers and names of the latest release's entries, sorted by identifier."""
+        return (
+            self.session.query(Entry.interpro_id, Entry.name)
+            .filter(Entry.in_release())
+            .order_by(Entry.interpro_id)
+            .all()
+        )
+
+    @_on_primary
+    def upload_bel_namespace(self, update: bool = False) -> 'Namespace':
+        """Upload the namespace to the PyBEL database, or update it if the entries changed since it was uploaded.
+
+        The namespace's version is the content hash of the entries' identifiers and names, so this is a no-op if
+        they didn't change. Otherwise, new entries are inserted and renamed entries are updated in bulk. Entries
+        that no longer exist are kept, like when bio2bel updates a namespace.
+
+        :param update: Kept for compatibility. The namespace is always updated if the entries changed.
+        """
+        from pybel.manager.models import Namespace, NamespaceEntry
+        from .namespaces import hash_namespace_values
+
+        values = self._get_namespace_values()
+        if not values:
+            self.populate()
+            values = self._get_namespace_values()
+
+        version = hash_namespace_values(values)
+
+        namespace = self._get_default_namespace()
+        if namespace is not None and namespace.version == version:
+            return namespace
+
+        t = time.time()
+        if namespace is None:
+            log.info('making namespace for %s', self._get_namespace_name())
+            namespace = Namespace(
+                name=self._get_namespace_name(),
+                keyword=self._get_namespace_keyword(),
+                url=self._get_namespace_url(),
+                version=version,
+            )
+            self.session.add(namespace)
+            self.session.flush()
+            old_names = {}
+        else:
+            log.info('updating namespace for %s', self._get_namespace_name())
+            namespace.version = version
+            old_names = {
+                identifier: (namespace_entry_id, name)
+                for namespace_entry_id, identifier, name in (
+                    self.session.query(NamespaceEntry.id, NamespaceEntry.identifier, NamespaceEntry.name)
+                    .filter(NamespaceEntry.namespace_id == namespace.id)
+                )
+            }
+
+        new_entries = [
+            dict(namespace_id=namespace.id, identifier=interpro_id, name=name, encoding=Entry.bel_encoding)
+            for interpro_id, name in values
+            if interpro_id not in old_names
+        ]
+        if new_entries:
+            self.session.execute(NamespaceEntry.__table__.insert(), new_entries)
+
+        renamed_entries = [
+            dict(id=old_names[interpro_id][0], name=name)
+            for interpro_id, name in values
+            if interpro_id in old_names and old_names[interpro_id][1] != name
+        ]
+        if renamed_entries:
+            self.session.bulk_update_mappings(NamespaceEntry, renamed_entries)
+
+        self.session.commit()
+        log.info(
+            'inserted %d and renamed %d namespace entries in %.2f seconds',
+            len(new_entries), len(renamed_entries), time.time() - t,
+        )
+        return namespace
+
+    def write_bel_namespace(self, file: TextIO, use_names: bool = False) -> None:
+        """Write the entries as a BEL namespace file, streaming them from the database in order.
+
+        :param file: A writable file or file-like
+        :param use_names: Should the entries' names be used as the values instead of their identifiers?
+        """
+        from .namespaces import write_belns
+
+        if not self.is_populated():
+            self.populate()
+
+        column = Entry.name if use_names else Entry.interpro_id
+        values = (
+            (value, Entry.bel_encoding)
+            for value, in self.session.query(column).filter(Entry.in_release()).order_by(column).yield_per(YIELD_PER)
+        )
+        write_belns(
+            values,
+            namespace_name=self._get_namespace_name(),
+            namespace_keyword=self._get_namespace_keyword(),
+            namespace_query_url=self.identifiers_url,
+            file=file,
+        )
+
+    def to_bel(self) -> 'BELGraph':
+        """Get the InterPro hierarchy, annotations, and mappings to GO as BEL.
+
+        Entries are associated with the biological processes and cellular components they're mapped to, and with their
+        own activities for the molecular functions. GO terms are only included once the GO hierarchy is loaded with
+        :meth:`populate_go_hierarchy`, since that's what gives them their namespaces.
+        """
+        from pybel import BELGraph
+        from pybel.constants import CITATION_REFERENCE, CITATION_TYPE, CITATION_TYPE_URL
+        from .constants import INTERPRO_GO_MAPPING_URL
+
         graph = BELGraph()
 
         interpro_namespace = self.upload_bel_namespace()
         graph.namespace_url[interpro_namespace.keyword] = interpro_namespace.url
 
-        for entry in self.list_interpros():
-            entry_bel = entry.as_bel()
+        entries = self.list_interpros()
+        entries_bel = {entry.id: entry.as_bel() for entry in entries}
 
-            for child in entry.children:
-                graph.add_is_a(child.as_bel(), entry_bel)
+        for entry in entries:
+            if entry.parent_id in entries_bel:
+                graph.add_is_a(entries_bel[entry.id], entries_bel[entry.parent_id])
 
-            for annotation in entry.annotations:
-                graph.add_is_a(annotation.protein.as_bel(), entry_bel)
+        annotations = self.session.query(Annotation.entry_id, Protein).join(Protein).filter(Annotation.in_release())
+        for entry_id, protein in annotations.yield_per(YIELD_PER):
+            graph.add_is_a(protein.as_bel(), entries_bel[entry_id])
 
-            # for go_term in entry.go_terms:
-            #    graph.add_qualified_edge(entry_bel, go_term.as_bel())
+        citation = {CITATION_TYPE: CITATION_TYPE_URL, CITATION_REFERENCE: INTERPRO_GO_MAPPING_URL}
+        go_mappings = (
+            self.session.query(entry_go.c.entry_id, GoTerm)
+            .join(GoTerm, GoTerm.id == entry_go.c.go_id)
+            .filter(GoTerm.namespace.isnot(None), entry_go_in_release())
+        )
+        for entry_id, go_term in go_mappings.yield_per(YIELD_PER):
+            if entry_id not in entries_bel:
+                continue
+            entry_bel = entries_bel[entry_id]
+            if go_term.namespace == 'molecular_function':
+                graph.add_association(
+                    entry_bel, entry_bel, object_modifier=go_term.as_activity(), citation=citation,
+                    evidence='InterPro2GO',
+                )
+            else:
+                graph.add_association(entry_bel, go_term.as_bel(), citation=citation, evidence='InterPro2GO')
 
         return graph
+
+
+def _get_ancestor_distances(parents: Mapping[str, List[str]], node: str) -> Mapping[str, int]:
+    """Get the distances of the shortest paths from a node to each of its ancestors and itself in a DAG."""
+    distances = {node: 0}
+    frontier = [node]
+    while frontier:
+        next_frontier = []
+        for child in frontier:
+            for parent in parents.get(child, ()):
+                if parent not in distances:
+                    distances[parent] = distances[child] + 1
+                    next_frontier.append(parent)
+        frontier = next_frontier
+    return distances
+
+
+def _iterate_subtree(children: Mapping[int, List[int]], entry_id: int) -> Iterable[int]:
+    """Iterate over the database identifiers of an entry and all of its descendants."""
+    stack = [entry_id]
+    while stack:
+        entry_id = stack.pop()
+        yield entry_id
+        stack.extend(children.get(entry_id, ()))
@@ -0,0 +1,362 @@
+# -*- coding: utf-8 -*-
+
+"""Sparse incidence matrices between proteins, InterPro entries, and GO terms.
+
+This module requires :mod:`scipy`. When installing, use the enrichment extra like:
+
+.. source-code:: sh
+
+    pip install bio2bel_interpro[enrichment]
+"""
+
+import logging
+import os
+import shutil
+import tempfile
+from typing import Iterable, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from .constants import MATRIX_VALUES
+
+__all__ = [
+    'IncidenceMatrix',
+    'build_incidence_matrix',
+    'build_ancestor_matrix',
+    'iterate_annotation_blocks',
+    'stack_blocks',
+    'save_blocks',
+    'load_incidence_matrix',
+]
+
+log = logging.getLogger(__name__)
+
+#: The number of elements copied at a time when converting the spilled arrays
+COPY_CHUNKSIZE = 1 << 22
+
+_INT32_MAX = np.iinfo(np.int32).max
+
+
+class IncidenceMatrix:
+    """A sparse matrix with labeled rows and columns."""
+
+    def __init__(self, matrix: sparse.csr_matrix, row_labels: Sequence[str], column_labels: Sequence[str],
+                 column_names: Optional[Sequence[str]] = None) -> None:
+        """Build an incidence matrix.
+
+        :param matrix: A matrix, usually binary
+        :param row_labels: The labels of the rows (e.g., UniProt identifiers)
+        :param column_labels: The labels of the columns (e.g., InterPro identifiers)
+        :param column_names: The optional human-readable names of the columns
+        """
+        self.matrix = matrix
+        self.row_labels = row_labels
+        self.column_labels = column_labels
+        self.column_names = column_names
+        self._row_index = None
+        self._column_index = None
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        """Return the shape of the matrix."""
+        return self.matrix.shape
+
+    @property
+    def row_index(self) -> Mapping[str, int]:
+        """Return a dictionary from the row labels to their positions, built on first use."""
+        if self._row_index is None:
+            self._row_index = {str(label): i for i, label in enumerate(self.row_labels)}
+        return self._row_index
+
+    @property
+    def column_index(self) -> Mapping[str, int]:
+        """Return a dictionary from the column labels to their positions, built on first use."""
+        if self._column_index is None:
+            self._column_index = {str(label): i for i, label in enumerate(self.column_labels)}
+        return self._column_index
+
+    def get_row_indices(self, labels: Iterable[str]) -> np.ndarray:
+        """Get the sorted indices of the rows with the given labels. Unknown labels are skipped."""
+        row_index = self.row_index
+        return np.unique(np.fromiter(
+            (row_index[label] for label in labels if label in row_index),
+            dtype=np.int64,
+        ))
+
+    def compose(self, other: sparse.csr_matrix, column_labels: Sequence[str],
+                column_names: Optional[Sequence[str]] = None) -> 'IncidenceMatrix':
+        """Multiply with a binary matrix whose rows correspond to the columns of this one.
+
+        :param other: A binary matrix with as many rows as this matrix has columns
+        :param column_labels: The labels of the columns of the other matrix
+        :param column_names: The optional human-readable names of the columns of the other matrix
+        """
+        return IncidenceMatrix(
+            matrix=_binarize(self.matrix @ other),
+            row_labels=self.row_labels,
+            column_labels=column_labels,
+            column_names=column_names,
+        )
+
+
+def build_incidence_matrix(pairs: Iterable[Tuple[np.ndarray, np.ndarray]], row_ids: np.ndarray,
+                           column_ids: np.ndarray) -> sparse.csr_matrix:
+    """Build a binary matrix from chunks of database identifier pairs.
+
+    :param pairs: An iterable of pairs of equal length arrays of row and column database identifiers
+    :param row_ids: The sorted database identifiers corresponding to the rows
+    :param column_ids: The sorted database identifiers corresponding to the columns
+    """
+    rows, columns = [], []
+    for row_chunk, column_chunk in pairs:
+        rows.append(np.searchsorted(row_ids, row_chunk).astype(np.int32))
+        columns.append(np.searchsorted(column_ids, column_chunk).astype(np.int32))
+
+    rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int32)
+    columns = np.concatenate(columns) if columns else np.empty(0, dtype=np.int32)
+    log.debug('building %d x %d matrix from %d pairs', len(row_ids), len(column_ids), len(rows))
+
+    matrix = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.int32), (rows, columns)),
+        shape=(len(row_ids), len(column_ids)),
+    )
+    return _binarize(matrix)
+
+
+def build_ancestor_matrix(entry_ids: np.ndarray, parents: Mapping[int, int]) -> sparse.csr_matrix:
+    """Build a square binary matrix whose element (i, j) is set if entry j is entry i or one of its ancestors.
+
+    :param entry_ids: The sorted database identifiers of the entries
+    :param parents: A dictionary from the database identifiers of entries to those of their parents
+    """
+    rows, columns = [], []
+    for row, entry_id in enumerate(entry_ids):
+        while entry_id is not None:
+            rows.append(row)
+            columns.append(entry_id)
+            entry_id = parents.get(entry_id)
+
+    return sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.int32), (rows, np.searchsorted(entry_ids, columns))),
+        shape=(len(entry_ids), len(entry_ids)),
+    )
+
+
+def iterate_annotation_blocks(chunks: Iterable[np.ndarray], protein_ids: np.ndarray, entry_ids: np.ndarray,
+                              values: str = 'binary',
+                              ancestors: Optional[sparse.csr_matrix] = None,
+                              ) -> Iterable[Tuple[int, sparse.csr_matrix]]:
+    """Build blocks of consecutive rows of a protein × entry matrix from chunks of annotations.
+
+    Each chunk is cut at the last protein boundary so no protein is split between blocks.
+
+    :param chunks: Arrays with columns for the protein database identifier, entry database identifier, start, and
+     end of each annotation, ordered by protein database identifier
+    :param protein_ids: The sorted database identifiers of the proteins corresponding to the rows
+    :param entry_ids: The sorted database identifiers of the entries corresponding to the columns
+    :param values: Either ``binary`` for membership, ``count`` for the number of annotations, or ``coverage`` for
+     the number of residues covered by the annotations
+    :param ancestors: The optional matrix from :func:`build_ancestor_matrix`. If given, annotations also count
+     towards all ancestors of their entries.
+    :return: Pairs of the index of the first row in each block and the block itself
+    """
+    if values not in MATRIX_VALUES:
+        raise ValueError(f'invalid values: {values}. Should be one of {MATRIX_VALUES}')
+
+    carry = None
+    for chunk in chunks:
+        if carry is not None and len(carry):
+            chunk = np.concatenate([carry, chunk])
+
+        split = np.searchsorted(chunk[:, 0], chunk[-1, 0])
+        carry = chunk[split:]
+        if split:
+            yield _build_block(chunk[:split], protein_ids, entry_ids, values, ancestors)
+
+    if carry is not None and len(carry):
+        yield _build_block(carry, protein_ids, entry_ids, values, ancestors)
+
+
+def _build_block(chunk: np.ndarray, protein_ids: np.ndarray, entry_ids: np.ndarray, values: str,
+                 ancestors: Optional[sparse.csr_matrix]) -> Tuple[int, sparse.csr_matrix]:
+    rows = np.searchsorted(protein_ids, chunk[:, 0])
+    columns = np.searchsorted(entry_ids, chunk[:, 1])
+    starts, ends = chunk[:, 2], chunk[:, 3]
+
+    if ancestors is not None:
+        lengths = np.diff(ancestors.indptr)[columns]
+        positions = (
+            np.repeat(ancestors.indptr[columns] - np.cumsum(lengths) + lengths, lengths)
+            + np.arange(lengths.sum())
+        )
+        columns = ancestors.indices[positions]
+        rows, starts, ends = np.repeat(rows, lengths), np.repeat(starts, lengths), np.repeat(ends, lengths)
+
+    offset = rows[0]
+    rows = rows - offset
+
+    if values == 'coverage':
+        data = _get_covered_residues(rows, columns, starts, ends)
+    else:
+        data = np.ones(len(rows), dtype=np.int32)
+
+    block = sparse.csr_matrix((data, (rows, columns)), shape=(rows[-1] + 1, len(entry_ids)))
+    block.sum_duplicates()
+    if values == 'binary':
+        block.data.fill(1)
+
+    return offset, block
+
+
+def _get_covered_residues(rows: np.ndarray, columns: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Calculate how many residues each annotation adds to the union of the annotations for the same protein/entry.
+
+    Summing the results for each protein/entry pair gives the number of residues covered by at least one annotation.
+    """
+    order = np.lexsort((starts, columns, rows))
+    sorted_rows, sorted_columns = rows[order], columns[order]
+    sorted_starts, sorted_ends = starts[order], ends[order]
+
+    new_group = np.r_[True, (sorted_rows[1:] != sorted_rows[:-1]) | (sorted_columns[1:] != sorted_columns[:-1])]
+    running_ends = pd.Series(sorted_ends).groupby(np.cumsum(new_group)).cummax().to_numpy()
+    previous_ends = np.r_[0, running_ends[:-1]]
+    previous_ends[new_group] = 0
+
+    covered = np.maximum(0, sorted_ends - np.maximum(sorted_starts - 1, previous_ends))
+
+    rv = np.empty(len(order), dtype=np.int32)
+    rv[order] = covered
+    return rv
+
+
+def _iterate_csr_parts(blocks: Iterable[Tuple[int, sparse.csr_matrix]],
+                       n_rows: int) -> Iterable[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """Iterate over the parts of the index pointer (without its leading zero), indices, and data of stacked blocks.
+
+    Rows that aren't covered by any block are left empty.
+    """
+    row = nnz = 0
+    for offset, block in blocks:
+        yield (
+            np.r_[np.full(offset - row, nnz, dtype=np.int64), block.indptr[1:].astype(np.int64) + nnz],
+            block.indices,
+            block.data,
+        )
+        row = offset + block.shape[0]
+        nnz += block.nnz
+
+    yield np.full(n_rows - row, nnz, dtype=np.int64), np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32)
+
+
+def _get_index_dtype(nnz: int, shape: Tuple[int, int]):
+    """Get the smallest index type that SciPy will use for a matrix without copying its index arrays."""
+    return np.int32 if max(nnz, *shape) <= _INT32_MAX else np.int64
+
+
+def stack_blocks(blocks: Iterable[Tuple[int, sparse.csr_matrix]], shape: Tuple[int, int]) -> sparse.csr_matrix:
+    """Stack blocks of consecutive rows from :func:`iterate_annotation_blocks` into one matrix in memory."""
+    indptr_parts, indices_parts, data_parts = zip(*_iterate_csr_parts(blocks, shape[0]))
+    indptr = np.concatenate((np.zeros(1, dtype=np.int64),) + indptr_parts)
+    index_dtype = _get_index_dtype(indptr[-1], shape)
+
+    return sparse.csr_matrix(
+        (
+            np.concatenate(data_parts).astype(np.int32),
+            np.concatenate(indices_parts).astype(index_dtype),
+            indptr.astype(index_dtype),
+        ),
+        shape=shape,
+    )
+
+
+def save_blocks(blocks: Iterable[Tuple[int, sparse.csr_matrix]], directory: str, row_labels: Sequence[str],
+                column_labels: Sequence[str], column_names: Optional[Sequence[str]] = None) -> None:
+    """Stack blocks of consecutive rows from :func:`iterate_annotation_blocks` into a matrix on disk.
+
+    The blocks are spilled to disk as they come, so only one block is ever held in memory. The index pointer, indices,
+    and data of the CSR matrix are written as ``indptr.npy``, ``indices.npy``, and ``data.npy`` so they can be memory
+    mapped, and the labels are written as ``labels.npz``. Use :func:`load_incidence_matrix` to load the results.
+
+    :param blocks: Pairs of the index of the first row in each block and the block itself
+    :param directory: The directory in which to write the matrix
+    :param row_labels: The labels of the rows (e.g., UniProt identifiers)
+    :param column_labels: The labels of the columns (e.g., InterPro identifiers)
+    :param column_names: The optional human-readable names of the columns
+    """
+    os.makedirs(directory, exist_ok=True)
+    shape = len(row_labels), len(column_labels)
+    spill_directory = tempfile.mkdtemp(dir=directory)
+
+    try:
+        spill_paths = [os.path.join(spill_directory, name) for name in ('indptr', 'indices', 'data')]
+        spill_dtypes = np.int64, np.int32, np.int32
+        files = [open(path, 'wb') for path in spill_paths]
+        try:
+            files[0].write(np.zeros(1, dtype=np.int64).tobytes())
+            for parts in _iterate_csr_parts(blocks, shape[0]):
+                for file, part, dtype in zip(files, parts, spill_dtypes):
+                    file.write(part.astype(dtype, copy=False).tobytes())
+        finally:
+            for file in files:
+                file.close()
+
+        nnz = os.path.getsize(spill_paths[2]) // np.dtype(np.int32).itemsize
+        index_dtype = _get_index_dtype(nnz, shape)
+        for spill_path, spill_dtype, dtype in zip(spill_paths, spill_dtypes, (index_dtype, index_dtype, np.int32)):
+            path = os.path.join(directory, f'{os.path.basename(spill_path)}.npy')
+            _convert_spill(spill_path, spill_dtype, path, dtype)
+
+    finally:
+        shutil.rmtree(spill_directory)
+
+    np.savez(
+        os.path.join(directory, 'labels.npz'),
+        shape=np.array(shape),
+        row_labels=np.asarray(row_labels, dtype=str),
+        column_labels=np.asarray(column_labels, dtype=str),
+        column_names=np.asarray(column_names if column_names is not None else [], dtype=str),
+    )
+
+
+def _convert_spill(spill_path: str, spill_dtype, path: str, dtype) -> None:
+    """Convert a raw spilled array to a ``.npy`` file of the given type, a chunk at a time."""
+    size = os.path.getsize(spill_path) // np.dtype(spill_dtype).itemsize
+    target = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=(size,))
+    if size:
+        source = np.memmap(spill_path, dtype=spill_dtype, mode='r')
+        for start in range(0, size, COPY_CHUNKSIZE):
+            target[start:start + COPY_CHUNKSIZE] = source[start:start + COPY_CHUNKSIZE]
+        del source
+    target.flush()
+    del target
+
+
+def load_incidence_matrix(directory: str, mmap_mode: Optional[str] = 'r') -> IncidenceMatrix:
+    """Load a matrix written by :func:`save_blocks`.
+
+    :param directory: The directory containing the matrix
+    :param mmap_mode: The mode for memory mapping the arrays of the matrix. Use ``None`` to load them into memory.
+    """
+    labels = np.load(os.path.join(directory, 'labels.npz'))
+    indptr, indices, data = (
+        np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mmap_mode)
+        for name in ('indptr', 'indices', 'data')
+    )
+    column_names = labels['column_names']
+
+    return IncidenceMatrix(
+        matrix=sparse.csr_matrix((data, indices, indptr), shape=tuple(labels['shape'])),
+        row_labels=labels['row_labels'],
+        column_labels=labels['column_labels'],
+        column_names=column_names if len(column_names) else None,
+    )
+
+
+def _binarize(matrix: sparse.spmatrix) -> sparse.csr_matrix:
+    """Set all non-zero elements of the matrix to one."""
+    matrix = matrix.tocsr()
+    matrix.sum_duplicates()
+    matrix.data.fill(1)
+    return matrix
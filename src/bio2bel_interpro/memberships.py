@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+
+"""Bitmaps of the proteins that are transitively in each InterPro entry, for set operations across families.
+
+A protein that's annotated to an entry is implicitly in all of the entry's ancestors too. These memberships are
+precomputed into :class:`bio2bel_interpro.models.Membership` by :meth:`bio2bel_interpro.Manager.build_memberships`,
+then loaded into a :class:`MembershipIndex` with one bitmap of protein database identifiers for each entry by
+:meth:`bio2bel_interpro.Manager.get_membership_index`.
+
+The GO terms get the same kind of index, :class:`GoEntryIndex`, with one bitmap of entry database identifiers for each
+GO term by :meth:`bio2bel_interpro.Manager.get_go_entry_index`.
+
+The bitmaps are compressed Roaring bitmaps if :mod:`pyroaring` is installed. Otherwise, they're sorted arrays of
+:mod:`numpy` integers, which take more memory for big families but support the same operations. Install the
+roaring extra like:
+
+.. source-code:: sh
+
+    pip install bio2bel_interpro[roaring]
+"""
+
+from functools import reduce
+from typing import Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+__all__ = [
+    'BitmapIndex',
+    'MembershipIndex',
+    'GoEntryIndex',
+    'make_bitmap',
+]
+
+#: The key under which the format of the bitmaps is saved
+FORMAT_KEY = '__format__'
+
+#: The key under which the labels of the members, like the UniProt identifiers of the proteins, are saved
+LABELS_KEY = '__labels__'
+
+
+def _get_bitmap_class():
+    """Get the class for Roaring bitmaps if :mod:`pyroaring` is installed."""
+    try:
+        from pyroaring import BitMap
+    except ImportError:
+        return None
+    return BitMap
+
+
+def make_bitmap(protein_ids: Iterable[int], use_roaring: Optional[bool] = None):
+    """Make a bitmap of database identifiers, like those of proteins.
+
+    :param protein_ids: Database identifiers
+    :param use_roaring: Should a Roaring bitmap be made? Defaults to whether :mod:`pyroaring` is installed.
+    :return: A :class:`pyroaring.BitMap` or a sorted array of unique unsigned integers
+
+    >>> make_bitmap([5, 2, 5], use_roaring=False)
+    array([2, 5], dtype=uint32)
+    """
+    bitmap_class = _get_bitmap_class()
+    if use_roaring is None:
+        use_roaring = bitmap_class is not None
+    elif use_roaring and bitmap_class is None:
+        raise ImportError('making Roaring bitmaps requires pyroaring')
+
+    values = np.unique(np.fromiter(protein_ids, dtype=np.uint32))
+    if use_roaring:
+        return bitmap_class(values)
+    return values
+
+
+class BitmapIndex:
+    """The bitmaps of the database identifiers of the members of each key."""
+
+    def __init__(self, bitmaps: Mapping[str, object], labels: Optional[np.ndarray] = None):
+        """Build a bitmap index.
+
+        :param bitmaps: A dictionary from keys to bitmaps from :func:`make_bitmap`
+        :param labels: An array whose elements at the members' database identifiers are their labels
+        """
+        self.bitmaps = dict(bitmaps)
+        self.labels = labels
+
+    @classmethod
+    def from_pairs(cls, pairs: Iterable[Tuple[str, int]], labels: Optional[np.ndarray] = None,
+                   use_roaring: Optional[bool] = None):
+        """Build an index from pairs of keys and the database identifiers of their members.
+
+        :param pairs: Pairs that are sorted, or at least grouped, by their keys
+        :param labels: An array whose elements at the members' database identifiers are their labels
+        :param use_roaring: Should Roaring bitmaps be made? Defaults to whether :mod:`pyroaring` is installed.
+        """
+        bitmaps = {}
+        key, member_ids = None, []
+        for pair_key, member_id in pairs:
+            if pair_key != key:
+                if member_ids:
+                    bitmaps[key] = make_bitmap(member_ids, use_roaring=use_roaring)
+                key, member_ids = pair_key, []
+            member_ids.append(member_id)
+
+        if member_ids:
+            bitmaps[key] = make_bitmap(member_ids, use_roaring=use_roaring)
+
+        return cls(bitmaps, labels=labels)
+
+    def __len__(self) -> int:  # noqa: D105
+        return len(self.bitmaps)
+
+    def __contains__(self, key: str) -> bool:  # noqa: D105
+        return key in self.bitmaps
+
+    def get(self, key: str):
+        """Get the bitmap of the members of a key, which is empty if it has no members."""
+        bitmap = self.bitmaps.get(key)
+        if bitmap is None:
+            return self._empty()
+        return bitmap
+
+    def _empty(self):
+        bitmap_class = _get_bitmap_class()
+        if bitmap_class is not None and any(isinstance(bitmap, bitmap_class) for bitmap in self.bitmaps.values()):
+            return bitmap_class()
+        return np.array([], dtype=np.uint32)
+
+    def union(self, *keys: str):
+        """Get the bitmap of the members of any of the keys."""
+        return reduce(_union, map(self.get, keys), self._empty())
+
+    def intersection(self, *keys: str):
+        """Get the bitmap of the members of all of the keys."""
+        if not keys:
+            return self._empty()
+        return reduce(_intersection, map(self.get, keys))
+
+    def difference(self, key: str, *keys: str):
+        """Get the bitmap of the members of the first key but not of any of the others."""
+        return _difference(self.get(key), self.union(*keys))
+
+    def select(self, include: Sequence[str], require: Sequence[str] = (), exclude: Sequence[str] = ()):
+        """Select the members of any of the included keys, of all of the required ones, and of none of the excluded.
+
+        :param include: The keys of which the members have to be in at least one
+        :param require: The keys of which the members have to be in every one
+        :param exclude: The keys of which the members can't be in any
+        :return: A bitmap of database identifiers
+        """
+        rv = self.union(*include)
+        if require:
+            rv = _intersection(rv, self.intersection(*require))
+        if exclude:
+            rv = _difference(rv, self.union(*exclude))
+        return rv
+
+    def get_labels(self, bitmap) -> List[str]:
+        """Get the labels of the database identifiers in a bitmap.
+
+        :raises ValueError: If the index doesn't have labels
+        """
+        if self.labels is None:
+            raise ValueError(f'{self.__class__.__name__} was built without labels')
+        return self.labels[np.fromiter(bitmap, dtype=np.int64)].tolist()
+
+    def save(self, path: str) -> None:
+        """Save the bitmaps, in their portable serialization if they're Roaring bitmaps, to a NumPy archive."""
+        bitmap_class = _get_bitmap_class()
+        if bitmap_class is not None and any(isinstance(bitmap, bitmap_class) for bitmap in self.bitmaps.values()):
+            arrays = {
+                key: np.frombuffer(bitmap.serialize(), dtype=np.uint8)
+                for key, bitmap in self.bitmaps.items()
+            }
+            arrays[FORMAT_KEY] = np.array('roaring')
+        else:
+            arrays = dict(self.bitmaps)
+            arrays[FORMAT_KEY] = np.array('array')
+
+        if self.labels is not None:
+            arrays[LABELS_KEY] = self.labels.astype(str)
+
+        with open(path, 'wb') as file:
+            np.savez_compressed(file, **arrays)
+
+    @classmethod
+    def load(cls, path: str):
+        """Load bitmaps saved with :meth:`save`, as Roaring bitmaps if :mod:`pyroaring` is installed.
+
+        :raises ImportError: If the bitmaps were saved as Roaring bitmaps and :mod:`pyroaring` isn't installed
+        """
+        bitmap_class = _get_bitmap_class()
+        with np.load(path, allow_pickle=False) as archive:
+            fmt = str(archive[FORMAT_KEY])
+            if fmt == 'roaring' and bitmap_class is None:
+                raise ImportError(f'loading the Roaring bitmaps in {path} requires pyroaring')
+
+            labels = archive[LABELS_KEY] if LABELS_KEY in archive.files else None
+
+            bitmaps = {}
+            for key in archive.files:
+                if key in (FORMAT_KEY, LABELS_KEY):
+                    continue
+                array = archive[key]
+                if fmt == 'roaring':
+                    bitmaps[key] = bitmap_class.deserialize(array.tobytes())
+                elif bitmap_class is not None:
+                    bitmaps[key] = bitmap_class(array)
+                else:
+                    bitmaps[key] = array
+
+        return cls(bitmaps, labels=labels)
+
+
+class MembershipIndex(BitmapIndex):
+    """The bitmaps of the proteins that are transitively in each InterPro entry.
+
+    The keys are InterPro identifiers, the members are proteins, and the labels are their UniProt identifiers.
+    """
+
+    def get_uniprot_ids(self, bitmap) -> List[str]:
+        """Get the UniProt identifiers of the proteins in a bitmap.
+
+        :raises ValueError: If the index doesn't have the UniProt identifiers of the proteins
+        """
+        if self.labels is None:
+            raise ValueError('membership index was built without the UniProt identifiers of the proteins')
+        return self.get_labels(bitmap)
+
+
+class GoEntryIndex(BitmapIndex):
+    """The bitmaps of the InterPro entries that are mapped to each GO term or any of its descendants.
+
+    The keys are GO identifiers without the ``GO:`` prefix, the members are entries, and the labels are their
+    InterPro identifiers.
+    """
+
+    def get_interpro_ids(self, bitmap) -> List[str]:
+        """Get the InterPro identifiers of the entries in a bitmap.
+
+        :raises ValueError: If the index doesn't have the InterPro identifiers of the entries
+        """
+        if self.labels is None:
+            raise ValueError('GO entry index was built without the InterPro identifiers of the entries')
+        return self.get_labels(bitmap)
+
+
+def _union(a, b):
+    if isinstance(a, np.ndarray):
+        return np.union1d(a, b).astype(np.uint32)
+    return a | b
+
+
+def _intersection(a, b):
+    if isinstance(a, np.ndarray):
+        return np.intersect1d(a, b, assume_unique=True).astype(np.uint32)
+    return a & b
+
+
+def _difference(a, b):
+    if isinstance(a, np.ndarray):
+        return np.setdiff1d(a, b, assume_unique=True).astype(np.uint32)
+    return a - b
@@ -2,12 +2,16 @@
 
 """SQLAlchemy database models for Bio2BEL InterPro."""
 
-from sqlalchemy import Column, ForeignKey, Integer, String, Table
-from sqlalchemy.ext.declarative import declarative_base
+from typing import Mapping, Optional, TYPE_CHECKING
+
+from sqlalchemy import BigInteger, Column, ForeignKey, Index, Integer, LargeBinary, String, Table, Text, and_, or_
+from sqlalchemy.ext.declarative import declarative_base, declared_attr
 from sqlalchemy.orm import backref, relationship
 
-import pybel.dsl
-from .constants import MODULE_NAME
+from .constants import ARCHITECTURE_SEPARATOR, MODULE_NAME
+
+if TYPE_CHECKING:
+    import pybel.dsl
 
 ENTRY_TABLE_NAME = f'{MODULE_NAME}_entry'
 TYPE_TABLE_NAME = f'{MODULE_NAME}_type'
@@ -15,6 +19,16 @@ PROTEIN_TABLE_NAME = f'{MODULE_NAME}_protein'
 ANNOTATION_TABLE_NAME = f'{MODULE_NAME}_annotation'
 GO_TABLE_NAME = f'{MODULE_NAME}_go'
 ENTRY_GO_TABLE_NAME = f'{MODULE_NAME}_entry_go'
+ENTRY_STATS_TABLE_NAME = f'{MODULE_NAME}_entry_stats'
+MODEL_COUNT_TABLE_NAME = f'{MODULE_NAME}_model_count'
+SEARCH_TOKEN_TABLE_NAME = f'{MODULE_NAME}_search_token'
+ARCHITECTURE_TABLE_NAME = f'{MODULE_NAME}_architecture'
+ARCHITECTURE_ENTRY_TABLE_NAME = f'{MODULE_NAME}_architecture_entry'
+MEMBERSHIP_TABLE_NAME = f'{MODULE_NAME}_membership'
+RELEASE_TABLE_NAME = f'{MODULE_NAME}_release'
+SIGNATURE_TABLE_NAME = f'{MODULE_NAME}_signature'
+LSH_BUCKET_TABLE_NAME = f'{MODULE_NAME}_lsh_bucket'
+GO_CLOSURE_TABLE_NAME = f'{MODULE_NAME}_go_closure'
 
 Base = declarative_base()
 
@@ -23,9 +37,58 @@ entry_go = Table(
     Base.metadata,
     Column('entry_id', Integer, ForeignKey(f'{ENTRY_TABLE_NAME}.id'), primary_key=True),
     Column('go_id', Integer, ForeignKey(f'{GO_TABLE_NAME}.id'), primary_key=True),
+    # The range of releases the mapping is in, like in :class:`ReleaseRangeMixin`
+    Column('valid_from_id', Integer, ForeignKey(f'{RELEASE_TABLE_NAME}.id'), index=True),
+    Column('valid_to_id', Integer, ForeignKey(f'{RELEASE_TABLE_NAME}.id'), index=True),
 )
 
 
+class Release(Base):
+    """An InterPro release that was loaded. Releases are ordered by their database identifiers."""
+
+    __tablename__ = RELEASE_TABLE_NAME
+    id = Column(Integer, primary_key=True)
+
+    name = Column(String(255), nullable=False, unique=True, index=True, doc='The InterPro release, like 72.0')
+
+    def __str__(self):  # noqa: D105
+        return self.name
+
+
+class ReleaseRangeMixin:
+    """Columns for the range of releases in which a row is valid. See :mod:`bio2bel_interpro.releases`."""
+
+    @declared_attr
+    def valid_from_id(cls) -> Column:  # noqa: N805
+        """The first release the row is in, or null if it was loaded without a release."""
+        return Column(Integer, ForeignKey(f'{RELEASE_TABLE_NAME}.id'), index=True)
+
+    @declared_attr
+    def valid_to_id(cls) -> Column:  # noqa: N805
+        """The first release the row is no longer in, or null if it's in the latest release."""
+        return Column(Integer, ForeignKey(f'{RELEASE_TABLE_NAME}.id'), index=True)
+
+    @classmethod
+    def in_release(cls, release_id: Optional[int] = None):
+        """Get a filter for the rows in the given release, or in the latest release if none is given."""
+        return _in_release(cls.valid_from_id, cls.valid_to_id, release_id)
+
+
+def entry_go_in_release(release_id: Optional[int] = None):
+    """Get a filter for the mappings to GO in the given release, or in the latest release if none is given."""
+    return _in_release(entry_go.c.valid_from_id, entry_go.c.valid_to_id, release_id)
+
+
+def _in_release(valid_from_id, valid_to_id, release_id: Optional[int] = None):
+    if release_id is None:
+        return valid_to_id.is_(None)
+
+    return and_(
+        or_(valid_from_id.is_(None), valid_from_id <= release_id),
+        or_(valid_to_id.is_(None), valid_to_id > release_id),
+    )
+
+
 class Type(Base):
     """InterPro Entry Type."""
 
@@ -38,6 +101,34 @@ class Type(Base):
         return self.name
 
 
+architecture_entry = Table(
+    ARCHITECTURE_ENTRY_TABLE_NAME,
+    Base.metadata,
+    Column('architecture_id', Integer, ForeignKey(f'{ARCHITECTURE_TABLE_NAME}.id'), primary_key=True),
+    Column('entry_id', Integer, ForeignKey(f'{ENTRY_TABLE_NAME}.id'), primary_key=True, index=True),
+)
+
+
+class Architecture(Base):
+    """A domain architecture, shared by all of the proteins that have it. See :mod:`bio2bel_interpro.architectures`."""
+
+    __tablename__ = ARCHITECTURE_TABLE_NAME
+    id = Column(Integer, primary_key=True)
+
+    architecture_hash = Column(String(32), nullable=False, unique=True, index=True, doc='MD5 of the architecture')
+    architecture = Column(Text, nullable=False, doc='InterPro identifiers of the domains in order, joined by ~')
+    length = Column(Integer, nullable=False, doc='The number of domains in the architecture')
+
+    entries = relationship('Entry', secondary=architecture_entry, backref=backref('architectures'))
+
+    def __str__(self):  # noqa: D105
+        return self.architecture
+
+    def get_interpro_ids(self):
+        """Get the InterPro identifiers of the domains in this architecture, in order."""
+        return self.architecture.split(ARCHITECTURE_SEPARATOR)
+
+
 class Protein(Base):
     """Represents proteins that are annotated to InterPro families."""
 
@@ -46,13 +137,17 @@ class Protein(Base):
 
     uniprot_id = Column(String(32), nullable=False, index=True, doc='UniProt identifier')
 
+    architecture_id = Column(Integer, ForeignKey(f'{ARCHITECTURE_TABLE_NAME}.id'), index=True)
+    architecture = relationship(Architecture, backref=backref('proteins'))
+
     bel_encoding = 'GRP'
 
     def __repr__(self):  # noqa: D105
         return self.uniprot_id
 
-    def as_bel(self) -> pybel.dsl.protein:
+    def as_bel(self) -> 'pybel.dsl.Protein':
         """Return this protein as a PyBEL node."""
+        import pybel.dsl
         return pybel.dsl.protein(
             namespace='uniprot',
             identifier=str(self.uniprot_id),
@@ -67,12 +162,43 @@ class GoTerm(Base):
 
     go_id = Column(String(255), unique=True, index=True, nullable=False, doc='Gene Ontology identifier')
     name = Column(String(255), unique=True, index=True, nullable=False, doc='Label')
+    namespace = Column(String(255), doc='The GO namespace, like biological_process, if the ontology was loaded')
 
     def __repr__(self):  # noqa: D105
         return self.go_id
 
+    def as_bel(self) -> 'pybel.dsl.BaseEntity':
+        """Return this GO term as a PyBEL node, which is a biological process or a complex for cellular components.
+
+        :raises ValueError: If the GO term is a molecular function, which is an activity in BEL rather than a node, or
+         its namespace isn't known because the GO hierarchy wasn't loaded
+        """
+        import pybel.dsl
+
+        if self.namespace == 'biological_process':
+            dsl = pybel.dsl.BiologicalProcess
+        elif self.namespace == 'cellular_component':
+            dsl = pybel.dsl.NamedComplexAbundance
+        else:
+            raise ValueError(f'GO:{self.go_id} is not a node in BEL. Its namespace is {self.namespace}')
+
+        return dsl(
+            namespace='go',
+            name=str(self.name),
+            identifier=str(self.go_id),
+        )
+
+    def as_activity(self) -> Mapping:
+        """Return this GO term, which should be a molecular function, as a PyBEL activity modifier."""
+        import pybel.dsl
+        return pybel.dsl.activity(
+            namespace='go',
+            name=str(self.name),
+            identifier=str(self.go_id),
+        )
+
 
-class Entry(Base):
+class Entry(Base, ReleaseRangeMixin):
     """Represents families, domains, etc. in InterPro."""
 
     __tablename__ = ENTRY_TABLE_NAME
@@ -87,15 +213,28 @@ class Entry(Base):
     parent_id = Column(Integer, ForeignKey(f'{ENTRY_TABLE_NAME}.id'))
     children = relationship('Entry', backref=backref('parent', remote_side=[id]))
 
-    go_terms = relationship(GoTerm, secondary=entry_go, backref=backref('entries'))
+    # Only the latest names, types, and parents are kept, so these record when they last changed
+    renamed_in_id = Column(Integer, ForeignKey(f'{RELEASE_TABLE_NAME}.id'),
+                           doc='The release in which the name or type last changed, if they changed')
+    moved_in_id = Column(Integer, ForeignKey(f'{RELEASE_TABLE_NAME}.id'),
+                         doc='The release in which the parent last changed, if it changed')
+
+    #: The GO terms the entry is mapped to in the latest release
+    go_terms = relationship(
+        GoTerm,
+        secondary=entry_go,
+        primaryjoin=and_(id == entry_go.c.entry_id, entry_go.c.valid_to_id.is_(None)),
+        backref=backref('entries'),
+    )
 
     bel_encoding = 'P'
 
     def __str__(self):  # noqa: D105
         return self.name
 
-    def as_bel(self) -> pybel.dsl.Protein:
+    def as_bel(self) -> 'pybel.dsl.Protein':
         """Return this InterPro entry as a PyBEL node."""
+        import pybel.dsl
         return pybel.dsl.protein(
             namespace='interpro',
             name=str(self.name),
@@ -103,18 +242,128 @@ class Entry(Base):
         )
 
 
-class Annotation(Base):
+class Annotation(Base, ReleaseRangeMixin):
     """Mapping of InterPro to protein."""
 
     __tablename__ = ANNOTATION_TABLE_NAME
     id = Column(Integer, primary_key=True)
 
-    entry_id = Column(Integer, ForeignKey(f'{Entry.__tablename__}.id'))
-    entry = relationship(Entry, backref=backref('annotations'))
+    entry_id = Column(Integer, ForeignKey(f'{Entry.__tablename__}.id'), index=True)
+    entry = relationship(Entry, backref=backref('annotations', lazy='dynamic'))
 
-    protein_id = Column(Integer, ForeignKey(f'{Protein.__tablename__}.id'))
+    protein_id = Column(Integer, ForeignKey(f'{Protein.__tablename__}.id'), index=True)
     protein = relationship(Protein, backref=backref('annotations'))
 
     xref = Column(String(255))
     start = Column(Integer, doc='Starting position on reference sequence of annotation')
     end = Column(Integer, doc='Ending position on reference sequence of annotation')
+
+
+class EntryStats(Base):
+    """Precomputed aggregates for an InterPro entry."""
+
+    __tablename__ = ENTRY_STATS_TABLE_NAME
+
+    entry_id = Column(Integer, ForeignKey(f'{Entry.__tablename__}.id'), primary_key=True)
+    entry = relationship(Entry, backref=backref('stats', uselist=False))
+
+    protein_count = Column(Integer, nullable=False, doc='Number of proteins annotated to the entry')
+    annotation_count = Column(Integer, nullable=False, doc='Number of annotations to the entry')
+    descendant_protein_count = Column(
+        Integer,
+        nullable=False,
+        doc='Number of proteins annotated to the entry or any of its descendants',
+    )
+    go_term_count = Column(Integer, nullable=False, doc='Number of GO terms mapped to the entry')
+
+
+class ModelCount(Base):
+    """Precomputed number of rows of a model, used for summarizing the database."""
+
+    __tablename__ = MODEL_COUNT_TABLE_NAME
+    id = Column(Integer, primary_key=True)
+
+    name = Column(String(255), nullable=False, unique=True, index=True, doc='The key used in the summary')
+    count = Column(Integer, nullable=False)
+
+
+class SearchToken(Base):
+    """A token in the name of an InterPro entry or a GO term, used for searching. See :mod:`bio2bel_interpro.search`."""
+
+    __tablename__ = SEARCH_TOKEN_TABLE_NAME
+    id = Column(Integer, primary_key=True)
+
+    token = Column(String(255), nullable=False, index=True, doc='A lowercase alphanumeric token')
+
+    entry_id = Column(Integer, ForeignKey(f'{Entry.__tablename__}.id'), index=True)
+    entry = relationship(Entry)
+
+    go_term_id = Column(Integer, ForeignKey(f'{GoTerm.__tablename__}.id'), index=True)
+    go_term = relationship(GoTerm)
+
+
+class Membership(Base):
+    """A protein's transitive membership in an InterPro entry, through its annotations to the entry or descendants.
+
+    See :meth:`bio2bel_interpro.Manager.build_memberships`.
+    """
+
+    __tablename__ = MEMBERSHIP_TABLE_NAME
+
+    entry_id = Column(Integer, ForeignKey(f'{Entry.__tablename__}.id'), primary_key=True)
+    entry = relationship(Entry)
+
+    protein_id = Column(Integer, ForeignKey(f'{Protein.__tablename__}.id'), primary_key=True, index=True)
+    protein = relationship(Protein)
+
+    distance = Column(
+        Integer,
+        nullable=False,
+        index=True,
+        doc='The number of levels between the entry and the closest of its descendants the protein is annotated to',
+    )
+
+
+class ProteinSignature(Base):
+    """The MinHash signature of the InterPro entries of a protein. See :mod:`bio2bel_interpro.similarity`."""
+
+    __tablename__ = SIGNATURE_TABLE_NAME
+
+    protein_id = Column(Integer, ForeignKey(f'{Protein.__tablename__}.id'), primary_key=True)
+    protein = relationship(Protein)
+
+    signature = Column(LargeBinary, nullable=False, doc='The minimums as little-endian unsigned 32-bit integers')
+
+
+class LshBucket(Base):
+    """The bucket a band of a protein's MinHash signature is hashed into. See :mod:`bio2bel_interpro.similarity`."""
+
+    __tablename__ = LSH_BUCKET_TABLE_NAME
+    __table_args__ = (
+        Index(f'ix_{LSH_BUCKET_TABLE_NAME}_band_bucket', 'band', 'bucket'),
+    )
+
+    band = Column(Integer, primary_key=True)
+
+    protein_id = Column(Integer, ForeignKey(f'{Protein.__tablename__}.id'), primary_key=True, index=True)
+    protein = relationship(Protein)
+
+    bucket = Column(BigInteger, nullable=False, doc='The hash of the rows of the band')
+
+
+class GoClosure(Base):
+    """A GO term and one of its descendants, or itself, through ``is_a`` and ``part_of`` relationships.
+
+    Only the GO terms mapped to InterPro entries and their ancestors are kept. The pairs at a distance of one are the
+    GO hierarchy itself. See :meth:`bio2bel_interpro.Manager.populate_go_hierarchy`.
+    """
+
+    __tablename__ = GO_CLOSURE_TABLE_NAME
+
+    ancestor_id = Column(Integer, ForeignKey(f'{GoTerm.__tablename__}.id'), primary_key=True)
+    ancestor = relationship(GoTerm, foreign_keys=[ancestor_id])
+
+    descendant_id = Column(Integer, ForeignKey(f'{GoTerm.__tablename__}.id'), primary_key=True, index=True)
+    descendant = relationship(GoTerm, foreign_keys=[descendant_id])
+
+    distance = Column(Integer, nullable=False, doc='The number of edges on the shortest path to the descendant')
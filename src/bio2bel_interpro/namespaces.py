@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+"""Generate the BEL namespace for InterPro entries in bulk.
+
+The namespace's values are read with a single projection query over the entry table. Their content hash is stored
+as the version of the namespace in the PyBEL database, so :meth:`bio2bel_interpro.Manager.upload_bel_namespace`
+only writes anything when the entries changed, and then with bulk statements. Values can also be streamed straight
+to a ``.belns`` file with :func:`write_belns`.
+"""
+
+import hashlib
+from itertools import chain
+from typing import Iterable, Optional, TextIO, Tuple
+
+from bel_resources.write_namespace import iter_namespace_nominal
+from bel_resources.write_utils import iter_author_header, iter_citation_header, iter_properties_header
+
+__all__ = [
+    'hash_namespace_values',
+    'write_belns',
+]
+
+
+def hash_namespace_values(values: Iterable[Tuple[str, str]]) -> str:
+    """Hash pairs of identifiers and names, in the order they're given.
+
+    >>> hash_namespace_values([('IPR000001', 'Kringle')])[:12]
+    '9f494cb33985'
+    """
+    digest = hashlib.sha256()
+    for identifier, name in values:
+        digest.update(f'{identifier}\t{name}\n'.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def write_belns(values: Iterable[Tuple[str, str]], namespace_name: str, namespace_keyword: str,
+                file: Optional[TextIO] = None, namespace_query_url: Optional[str] = None,
+                namespace_version: Optional[str] = None, delimiter: str = '|') -> int:
+    """Write a BEL namespace file, streaming its values instead of sorting them in memory.
+
+    Unlike :func:`bel_resources.write_namespace`, the values have to be given already sorted, like from a query
+    with an ``ORDER BY`` clause.
+
+    :param values: Pairs of values and their encodings, sorted by value
+    :param namespace_name: The name of the namespace
+    :param namespace_keyword: The keyword of the namespace
+    :param file: A writable file or file-like. Defaults to standard out.
+    :param namespace_query_url: The URL to query for details on the values
+    :param namespace_version: The version of the namespace
+    :param delimiter: The delimiter between the values and their encodings
+    :return: The number of values written
+    """
+    header_lines = chain(
+        iter_namespace_nominal(
+            namespace_name,
+            namespace_keyword,
+            query_url=namespace_query_url,
+            version=namespace_version,
+        ),
+        iter_author_header(),
+        iter_citation_header(namespace_name),
+        iter_properties_header(delimiter=delimiter),
+        ['[Values]'],
+    )
+    for line in header_lines:
+        print(line, file=file)
+
+    count = 0
+    for value, encoding in values:
+        value = str(value).strip() if value else ''
+        if not value:
+            continue
+        print(f'{value}{delimiter}{encoding}', file=file)
+        count += 1
+
+    print('', file=file)
+    return count
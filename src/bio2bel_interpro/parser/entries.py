@@ -7,8 +7,7 @@ from typing import Optional
 
 import pandas as pd
 
-from bio2bel.downloading import make_downloader
-from ..constants import INTERPRO_ENTRIES_PATH, INTERPRO_ENTRIES_URL
+from ..downloading import SOURCES, make_downloader
 
 __all__ = [
     'download_entries',
@@ -17,12 +16,14 @@ __all__ = [
 
 log = logging.getLogger(__name__)
 
-download_entries = make_downloader(INTERPRO_ENTRIES_URL, INTERPRO_ENTRIES_PATH)
+download_entries = make_downloader(SOURCES['entries'])
 
 
 def get_entries_df(url: Optional[str] = None, cache: bool = True, force_download: bool = False) -> pd.DataFrame:
     """Get the entries' data.
 
+    The file may be compressed with gzip or zstd, which is inferred from its suffix.
+
     :return: A data frame containing the original source data
     """
     if url is None and cache:
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+"""Utilities for a local copy of the Gene Ontology in the OBO format, like ``go-basic.obo``."""
+
+import logging
+from typing import Iterable, List, Mapping, Tuple
+
+from ..downloading import open_text
+
+__all__ = [
+    'get_go_ontology',
+]
+
+log = logging.getLogger(__name__)
+
+#: The relationships between GO terms through which annotations are propagated, besides ``is_a``
+PROPAGATED_RELATIONSHIPS = {'part_of'}
+
+
+def get_go_ontology(path: str) -> Tuple[Mapping[str, Tuple[str, str]], List[Tuple[str, str]]]:
+    """Get the terms of the Gene Ontology and the edges between them from an OBO file. Obsolete terms are left out.
+
+    :param path: The path to an OBO file, which can be compressed
+    :return: A dictionary from GO identifiers without the ``GO:`` prefix to pairs of names and namespaces, like
+     ``biological_process``, and a list of pairs of GO identifiers of children and their parents
+    """
+    with open_text(path) as file:
+        return _parse_obo(file)
+
+
+def _parse_obo(lines: Iterable[str]) -> Tuple[Mapping[str, Tuple[str, str]], List[Tuple[str, str]]]:
+    terms = {}
+    edges = []
+
+    for stanza in _iterate_term_stanzas(lines):
+        if stanza.get('is_obsolete') == ['true'] or 'id' not in stanza:
+            continue
+
+        go_id = _strip_prefix(stanza['id'][0])
+        terms[go_id] = stanza.get('name', [''])[0], stanza.get('namespace', [''])[0]
+
+        for parent in stanza.get('is_a', []):
+            edges.append((go_id, _strip_prefix(parent.split()[0])))
+
+        for relationship in stanza.get('relationship', []):
+            relation, parent = relationship.split()[:2]
+            if relation in PROPAGATED_RELATIONSHIPS:
+                edges.append((go_id, _strip_prefix(parent)))
+
+    return terms, [(child, parent) for child, parent in edges if child in terms and parent in terms]
+
+
+def _iterate_term_stanzas(lines: Iterable[str]) -> Iterable[Mapping[str, List[str]]]:
+    """Iterate over the tags of the ``[Term]`` stanzas, without their trailing comments."""
+    stanza = None
+    for line in lines:
+        line = line.strip()
+        if line.startswith('['):
+            if stanza is not None:
+                yield stanza
+            stanza = {} if line == '[Term]' else None
+            continue
+
+        if stanza is None or ':' not in line:
+            continue
+
+        tag, value = line.split(':', 1)
+        stanza.setdefault(tag, []).append(value.split(' ! ', 1)[0].strip())
+
+    if stanza is not None:
+        yield stanza
+
+
+def _strip_prefix(go_id: str) -> str:
+    return go_id[len('GO:'):] if go_id.startswith('GO:') else go_id
@@ -5,8 +5,7 @@
 import logging
 from typing import List, Tuple
 
-from bio2bel import make_downloader
-from bio2bel_interpro.constants import INTERPRO_GO_MAPPING_PATH, INTERPRO_GO_MAPPING_URL
+from ..downloading import SOURCES, make_downloader, open_text
 
 __all__ = [
     'download_interpro_go_mapping',
@@ -15,7 +14,7 @@ __all__ = [
 
 log = logging.getLogger(__name__)
 
-download_interpro_go_mapping = make_downloader(INTERPRO_GO_MAPPING_URL, INTERPRO_GO_MAPPING_PATH)
+download_interpro_go_mapping = make_downloader(SOURCES['go'])
 
 
 def get_interpro_go_mappings(path=None, cache=True, force_download=False) -> List[Tuple[str, str, str]]:
@@ -23,7 +22,7 @@ def get_interpro_go_mappings(path=None, cache=True, force_download=False) -> Lis
     if path is None and cache:
         path = download_interpro_go_mapping(force_download=force_download)
 
-    with open(path) as file:
+    with open_text(path) as file:
         return _operate_file(file)
 
 
@@ -44,5 +43,5 @@ def _process_line(line: str) -> Tuple[str, str, str]:
     return (
         interpro_id.strip().split(':')[1],
         go_id.strip()[len('GO:'):],
-        go_name.strip()[len('GO:'):],
+        go_name.strip()[len('> GO:'):],
     )
@@ -3,31 +3,34 @@
 """Utilities for handling InterPro protein mappings."""
 
 import logging
-from typing import Optional
+from typing import Iterable, Optional
 
 import pandas
 
-from bio2bel import make_downloader
 from ..constants import (
-    CHUNKSIZE, INTERPRO_PROTEIN_COLUMNS, INTERPRO_PROTEIN_HASH_PATH, INTERPRO_PROTEIN_HASH_URL, INTERPRO_PROTEIN_PATH,
-    INTERPRO_PROTEIN_URL,
+    CHUNKSIZE, INTERPRO_PROTEIN_COLUMNS, INTERPRO_PROTEIN_HASH_PATH, INTERPRO_PROTEIN_HASH_URL, INTERPRO_PROTEIN_URL,
 )
+from ..downloading import SOURCES, Source, make_downloader
 
 __all__ = [
     'download_interpro_proteins_mapping',
     'download_interpro_proteins_mapping_hash',
     'get_proteins_chunks',
+    'iterate_protein_group_chunks',
 ]
 
 log = logging.getLogger(__name__)
 
-download_interpro_proteins_mapping = make_downloader(INTERPRO_PROTEIN_URL, INTERPRO_PROTEIN_PATH)
-download_interpro_proteins_mapping_hash = make_downloader(INTERPRO_PROTEIN_HASH_URL, INTERPRO_PROTEIN_HASH_PATH)
+download_interpro_proteins_mapping = make_downloader(SOURCES['proteins'])
+download_interpro_proteins_mapping_hash = make_downloader(Source(INTERPRO_PROTEIN_HASH_URL, INTERPRO_PROTEIN_HASH_PATH))
 
 
 def get_proteins_chunks(url: Optional[str] = None, cache: bool = True, force_download: bool = False,
-                        chunksize: Optional[int] = None, compression: str = 'gzip'):
-    """Get protein mappings."""
+                        chunksize: Optional[int] = None, compression: str = 'infer'):
+    """Get protein mappings.
+
+    By default, the compression is inferred from the suffix of the file, so plain, gzip, and zstd files all work.
+    """
     if url is None and cache:
         url = download_interpro_proteins_mapping(force_download=force_download)
 
@@ -39,3 +42,24 @@ def get_proteins_chunks(url: Optional[str] = None, cache: bool = True, force_dow
         names=INTERPRO_PROTEIN_COLUMNS,
         chunksize=(chunksize or CHUNKSIZE)
     )
+
+
+def iterate_protein_group_chunks(chunks: Iterable[pandas.DataFrame]) -> Iterable[pandas.DataFrame]:
+    """Iterate over chunks of protein mappings, moving rows between chunks so no protein is split across two.
+
+    Assumes that the mappings are sorted by UniProt identifier, so each chunk covers a disjoint range of proteins.
+    """
+    carry = None
+    for chunk in chunks:
+        if carry is not None:
+            chunk = pandas.concat([carry, chunk], ignore_index=True)
+
+        uniprot_ids = chunk['uniprot_id']
+        is_last = (uniprot_ids == uniprot_ids.iat[-1]).to_numpy()
+        carry = chunk[is_last]
+
+        if not is_last.all():
+            yield chunk[~is_last]
+
+    if carry is not None and len(carry.index):
+        yield carry
@@ -3,14 +3,12 @@
 """Utilities for the InterPro tree."""
 
 import logging
-import os
 from typing import Iterable, Optional
-from urllib.request import urlretrieve
 
 import networkx as nx
 from tqdm import tqdm
 
-from ..constants import INTERPRO_TREE_PATH, INTERPRO_TREE_URL
+from ..downloading import SOURCES, make_downloader, open_text
 
 __all__ = [
     'download_interpro_tree',
@@ -21,18 +19,7 @@ __all__ = [
 log = logging.getLogger(__name__)
 
 
-def download_interpro_tree(force_download: bool = False) -> str:
-    """Download the InterPro tree file to the data directory if it doesn't already exist.
-
-    :param force_download: Should the data be re-downloaded?
-    """
-    if force_download or not os.path.exists(INTERPRO_TREE_PATH):
-        log.info('downloading %s to %s', INTERPRO_TREE_URL, INTERPRO_TREE_PATH)
-        urlretrieve(INTERPRO_TREE_URL, INTERPRO_TREE_PATH)
-    else:
-        log.info('using cached data at %s', INTERPRO_TREE_PATH)
-
-    return INTERPRO_TREE_PATH
+download_interpro_tree = make_downloader(SOURCES['tree'])
 
 
 def count_front(s: str) -> int:
@@ -51,7 +38,7 @@ def get_interpro_tree(path: Optional[str] = None, force_download: bool = False)
     if not path:
         path = download_interpro_tree(force_download=force_download)
 
-    with open(path) as f:
+    with open_text(path) as f:
         return parse_tree_helper(f)
 
 
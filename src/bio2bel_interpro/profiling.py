@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+
+"""Opt-in profiling of the SQL statements a manager runs.
+
+While profiling, listeners on the manager's engine count and time every statement and attribute it to the outermost
+method of the manager that was running when it was executed, like :meth:`bio2bel_interpro.Manager.to_bel` for all of
+the statements from the methods it calls. The slowest statements are kept with their parameters, and their query
+plans are looked up with ``EXPLAIN`` once profiling stops.
+
+Use it with :meth:`bio2bel_interpro.Manager.profile`:
+
+>>> with manager.profile() as report:  # doctest: +SKIP
+...     manager.to_bel()
+>>> report.count  # doctest: +SKIP
+4
+>>> print(report)  # doctest: +SKIP
+"""
+
+import heapq
+import logging
+import sys
+import time
+from collections import defaultdict
+from itertools import count
+from typing import Any, List, Mapping, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+__all__ = [
+    'StatementRecord',
+    'OperationStats',
+    'ProfileReport',
+    'Profiler',
+]
+
+log = logging.getLogger(__name__)
+
+#: The operation to which statements that weren't run from a method of the manager are attributed
+UNKNOWN_OPERATION = '<unknown>'
+
+#: The statements that get the query plan, for each SQL dialect
+EXPLAIN_PREFIXES = {
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+    'postgresql': 'EXPLAIN ',
+    'mysql': 'EXPLAIN ',
+}
+
+
+class StatementRecord:
+    """A statement that was run while profiling."""
+
+    __slots__ = ('statement', 'parameters', 'duration', 'operation', 'caller', 'executemany', 'plan')
+
+    def __init__(self, statement: str, parameters: Any, duration: float, operation: str, caller: str,
+                 executemany: bool = False):
+        self.statement = statement
+        self.parameters = parameters
+        self.duration = duration
+        self.operation = operation
+        self.caller = caller
+        self.executemany = executemany
+
+        #: The rows of the query plan, if it could be looked up
+        self.plan: Optional[List[Tuple]] = None
+
+    def __repr__(self):  # noqa: D105
+        return f'StatementRecord({self.operation!r}, {self.duration:.6f}, {self.statement!r})'
+
+
+class OperationStats:
+    """The number of statements of an operation and how long they took."""
+
+    __slots__ = ('count', 'duration')
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __repr__(self):  # noqa: D105
+        return f'OperationStats(count={self.count}, duration={self.duration:.6f})'
+
+
+class ProfileReport:
+    """The statements counted and timed while profiling."""
+
+    def __init__(self, slowest: int = 10):
+        """Build an empty report.
+
+        :param slowest: The number of the slowest statements to keep with their parameters and query plans
+        """
+        self.slowest = slowest
+        self.count = 0
+        self.duration = 0.0
+        self.operations = defaultdict(OperationStats)
+        self.callers = defaultdict(OperationStats)
+        self._heap = []
+        self._counter = count()
+
+    def add(self, record: StatementRecord) -> None:
+        """Count a statement and keep it if it's among the slowest."""
+        self.count += 1
+        self.duration += record.duration
+
+        for stats in (self.operations[record.operation], self.callers[record.caller]):
+            stats.count += 1
+            stats.duration += record.duration
+
+        if self.slowest <= 0:
+            return
+
+        item = (record.duration, next(self._counter), record)
+        if len(self._heap) < self.slowest:
+            heapq.heappush(self._heap, item)
+        else:
+            heapq.heappushpop(self._heap, item)
+
+    def get_count(self, operation: str) -> int:
+        """Get the number of statements run by an operation, like ``'to_bel'``."""
+        stats = self.operations.get(operation)
+        return 0 if stats is None else stats.count
+
+    def get_slowest(self) -> List[StatementRecord]:
+        """Get the slowest statements, from slowest to fastest."""
+        return [record for _, _, record in sorted(self._heap, reverse=True)]
+
+    def to_dict(self) -> Mapping[str, Any]:
+        """Summarize the report as a JSON-serializable dictionary."""
+        return dict(
+            count=self.count,
+            duration=self.duration,
+            operations={
+                operation: dict(count=stats.count, duration=stats.duration)
+                for operation, stats in self.operations.items()
+            },
+            slowest=[
+                dict(
+                    statement=record.statement,
+                    parameters=repr(record.parameters),
+                    duration=record.duration,
+                    operation=record.operation,
+                    caller=record.caller,
+                    plan=record.plan and [list(row) for row in record.plan],
+                )
+                for record in self.get_slowest()
+            ],
+        )
+
+    def __str__(self):  # noqa: D105
+        lines = [f'{self.count} statements in {self.duration:.4f} seconds']
+        for operation, stats in sorted(self.operations.items(), key=lambda item: -item[1].duration):
+            lines.append(f'  {operation}: {stats.count} statements in {stats.duration:.4f} seconds')
+
+        for record in self.get_slowest():
+            lines.append(f'{record.duration:.4f} seconds in {record.caller} ({record.operation}):')
+            lines.append(f'  {" ".join(record.statement.split())}')
+            lines.append(f'  parameters: {record.parameters!r}')
+            for row in record.plan or ():
+                lines.append(f'  plan: {" ".join(map(str, row))}')
+
+        return '\n'.join(lines)
+
+
+class Profiler:
+    """Listen to the statements an engine runs on behalf of a manager and report on them."""
+
+    def __init__(self, engine: Engine, manager: Optional[object] = None, slowest: int = 10, explain: bool = True,
+                 replica: Optional[Engine] = None):
+        """Build a profiler.
+
+        :param engine: The engine whose statements get profiled
+        :param manager: The manager whose methods the statements get attributed to
+        :param slowest: The number of the slowest statements to keep with their parameters and query plans
+        :param explain: Should the query plans of the slowest statements be looked up?
+        :param replica: The engine of a read replica whose statements get profiled too. The query plans are still
+         looked up with the primary engine.
+        """
+        self.engine = engine
+        self.engines = [engine] if replica is None else [engine, replica]
+        self.manager = manager
+        self.explain = explain
+        self.report = ProfileReport(slowest=slowest)
+
+    def __enter__(self) -> ProfileReport:  # noqa: D105
+        self.start()
+        return self.report
+
+    def __exit__(self, exc_type, exc_val, exc_tb):  # noqa: D105
+        self.stop()
+
+    def start(self) -> None:
+        """Start listening to the engines."""
+        for engine in self.engines:
+            event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    def stop(self) -> None:
+        """Stop listening to the engines, then look up the query plans of the slowest statements."""
+        for engine in self.engines:
+            event.remove(engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.remove(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+        if self.explain:
+            self._explain_slowest()
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('profiler_start_times', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info['profiler_start_times'].pop()
+        operation, caller = self._get_operation()
+        self.report.add(StatementRecord(
+            statement=statement,
+            parameters=parameters,
+            duration=duration,
+            operation=operation,
+            caller=caller,
+            executemany=executemany,
+        ))
+
+    def _get_operation(self) -> Tuple[str, str]:
+        """Get the names of the outermost and innermost methods of the manager on the stack."""
+        if self.manager is None:
+            return UNKNOWN_OPERATION, UNKNOWN_OPERATION
+
+        operation = caller = None
+        frame = sys._getframe(2)
+        while frame is not None:
+            if frame.f_locals.get('self') is self.manager:
+                operation = frame.f_code.co_name
+                if caller is None:
+                    caller = operation
+            frame = frame.f_back
+
+        if operation is None:
+            return UNKNOWN_OPERATION, UNKNOWN_OPERATION
+
+        return operation, caller
+
+    def _explain_slowest(self) -> None:
+        prefix = EXPLAIN_PREFIXES.get(self.engine.dialect.name)
+        if prefix is None:
+            return
+
+        for record in self.report.get_slowest():
+            if record.executemany or not record.statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+                continue
+
+            # The statements are run as they were given to the DBAPI cursor, with their parameters in its style
+            connection = self.engine.raw_connection()
+            try:
+                cursor = connection.cursor()
+                cursor.execute(prefix + record.statement, record.parameters)
+                record.plan = [tuple(row) for row in cursor.fetchall()]
+                cursor.close()
+            except Exception as e:
+                log.debug('could not explain %s: %s', record.statement, e)
+            finally:
+                connection.close()
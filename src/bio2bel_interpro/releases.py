@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+
+"""Keep several InterPro releases side by side, storing what didn't change between them only once.
+
+Entries, annotations, and mappings to GO have a range of releases in which they're valid, from the first release
+they're in to the first release they're no longer in. Loading a new release with ``Manager.populate(release=...)``
+only writes the differences from the previous release:
+
+- entries that are new get the new release as the start of their range, entries that were removed get it as the
+  end of their range along with their annotations and mappings to GO, and entries that came back are reopened.
+  Only the latest names, types, and parents of the entries are kept, along with the releases they last changed in.
+- the mappings to GO are loaded again, closing the ones that were removed and adding the new ones.
+- the annotations are loaded into a temporary staging table, then the ones that were removed are closed and the
+  new ones are inserted with ``UPDATE`` and ``INSERT ... SELECT`` statements. Annotations that didn't change keep
+  their row.
+
+If loading a release fails, what was loaded of it is removed along with the release, so that it can be loaded again.
+
+The manager's queries that take a ``release`` argument use the indexes on the ranges to look at an older release,
+and look at the latest release by default. They raise a :class:`ValueError` rather than show an entry with a name,
+type, or parent from after the release. The domain architectures aren't versioned and are kept from the first load,
+and the memberships and precomputed aggregates are built for the latest release.
+"""
+
+import logging
+from typing import Iterable, Mapping, Set
+
+import pandas as pd
+from sqlalchemy import Column, Index, Integer, MetaData, String, Table, and_, exists, literal, select
+
+from .models import Annotation, Protein
+
+__all__ = [
+    'load_annotation_delta',
+]
+
+log = logging.getLogger(__name__)
+
+STAGING_TABLE_NAME = f'{Annotation.__tablename__}_release_staging'
+
+
+def _get_staging_table() -> Table:
+    """Build the temporary table for the annotations of the release that's being loaded."""
+    metadata = MetaData()
+    table = Table(
+        STAGING_TABLE_NAME,
+        metadata,
+        Column('entry_id', Integer),
+        Column('uniprot_id', String(32)),
+        Column('xref', String(255)),
+        Column('start', Integer),
+        Column('end', Integer),
+        prefixes=['TEMPORARY'],
+    )
+    Index(f'ix_{STAGING_TABLE_NAME}_uniprot_id', table.c.uniprot_id, table.c.entry_id)
+    return table
+
+
+def load_annotation_delta(connection, chunks: Iterable[pd.DataFrame], entry_ids: Mapping[str, int],
+                          release_id: int) -> Mapping[str, int]:
+    """Load the annotations of a new release, only writing the differences from the latest release.
+
+    :param connection: A connection to the database, in a transaction that's committed by the caller
+    :param chunks: Chunks of the new release's protein mappings
+    :param entry_ids: A dictionary from InterPro identifiers to the database identifiers of their entries
+    :param release_id: The database identifier of the new release
+    :return: The numbers of new proteins, and inserted and closed annotations, and the missing InterPro identifiers
+    """
+    staging = _get_staging_table()
+    staging.create(connection)
+
+    try:
+        missing = _stage(connection, staging, chunks, entry_ids)
+        counts = _apply_delta(connection, staging, release_id)
+    finally:
+        staging.drop(connection)
+
+    counts['missing'] = len(missing)
+    for interpro_id in sorted(missing):
+        log.warning('missing %s', interpro_id)
+
+    return counts
+
+
+def _stage(connection, staging: Table, chunks: Iterable[pd.DataFrame], entry_ids: Mapping[str, int]) -> Set[str]:
+    """Write the chunks into the staging table, looking up the database identifiers of their entries."""
+    missing = set()
+    for chunk in chunks:
+        entry_id = chunk['interpro_id'].map(entry_ids)
+        found = entry_id.notna().to_numpy()
+        missing.update(chunk.loc[~found, 'interpro_id'])
+
+        records = (
+            chunk[found]
+            .assign(entry_id=entry_id[found].astype(int))
+            [['entry_id', 'uniprot_id', 'xref', 'start', 'end']]
+            .to_dict('records')
+        )
+        if records:
+            connection.execute(staging.insert(), records)
+
+    return missing
+
+
+def _apply_delta(connection, staging: Table, release_id: int) -> Mapping[str, int]:
+    """Add the new proteins, close the removed annotations, and insert the new annotations."""
+    proteins = Protein.__table__
+    annotations = Annotation.__table__
+
+    new_proteins = connection.execute(proteins.insert().from_select(
+        ['uniprot_id'],
+        select([staging.c.uniprot_id])
+        .where(~exists().where(proteins.c.uniprot_id == staging.c.uniprot_id))
+        .distinct(),
+    )).rowcount
+
+    staged = staging.join(proteins, proteins.c.uniprot_id == staging.c.uniprot_id)
+
+    def _matches(annotation_table):
+        return and_(
+            annotation_table.c.entry_id == staging.c.entry_id,
+            annotation_table.c.protein_id == proteins.c.id,
+            annotation_table.c.xref == staging.c.xref,
+            annotation_table.c.start == staging.c.start,
+            annotation_table.c.end == staging.c.end,
+        )
+
+    closed = connection.execute(
+        annotations.update()
+        .where(and_(
+            annotations.c.valid_to_id.is_(None),
+            ~exists(select([literal(1)]).select_from(staged).where(_matches(annotations))),
+        ))
+        .values(valid_to_id=release_id)
+    ).rowcount
+
+    current = annotations.alias('current')
+    inserted = connection.execute(annotations.insert().from_select(
+        ['entry_id', 'protein_id', 'xref', 'start', 'end', 'valid_from_id'],
+        select([
+            staging.c.entry_id,
+            proteins.c.id,
+            staging.c.xref,
+            staging.c.start,
+            staging.c.end,
+            literal(release_id),
+        ])
+        .select_from(staged)
+        .where(~exists().where(and_(current.c.valid_to_id.is_(None), _matches(current)))),
+    )).rowcount
+
+    log.info('added %d proteins, closed %d annotations, and inserted %d annotations', new_proteins, closed, inserted)
+    return dict(proteins=new_proteins, closed=closed, inserted=inserted)
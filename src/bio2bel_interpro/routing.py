@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+
+"""Route the queries of a manager to a read replica, and tune its connection pools.
+
+A manager built with a ``replica_connection`` has two engines. The session is a :class:`RoutingSession`, which sends
+statements to the replica unless:
+
+- the session is in primary mode, like in :meth:`bio2bel_interpro.Manager.primary`, which the methods that load data,
+  like :meth:`bio2bel_interpro.Manager.populate`, use for everything they run
+- the current transaction already wrote something, so it reads its own writes. Writes always go to the primary.
+
+Dropping the database always uses the primary engine.
+
+The pool options are passed to :func:`sqlalchemy.create_engine` for both engines. A statement timeout is set on each
+new connection with ``SET statement_timeout`` on PostgreSQL and ``SET SESSION max_execution_time`` on MySQL, which
+only limits ``SELECT`` statements. SQLite doesn't have one, so a progress handler interrupts statements that run for
+too long instead.
+
+The session is a :class:`sqlalchemy.orm.scoped_session`, so each thread of a multi-threaded server like
+:mod:`bio2bel_interpro.web` gets its own. Pass a ``scopefunc`` to scope sessions to something else, like requests, and
+call :meth:`bio2bel_interpro.Manager.remove_session` when each one ends.
+"""
+
+import logging
+import time
+from typing import Any, Callable, Mapping, Optional, Tuple
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.orm import Session, scoped_session, sessionmaker
+from sqlalchemy.sql.expression import UpdateBase
+
+__all__ = [
+    'RoutingSession',
+    'get_engine_kwargs',
+    'build_engine',
+    'build_engine_session',
+    'set_statement_timeout',
+]
+
+log = logging.getLogger(__name__)
+
+#: The number of SQLite virtual machine instructions between checks of the statement timeout
+SQLITE_PROGRESS_STEPS = 10000
+
+
+class RoutingSession(Session):
+    """A session that reads from a replica and writes to the primary it's bound to."""
+
+    def __init__(self, replica: Optional[Engine] = None, **kwargs):
+        """Build a routing session.
+
+        :param replica: The engine of the read replica. If none, everything goes to the primary.
+        :param kwargs: Keyword arguments to pass to :class:`sqlalchemy.orm.Session`, including the primary ``bind``
+        """
+        super().__init__(**kwargs)
+        self.replica = replica
+        self.primary_depth = 0
+        self._wrote = False
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):  # noqa: D102
+        if self._flushing or isinstance(clause, UpdateBase):
+            self._wrote = True
+
+        if self.replica is None or self.primary_depth or self._wrote:
+            return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+
+        return self.replica
+
+    def commit(self):  # noqa: D102
+        try:
+            super().commit()
+        finally:
+            self._wrote = False
+
+    def rollback(self):  # noqa: D102
+        try:
+            super().rollback()
+        finally:
+            self._wrote = False
+
+    def close(self):  # noqa: D102
+        try:
+            super().close()
+        finally:
+            self._wrote = False
+
+
+def get_engine_kwargs(connection: str, pool_size: Optional[int] = None, max_overflow: Optional[int] = None,
+                      pool_pre_ping: bool = False, echo: bool = False) -> Mapping[str, Any]:
+    """Get the keyword arguments for :func:`sqlalchemy.create_engine` with the given pool options.
+
+    SQLite databases don't use a pool with a size, so the pool size and overflow are left out for them.
+
+    >>> get_engine_kwargs('postgresql://localhost/interpro', pool_size=20, pool_pre_ping=True)
+    {'echo': False, 'pool_pre_ping': True, 'pool_size': 20}
+    >>> get_engine_kwargs('sqlite:///interpro.db', pool_size=20)
+    {'echo': False, 'pool_pre_ping': False}
+    """
+    rv = dict(echo=echo, pool_pre_ping=pool_pre_ping)
+
+    sizes = dict(pool_size=pool_size, max_overflow=max_overflow)
+    sizes = {key: value for key, value in sizes.items() if value is not None}
+    if sizes and make_url(connection).get_backend_name() == 'sqlite':
+        log.warning('SQLite does not use a pool with a size. Ignoring %s', sizes)
+    else:
+        rv.update(sizes)
+
+    return rv
+
+
+def build_engine(connection: str, statement_timeout: Optional[float] = None, **kwargs) -> Engine:
+    """Build an engine with the given pool options and statement timeout.
+
+    :param connection: An RFC-1738 database connection string
+    :param statement_timeout: The number of seconds after which statements are cancelled
+    :param kwargs: The pool options to pass to :func:`get_engine_kwargs`
+    """
+    engine = create_engine(connection, **get_engine_kwargs(connection, **kwargs))
+    if statement_timeout is not None:
+        set_statement_timeout(engine, statement_timeout)
+    return engine
+
+
+def build_engine_session(connection: str, replica_connection: Optional[str] = None,
+                         statement_timeout: Optional[float] = None, scopefunc: Optional[Callable] = None,
+                         autoflush: bool = False, autocommit: bool = False, expire_on_commit: bool = True,
+                         **kwargs) -> Tuple[Engine, Optional[Engine], scoped_session]:
+    """Build the primary engine, the replica engine, and a scoped routing session.
+
+    The defaults of the session's options are the same as in
+    :func:`bio2bel.manager.connection_manager.build_engine_session`.
+
+    :param connection: The connection string of the primary
+    :param replica_connection: The connection string of the read replica, if any
+    :param statement_timeout: The number of seconds after which statements are cancelled, on both engines
+    :param scopefunc: The function that returns the current scope of the session. Defaults to the current thread.
+    :param kwargs: The pool options to pass to :func:`get_engine_kwargs`, for both engines
+    :return: The primary engine, the replica engine or none, and the session
+    """
+    engine = build_engine(connection, statement_timeout=statement_timeout, **kwargs)
+    replica = None
+    if replica_connection is not None:
+        replica = build_engine(replica_connection, statement_timeout=statement_timeout, **kwargs)
+
+    session_maker = sessionmaker(
+        bind=engine,
+        class_=RoutingSession,
+        replica=replica,
+        autoflush=autoflush,
+        autocommit=autocommit,
+        expire_on_commit=expire_on_commit,
+    )
+    return engine, replica, scoped_session(session_maker, scopefunc=scopefunc)
+
+
+def set_statement_timeout(engine: Engine, seconds: float) -> None:
+    """Cancel the statements that take longer than the given number of seconds on each new connection of an engine.
+
+    :raises ValueError: If the database doesn't support statement timeouts
+    """
+    milliseconds = int(seconds * 1000)
+    name = engine.dialect.name
+
+    if name == 'sqlite':
+        _set_sqlite_timeout(engine, seconds)
+        return
+
+    if name == 'postgresql':
+        statement = f'SET statement_timeout = {milliseconds}'
+    elif name == 'mysql':
+        statement = f'SET SESSION max_execution_time = {milliseconds}'
+    else:
+        raise ValueError(f'statement timeouts are not supported for {name}')
+
+    @event.listens_for(engine, 'connect')
+    def _set_timeout(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(statement)
+        finally:
+            cursor.close()
+
+
+def _set_sqlite_timeout(engine: Engine, seconds: float) -> None:
+    """Interrupt SQLite statements that run for too long with a progress handler."""
+
+    @event.listens_for(engine, 'connect')
+    def _set_progress_handler(dbapi_connection, connection_record):
+        info = connection_record.info
+
+        def _is_expired():
+            started = info.get('statement_started')
+            return started is not None and time.monotonic() - started > seconds
+
+        dbapi_connection.set_progress_handler(_is_expired, SQLITE_PROGRESS_STEPS)
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        conn.info['statement_started'] = time.monotonic()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _stop(conn, cursor, statement, parameters, context, executemany):
+        conn.info.pop('statement_started', None)
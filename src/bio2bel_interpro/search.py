@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+
+"""Fuzzy search over the names of InterPro entries and GO terms.
+
+The names are split into tokens when the database is populated, and the tokens are stored as an inverted index in
+:class:`bio2bel_interpro.models.SearchToken`. Searching works in three steps:
+
+1. Each token in the query is matched against the vocabulary of indexed tokens. Candidates are found with a trigram
+   index over the vocabulary, then kept if they're within a small edit distance of the query token or if they start
+   with it.
+2. The postings of the matching tokens are looked up in the database.
+3. Each name is scored by how well it covers the tokens in the query, with ties broken in favor of exact matches and
+   shorter names.
+"""
+
+import re
+from collections import defaultdict
+from typing import Iterable, List, Mapping, Set, Tuple
+
+__all__ = [
+    'tokenize',
+    'get_trigrams',
+    'levenshtein',
+    'TokenMatcher',
+    'rank_names',
+]
+
+#: The similarity of a token in the vocabulary that starts with a query token, rather than matching it
+PREFIX_SIMILARITY = 0.75
+
+#: The minimum length of a query token for it to match tokens in the vocabulary that start with it
+MIN_PREFIX_LENGTH = 3
+
+_TOKEN_RE = re.compile('[a-z0-9]+')
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase alphanumeric tokens.
+
+    >>> tokenize('Thymidine/pyrimidine-nucleoside phosphorylase')
+    ['thymidine', 'pyrimidine', 'nucleoside', 'phosphorylase']
+    """
+    return _TOKEN_RE.findall(text.lower())
+
+
+def get_trigrams(token: str) -> Set[str]:
+    """Get the trigrams of a token, padded so short tokens and the start of tokens have trigrams too.
+
+    >>> sorted(get_trigrams('abc'))
+    ['  a', ' ab', 'abc', 'bc ']
+    """
+    padded = f'  {token} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def get_max_distance(token: str) -> int:
+    """Get the number of typos to tolerate in a query token, depending on its length."""
+    if len(token) <= 3:
+        return 0
+    if len(token) <= 6:
+        return 1
+    return 2
+
+
+def levenshtein(a: str, b: str, max_distance: int) -> int:
+    """Calculate the edit distance between two strings, stopping early once it's more than the given maximum.
+
+    :return: The edit distance, or ``max_distance + 1`` if it's more than the maximum
+
+    >>> levenshtein('kinase', 'kinsae', 2)
+    2
+    >>> levenshtein('kinase', 'phosphatase', 2)
+    3
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    previous = list(range(len(b) + 1))
+    for i, a_character in enumerate(a, start=1):
+        current = [i]
+        for j, b_character in enumerate(b, start=1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (a_character != b_character),
+            ))
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+
+    return min(previous[-1], max_distance + 1)
+
+
+class TokenMatcher:
+    """Match query tokens against a vocabulary with a trigram index."""
+
+    def __init__(self, vocabulary: Iterable[str]):
+        """Build the trigram index over the vocabulary."""
+        self.vocabulary = set(vocabulary)
+        self._trigrams = defaultdict(list)
+        for token in self.vocabulary:
+            for trigram in get_trigrams(token):
+                self._trigrams[trigram].append(token)
+
+    def match(self, token: str) -> Mapping[str, float]:
+        """Get the tokens in the vocabulary that match the query token with their similarities between 0 and 1."""
+        max_distance = get_max_distance(token)
+        trigrams = get_trigrams(token)
+
+        # Strings within an edit distance of k differ in at most 3k of their trigrams
+        min_shared = max(1, len(trigrams) - 3 * max_distance)
+        if len(token) >= MIN_PREFIX_LENGTH:
+            # Tokens that start with the query token have all of its trigrams except the padded one at its end
+            min_shared = min(min_shared, len(trigrams) - 1)
+
+        shared = defaultdict(int)
+        for trigram in trigrams:
+            for candidate in self._trigrams.get(trigram, ()):
+                shared[candidate] += 1
+
+        rv = {}
+        for candidate, count in shared.items():
+            if count < min_shared:
+                continue
+
+            if candidate == token:
+                rv[candidate] = 1.0
+                continue
+
+            distance = levenshtein(token, candidate, max_distance)
+            if distance <= max_distance:
+                rv[candidate] = 1.0 - distance / max(len(token), len(candidate))
+            elif len(token) >= MIN_PREFIX_LENGTH and candidate.startswith(token):
+                rv[candidate] = PREFIX_SIMILARITY
+
+        return rv
+
+
+def rank_names(query: str, names: Mapping[int, str], postings: Iterable[Tuple[int, str]],
+               matches: List[Mapping[str, float]]) -> List[Tuple[float, int]]:
+    """Rank the candidates by how well their names match the query.
+
+    :param query: The query
+    :param names: A dictionary from the database identifiers of the candidates to their names
+    :param postings: Pairs of database identifiers of candidates and the matching tokens in their names
+    :param matches: For each query token, the dictionary of matching tokens to their similarities
+    :return: Pairs of scores and database identifiers, from the best to the worst match
+    """
+    tokens = defaultdict(set)
+    for target_id, token in postings:
+        tokens[target_id].add(token)
+
+    normalized_query = ' '.join(tokenize(query))
+
+    rv = []
+    for target_id, target_tokens in tokens.items():
+        score = sum(
+            max((similarity for token, similarity in token_matches.items() if token in target_tokens), default=0.0)
+            for token_matches in matches
+        ) / len(matches)
+
+        name = names[target_id]
+        if ' '.join(tokenize(name)) == normalized_query:
+            score += 1.0
+
+        rv.append((score, -len(name), target_id))
+
+    rv.sort(reverse=True)
+    return [(score, target_id) for score, _, target_id in rv]
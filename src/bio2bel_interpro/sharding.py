@@ -0,0 +1,356 @@
+# -*- coding: utf-8 -*-
+
+"""Load the protein mappings with several worker processes, each with its own database connection.
+
+The main process reads the protein mappings in chunks that never split a protein, assigns the database identifiers
+of the proteins, and deals the chunks out to the shards. Since the mappings are sorted by UniProt identifier, each
+chunk covers a disjoint range of proteins. Each shard is a worker process that looks up the entries' database
+identifiers in a dictionary it shares read-only with the main process and writes into its own staging tables:
+
+- with SQLite, which only allows one writer at a time, each shard writes to its own database file
+- with other databases, like PostgreSQL, each shard writes to its own staging tables in the target database
+
+Each shard also computes the proteins' domain architectures and stages them with their hashes next to the proteins.
+
+Once all shards are finished, the staging tables are merged into the architecture, protein, and annotation tables
+with ``INSERT ... SELECT`` statements (attaching the shard files with SQLite), then the tables are analyzed. The
+architectures are linked to their entries afterwards by :class:`bio2bel_interpro.Manager`.
+"""
+
+import logging
+import multiprocessing as mp
+import os
+import queue
+import tempfile
+from typing import Iterable, List, Mapping, Optional, Set, Tuple
+
+import pandas as pd
+from sqlalchemy import Column, Integer, MetaData, String, Table, Text, and_, create_engine, exists, func, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.url import URL
+
+from .architectures import get_architectures, hash_architecture, split_architecture
+from .models import (
+    ANNOTATION_TABLE_NAME, ARCHITECTURE_TABLE_NAME, Annotation, Architecture, PROTEIN_TABLE_NAME, Protein,
+)
+
+__all__ = [
+    'populate_proteins_sharded',
+]
+
+log = logging.getLogger(__name__)
+
+STAGING_PROTEIN_TABLE_NAME = f'{PROTEIN_TABLE_NAME}_staging'
+STAGING_ANNOTATION_TABLE_NAME = f'{ANNOTATION_TABLE_NAME}_staging'
+
+#: The name under which each shard's database file is attached with SQLite
+SQLITE_SHARD_SCHEMA = 'shard'
+
+#: The number of chunks that can wait for each shard before the main process blocks
+QUEUE_SIZE = 2
+
+#: The number of seconds to wait on a shard before checking if it's still alive
+POLL_TIMEOUT = 5
+
+#: The statements to update the query planner's statistics after merging, for each SQL dialect
+ANALYZE_STATEMENTS = {
+    'sqlite': 'ANALYZE',
+    'postgresql': f'ANALYZE {ARCHITECTURE_TABLE_NAME}, {PROTEIN_TABLE_NAME}, {ANNOTATION_TABLE_NAME}',
+    'mysql': f'ANALYZE TABLE {ARCHITECTURE_TABLE_NAME}, {PROTEIN_TABLE_NAME}, {ANNOTATION_TABLE_NAME}',
+}
+
+
+class _Shard:
+    """A worker process with its own queue of chunks and its own staging tables."""
+
+    def __init__(self, index: int, url: URL, schema: Optional[str], suffix: str, entry_ids: Mapping[str, int],
+                 domain_ids: Set[str], results: mp.Queue):
+        self.index = index
+        self.schema = schema
+        self.suffix = suffix
+        self.tasks = mp.Queue(maxsize=QUEUE_SIZE)
+        self.process = mp.Process(
+            target=_run_shard,
+            args=(index, url, suffix, entry_ids, domain_ids, self.tasks, results),
+            daemon=True,
+        )
+
+    def get_staging_tables(self) -> Tuple[Table, Table]:
+        """Get the staging tables as they're seen from the target database."""
+        return _get_staging_tables(self.suffix, schema=self.schema)
+
+    def put(self, chunk: Optional[pd.DataFrame]) -> None:
+        """Put a chunk in this shard's queue, failing if the worker has died."""
+        while True:
+            try:
+                self.tasks.put(chunk, timeout=POLL_TIMEOUT)
+            except queue.Full:
+                if not self.process.is_alive():
+                    raise RuntimeError(f'shard {self.index} exited with code {self.process.exitcode}')
+            else:
+                return
+
+
+def _get_staging_tables(suffix: str = '', schema: Optional[str] = None,
+                        prefixes: Optional[List[str]] = None) -> Tuple[Table, Table]:
+    """Build the staging tables for the proteins and the annotations."""
+    metadata = MetaData(schema=schema)
+    proteins = Table(
+        f'{STAGING_PROTEIN_TABLE_NAME}{suffix}',
+        metadata,
+        Column('id', Integer),
+        Column('uniprot_id', String(32)),
+        Column('architecture_hash', String(32)),
+        Column('architecture', Text),
+        Column('architecture_length', Integer),
+        prefixes=prefixes,
+    )
+    annotations = Table(
+        f'{STAGING_ANNOTATION_TABLE_NAME}{suffix}',
+        metadata,
+        Column('entry_id', Integer),
+        Column('protein_id', Integer),
+        Column('xref', String(255)),
+        Column('start', Integer),
+        Column('end', Integer),
+        prefixes=prefixes,
+    )
+    return proteins, annotations
+
+
+def populate_proteins_sharded(engine: Engine, chunks: Iterable[pd.DataFrame], entry_ids: Mapping[str, int],
+                              n_shards: int, directory: Optional[str] = None,
+                              domain_ids: Optional[Set[str]] = None) -> Set[str]:
+    """Load chunks of protein mappings in parallel shards, then merge them into the protein and annotation tables.
+
+    :param engine: The engine of the target database
+    :param chunks: Chunks of protein mappings that each contain all of the mappings for their proteins, like from
+     :func:`bio2bel_interpro.parser.proteins.iterate_protein_group_chunks`
+    :param entry_ids: A dictionary from InterPro identifiers to the database identifiers of their entries
+    :param n_shards: The number of worker processes
+    :param directory: The directory in which to put the shards' database files with SQLite. Defaults to the
+     directory of the target database.
+    :param domain_ids: The InterPro identifiers of the entries that make up domain architectures
+    :return: The InterPro identifiers that were in the mappings but not in the given entries
+    """
+    with engine.connect() as connection:
+        offset = connection.execute(select([func.max(Protein.id)])).scalar() or 0
+
+    if engine.dialect.name == 'sqlite':
+        if directory is None and engine.url.database:
+            directory = os.path.dirname(os.path.abspath(engine.url.database))
+
+        with tempfile.TemporaryDirectory(dir=directory) as shard_directory:
+            shards = _run_shards(n_shards, entry_ids, domain_ids, chunks, offset, lambda index: (
+                URL('sqlite', database=os.path.join(shard_directory, f'shard_{index}.db')),
+                SQLITE_SHARD_SCHEMA,
+                '',
+            ))
+            return _merge_sqlite_shards(engine, shards, shard_directory)
+
+    shards = _run_shards(n_shards, entry_ids, domain_ids, chunks, offset, lambda index: (
+        engine.url,
+        None,
+        f'_{index}',
+    ))
+    return _merge_shards(engine, shards)
+
+
+def _run_shards(n_shards, entry_ids, domain_ids, chunks, offset, get_target) -> List[Tuple['_Shard', Set[str]]]:
+    """Deal the chunks out to the shards and wait for them to finish.
+
+    :return: Pairs of shards and the InterPro identifiers each couldn't find
+    """
+    results = mp.Queue()
+    shards = [
+        _Shard(index, *get_target(index), entry_ids=entry_ids, domain_ids=domain_ids or set(), results=results)
+        for index in range(n_shards)
+    ]
+    for shard in shards:
+        shard.process.start()
+
+    try:
+        for i, chunk in enumerate(chunks):
+            codes, uniques = pd.factorize(chunk['uniprot_id'])
+            shards[i % n_shards].put(chunk.assign(protein_id=codes + offset + 1))
+            offset += len(uniques)
+
+        for shard in shards:
+            shard.put(None)
+
+        missing = _collect_results(shards, results)
+
+    finally:
+        for shard in shards:
+            shard.process.join(timeout=POLL_TIMEOUT)
+            if shard.process.is_alive():
+                shard.process.terminate()
+
+    return [(shard, missing[shard.index]) for shard in shards]
+
+
+def _collect_results(shards: List['_Shard'], results: mp.Queue) -> Mapping[int, Set[str]]:
+    """Wait for each shard to report the InterPro identifiers it couldn't find, failing if any of them failed."""
+    missing = {}
+    while len(missing) < len(shards):
+        try:
+            index, shard_missing, error = results.get(timeout=POLL_TIMEOUT)
+        except queue.Empty:
+            for shard in shards:
+                if shard.index not in missing and not shard.process.is_alive():
+                    raise RuntimeError(f'shard {shard.index} exited with code {shard.process.exitcode}')
+            continue
+
+        if error is not None:
+            raise RuntimeError(f'shard {index} failed: {error}')
+
+        missing[index] = shard_missing
+
+    return missing
+
+
+def _run_shard(index: int, url: URL, suffix: str, entry_ids: Mapping[str, int], domain_ids: Set[str],
+               tasks: mp.Queue, results: mp.Queue) -> None:
+    """Write the chunks from the queue into this shard's staging tables until getting None."""
+    engine = create_engine(url)
+    prefixes = ['UNLOGGED'] if engine.dialect.name == 'postgresql' else None
+    proteins, annotations = _get_staging_tables(suffix, prefixes=prefixes)
+    proteins.metadata.drop_all(engine)
+    proteins.metadata.create_all(engine)
+
+    missing = set()
+    try:
+        while True:
+            chunk = tasks.get()
+            if chunk is None:
+                break
+
+            protein_records, annotation_records, chunk_missing = _get_records(chunk, entry_ids, domain_ids)
+            missing.update(chunk_missing)
+
+            if not annotation_records:
+                continue
+
+            with engine.begin() as connection:
+                connection.execute(proteins.insert(), protein_records)
+                connection.execute(annotations.insert(), annotation_records)
+
+    except Exception as e:
+        results.put((index, None, repr(e)))
+
+    else:
+        results.put((index, missing, None))
+
+    finally:
+        engine.dispose()
+
+
+def _get_records(chunk: pd.DataFrame, entry_ids: Mapping[str, int],
+                 domain_ids: Set[str]) -> Tuple[List[Mapping], List[Mapping], Set[str]]:
+    """Build the records for the staging tables from a chunk whose proteins' database identifiers are assigned."""
+    entry_id = chunk['interpro_id'].map(entry_ids)
+    found = entry_id.notna().to_numpy()
+    missing = set(chunk.loc[~found, 'interpro_id'])
+
+    chunk = chunk[found].assign(entry_id=entry_id[found].astype(int))
+
+    proteins = chunk[['protein_id', 'uniprot_id']].drop_duplicates('protein_id')
+    architectures = proteins['uniprot_id'].map(get_architectures(chunk, domain_ids))
+    unique_architectures = architectures.dropna().unique()
+    proteins = proteins.assign(
+        architecture=architectures,
+        architecture_hash=architectures.map(dict(zip(
+            unique_architectures,
+            map(hash_architecture, unique_architectures),
+        ))),
+        architecture_length=architectures.map({
+            architecture: len(split_architecture(architecture))
+            for architecture in unique_architectures
+        }),
+    )
+    protein_records = [
+        {
+            key: (None if pd.isna(value) else value)
+            for key, value in record.items()
+        }
+        for record in proteins.rename(columns={'protein_id': 'id'}).to_dict('records')
+    ]
+    annotation_records = chunk[['entry_id', 'protein_id', 'xref', 'start', 'end']].to_dict('records')
+
+    return protein_records, annotation_records, missing
+
+
+def _merge_sqlite_shards(engine: Engine, shards: List[Tuple['_Shard', Set[str]]], shard_directory: str) -> Set[str]:
+    """Merge each shard's database file into the target database by attaching it."""
+    with engine.connect() as connection:
+        for shard, _ in shards:
+            path = os.path.join(shard_directory, f'shard_{shard.index}.db')
+            connection.execute(text(f'ATTACH DATABASE :path AS {SQLITE_SHARD_SCHEMA}'), path=path)
+            with connection.begin():
+                _merge_shard(connection, shard)
+            connection.execute(f'DETACH DATABASE {SQLITE_SHARD_SCHEMA}')
+
+        _analyze(connection)
+
+    return set().union(*(missing for _, missing in shards))
+
+
+def _merge_shards(engine: Engine, shards: List[Tuple['_Shard', Set[str]]]) -> Set[str]:
+    """Merge each shard's staging tables into the target tables, then drop them."""
+    with engine.connect() as connection:
+        for shard, _ in shards:
+            with connection.begin():
+                _merge_shard(connection, shard)
+                proteins, _ = shard.get_staging_tables()
+                proteins.metadata.drop_all(connection)
+
+        if engine.dialect.name == 'postgresql':
+            # The protein identifiers were assigned explicitly, so the sequence has to catch up
+            connection.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{PROTEIN_TABLE_NAME}', 'id'), "
+                f"(SELECT max(id) FROM {PROTEIN_TABLE_NAME}))"
+            ))
+
+        _analyze(connection)
+
+    return set().union(*(missing for _, missing in shards))
+
+
+def _merge_shard(connection, shard: '_Shard') -> None:
+    proteins, annotations = shard.get_staging_tables()
+    log.info('merging shard %d', shard.index)
+
+    architectures = Architecture.__table__
+    connection.execute(architectures.insert().from_select(
+        ['architecture_hash', 'architecture', 'length'],
+        select([proteins.c.architecture_hash, proteins.c.architecture, proteins.c.architecture_length])
+        .where(and_(
+            proteins.c.architecture_hash.isnot(None),
+            ~exists().where(architectures.c.architecture_hash == proteins.c.architecture_hash),
+        ))
+        .distinct(),
+    ))
+    connection.execute(Protein.__table__.insert().from_select(
+        ['id', 'uniprot_id', 'architecture_id'],
+        select([proteins.c.id, proteins.c.uniprot_id, architectures.c.id])
+        .select_from(proteins.outerjoin(
+            architectures,
+            architectures.c.architecture_hash == proteins.c.architecture_hash,
+        )),
+    ))
+    connection.execute(Annotation.__table__.insert().from_select(
+        ['entry_id', 'protein_id', 'xref', 'start', 'end'],
+        select([
+            annotations.c.entry_id,
+            annotations.c.protein_id,
+            annotations.c.xref,
+            annotations.c.start,
+            annotations.c.end,
+        ]),
+    ))
+
+
+def _analyze(connection) -> None:
+    statement = ANALYZE_STATEMENTS.get(connection.engine.dialect.name)
+    if statement is not None:
+        connection.execute(text(statement).execution_options(autocommit=True))
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+"""Find proteins with similar InterPro compositions with MinHash signatures and locality-sensitive hashing (LSH).
+
+The similarity of two proteins is the Jaccard index of the sets of InterPro entries they're annotated to. Comparing
+a protein to every other one doesn't scale, so :meth:`bio2bel_interpro.Manager.build_similarity_index` computes a
+MinHash signature for each protein, with one minimum of a random universal hash over the protein's entries for each
+permutation. The fraction of permutations in which two signatures agree estimates the Jaccard index.
+
+The signatures are split into bands, and the rows of each band are hashed into a bucket. Proteins that share a
+bucket in any band are candidates, so :meth:`bio2bel_interpro.Manager.get_similar_proteins` only looks up the
+buckets of one protein with an index, then estimates the similarities of the candidates from their signatures and
+calculates the exact Jaccard indexes of the best ones. With ``b`` bands of ``r`` rows, a pair of proteins with a
+Jaccard index of ``s`` is a candidate with probability ``1 - (1 - s ** r) ** b``.
+
+The signatures of each chunk of proteins are computed with :mod:`numpy` at once, from pairs of proteins and entries
+that are sorted by protein.
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+__all__ = [
+    'NUM_PERM',
+    'BANDS',
+    'get_permutations',
+    'get_signatures',
+    'get_band_hashes',
+    'estimate_similarities',
+    'get_jaccard',
+]
+
+#: The default number of permutations in each signature
+NUM_PERM = 128
+
+#: The default number of bands the signatures are split into for LSH
+BANDS = 32
+
+#: The Mersenne prime for the universal hashes, small enough that the products of the hashes fit in 64 bits
+PRIME = (1 << 31) - 1
+
+#: The seed of the random universal hashes, which has to be the same when building and querying
+SEED = 1
+
+#: The multiplier for combining the rows of a band into one hash
+_BAND_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+def get_permutations(num_perm: int = NUM_PERM, seed: int = SEED) -> Tuple[np.ndarray, np.ndarray]:
+    """Get the coefficients of the random universal hashes ``(a * x + b) mod p`` that stand in for permutations."""
+    rng = np.random.RandomState(seed)
+    a = rng.randint(1, PRIME, size=num_perm, dtype=np.int64)
+    b = rng.randint(0, PRIME, size=num_perm, dtype=np.int64)
+    return a, b
+
+
+def get_signatures(protein_ids: np.ndarray, entry_ids: np.ndarray, num_perm: int = NUM_PERM,
+                   seed: int = SEED) -> Tuple[np.ndarray, np.ndarray]:
+    """Compute the MinHash signatures of proteins from pairs of proteins and their entries.
+
+    :param protein_ids: The database identifiers of the proteins of the pairs, sorted
+    :param entry_ids: The database identifiers of the entries of the pairs
+    :param num_perm: The number of permutations
+    :param seed: The seed of the permutations
+    :return: The unique protein identifiers, and an array with a row of ``uint32`` minimums for each of them
+
+    >>> proteins, signatures = get_signatures(np.array([1, 1, 2, 2]), np.array([5, 6, 6, 5]), num_perm=4)
+    >>> proteins.tolist()
+    [1, 2]
+    >>> bool((signatures[0] == signatures[1]).all())
+    True
+    """
+    protein_ids = np.asarray(protein_ids)
+    if not len(protein_ids):
+        return protein_ids, np.empty((0, num_perm), dtype=np.uint32)
+
+    a, b = get_permutations(num_perm, seed)
+    hashes = (np.outer(np.asarray(entry_ids, dtype=np.int64) % PRIME, a) + b) % PRIME
+
+    starts = np.flatnonzero(np.r_[True, protein_ids[1:] != protein_ids[:-1]])
+    return protein_ids[starts], np.minimum.reduceat(hashes, starts, axis=0).astype(np.uint32)
+
+
+def get_band_hashes(signatures: np.ndarray, bands: int = BANDS) -> np.ndarray:
+    """Hash the rows of each band of the signatures into buckets.
+
+    :param signatures: An array with a signature in each row, with a number of permutations divisible by the bands
+    :param bands: The number of bands
+    :return: An array with the ``int64`` bucket of each band in each row
+    """
+    n, num_perm = signatures.shape
+    if num_perm % bands:
+        raise ValueError(f'{num_perm} permutations can not be split into {bands} bands')
+
+    rows = signatures.reshape(n, bands, num_perm // bands).astype(np.uint64)
+    buckets = np.zeros((n, bands), dtype=np.uint64)
+    for i in range(rows.shape[2]):
+        buckets = buckets * _BAND_MULTIPLIER + rows[:, :, i] + np.uint64(1)
+    return buckets.view(np.int64)
+
+
+def estimate_similarities(signature: np.ndarray, signatures: np.ndarray) -> np.ndarray:
+    """Estimate the Jaccard indexes of a signature with each row of an array of signatures."""
+    return (signatures == signature).mean(axis=1)
+
+
+def get_jaccard(a, b) -> float:
+    """Calculate the Jaccard index of two sets.
+
+    >>> get_jaccard({1, 2, 3}, {2, 3, 4})
+    0.5
+    """
+    a, b = set(a), set(b)
+    if not a and not b:
+        return 0.0
+    return len(a & b) / len(a | b)
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+
+"""Build read-only SQLite snapshots of Bio2BEL InterPro for serving.
+
+A snapshot is built in a temporary file with the safety features that only matter for a database that's being
+written to concurrently turned off: there's no rollback journal, writes aren't synced to disk, and the indexes are
+only built once all of the data is loaded. Once loaded, the snapshot is analyzed for the query planner, vacuumed, made
+read-only, and moved into place.
+
+Readers open a snapshot with ``mode=ro&immutable=1`` so SQLite doesn't take any locks, like in:
+
+.. code-block:: python
+
+    from bio2bel_interpro import Manager
+    from bio2bel_interpro.snapshot import build_snapshot
+
+    build_snapshot('interpro.db', populate_proteins=True)
+    manager = Manager(connection='sqlite:///interpro.db', read_only=True)
+"""
+
+import logging
+import os
+import stat
+import time
+from typing import Optional
+
+from sqlalchemy import event
+
+from .models import Base
+
+__all__ = [
+    'build_snapshot',
+    'get_snapshot_connection',
+]
+
+log = logging.getLogger(__name__)
+
+#: The size of SQLite's page cache while building a snapshot, in KiB
+SNAPSHOT_CACHE_SIZE = 1 << 20
+
+#: The pragmas set on each connection while building a snapshot
+SNAPSHOT_PRAGMAS = {
+    'journal_mode': 'OFF',
+    'synchronous': 'OFF',
+    'foreign_keys': 'OFF',
+    'temp_store': 'MEMORY',
+}
+
+
+def get_snapshot_connection(path: str) -> str:
+    """Get a connection string that opens the SQLite database at the given path as read-only and immutable."""
+    return f'sqlite:///file:{os.path.abspath(path)}?mode=ro&immutable=1&uri=true'
+
+
+def build_snapshot(path: str, force: bool = False, cache_size: Optional[int] = None, **kwargs) -> str:
+    """Build a read-only SQLite snapshot at the given path.
+
+    Any error while populating, like a source file that can't be found, stops the build and is raised.
+
+    :param path: The path of the snapshot
+    :param force: If true, replaces an existing snapshot
+    :param cache_size: The size of the page cache while building, in KiB. Defaults to :data:`SNAPSHOT_CACHE_SIZE`.
+    :param kwargs: Keyword arguments to pass to :meth:`bio2bel_interpro.Manager.populate_or_raise`
+    :return: A connection string for reading the snapshot, from :func:`get_snapshot_connection`
+    :raises FileExistsError: if the snapshot already exists and ``force`` isn't set
+    :raises RuntimeError: if nothing was populated
+    """
+    from .manager import Manager
+
+    path = os.path.abspath(path)
+    if os.path.exists(path) and not force:
+        raise FileExistsError(f'snapshot already exists: {path}')
+
+    tmp_path = f'{path}.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    manager = Manager(connection=f'sqlite:///{tmp_path}')
+    try:
+        _set_snapshot_pragmas(manager.engine, cache_size or SNAPSHOT_CACHE_SIZE)
+
+        indexes = [index for table in Base.metadata.sorted_tables for index in table.indexes]
+        for index in indexes:
+            index.drop(manager.engine)
+
+        t = time.time()
+        log.info('populating snapshot at %s', tmp_path)
+        manager.populate_or_raise(**kwargs)
+        if not manager.is_populated():
+            raise RuntimeError(f'could not populate snapshot at {tmp_path}')
+        log.info('populated snapshot in %.2f seconds', time.time() - t)
+
+        t = time.time()
+        log.info('building %d indexes', len(indexes))
+        for index in indexes:
+            index.create(manager.engine)
+        log.info('built indexes in %.2f seconds', time.time() - t)
+
+        manager.session.close()
+        with manager.engine.connect() as connection:
+            connection.execute('ANALYZE')
+            connection.execute('VACUUM')
+    except BaseException:
+        manager.session.close()
+        manager.engine.dispose()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    manager.engine.dispose()
+
+    os.chmod(tmp_path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+    if os.path.exists(path):
+        os.chmod(path, stat.S_IWUSR | stat.S_IRUSR)
+    os.replace(tmp_path, path)
+
+    return get_snapshot_connection(path)
+
+
+def _set_snapshot_pragmas(engine, cache_size: int) -> None:
+    """Set the pragmas for building a snapshot on all new connections, and close the existing ones."""
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in SNAPSHOT_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+        # A negative cache size is in KiB rather than in pages
+        cursor.execute(f'PRAGMA cache_size = -{cache_size}')
+        cursor.close()
+
+    engine.dispose()
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+
+"""Check that chunks of protein mappings are sorted while streaming them, and sort them externally if they're not.
+
+The protein mappings from InterPro are sorted by UniProt identifier, which the loaders rely on so that no protein is
+split across chunks. Custom files, like predictions concatenated onto ``protein2ipr.dat``, might not be, so
+:func:`check_sorted_chunks` raises a :class:`UnsortedError` at the first row that's out of order. The loaders then
+start over with :func:`sort_chunks`, which sorts the mappings with an external merge sort:
+
+1. Chunks are buffered until they take up the memory budget, then sorted and spilled to a temporary file as a run.
+   Each run is written in blocks of :data:`BLOCK_SIZE` rows, with the strings encoded as fixed-width UTF-8 byte
+   arrays and each block pickled as a dictionary of :mod:`numpy` arrays.
+2. The runs are merged by holding one block of each run in memory. All of the rows up to the smallest of the
+   blocks' last keys can't be preceded by any row that's still on disk, so they're sorted and emitted together,
+   and the blocks that were used up are replaced with their runs' next blocks.
+
+The memory used is about the budget while spilling, and one block for each run while merging.
+"""
+
+import logging
+import os
+import pickle
+import tempfile
+from typing import Iterable, Iterator, List, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+from .constants import CHUNKSIZE, SORT_MEMORY
+
+__all__ = [
+    'UnsortedError',
+    'check_sorted_chunks',
+    'sort_chunks',
+]
+
+log = logging.getLogger(__name__)
+
+#: The number of rows in each block of a run
+BLOCK_SIZE = 10000
+
+
+class UnsortedError(ValueError):
+    """Raised when chunks that should be sorted aren't."""
+
+
+def check_sorted_chunks(chunks: Iterable[pd.DataFrame], key: str = 'uniprot_id') -> Iterable[pd.DataFrame]:
+    """Iterate over chunks, checking that they're sorted by the key within and across chunks.
+
+    :param chunks: Chunks of a table
+    :param key: The column by which the chunks should be sorted
+    :raises UnsortedError: Before yielding the first chunk that's out of order
+    """
+    last = None
+    for i, chunk in enumerate(chunks):
+        keys = chunk[key]
+        if not len(keys.index):
+            continue
+
+        if not keys.is_monotonic_increasing or (last is not None and keys.iat[0] < last):
+            raise UnsortedError(f'chunk {i} is not sorted by {key}')
+
+        last = keys.iat[-1]
+        yield chunk
+
+
+def sort_chunks(chunks: Iterable[pd.DataFrame], key: str = 'uniprot_id', max_memory: int = SORT_MEMORY,
+                chunksize: Optional[int] = None, directory: Optional[str] = None) -> Iterable[pd.DataFrame]:
+    """Sort chunks of a table by a key with an external merge sort, with a bounded amount of memory.
+
+    :param chunks: Chunks of a table, which should each be smaller than the memory budget
+    :param key: The column by which to sort the chunks
+    :param max_memory: The number of bytes of chunks to sort in memory at a time
+    :param chunksize: The number of rows in each sorted chunk. Defaults to :data:`bio2bel_interpro.constants.CHUNKSIZE`
+    :param directory: The directory in which to put the runs. Defaults to the system's temporary directory.
+    :return: Sorted chunks, which can split rows with the same key across chunks
+    """
+    chunksize = chunksize or CHUNKSIZE
+
+    with tempfile.TemporaryDirectory(dir=directory) as run_directory:
+        paths = _write_runs(chunks, key, max_memory, run_directory)
+        log.info('merging %d sorted runs', len(paths))
+
+        buffer, buffered = [], 0
+        for frame in _merge_runs(paths, key):
+            buffer.append(frame)
+            buffered += len(frame.index)
+            if buffered >= chunksize:
+                yield from _split(pd.concat(buffer, ignore_index=True), chunksize, buffer)
+                buffered = len(buffer[0].index) if buffer else 0
+
+        if buffered:
+            yield pd.concat(buffer, ignore_index=True)
+
+
+def _split(frame: pd.DataFrame, chunksize: int, buffer: List[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    """Yield full chunks from the frame and put the rest back into the emptied buffer."""
+    buffer.clear()
+    n_full = len(frame.index) // chunksize * chunksize
+    for start in range(0, n_full, chunksize):
+        yield frame.iloc[start:start + chunksize]
+    if n_full < len(frame.index):
+        buffer.append(frame.iloc[n_full:])
+
+
+def _write_runs(chunks: Iterable[pd.DataFrame], key: str, max_memory: int, directory: str) -> List[str]:
+    """Buffer the chunks until they take up the memory budget, then sort them and write them out as a run."""
+    paths = []
+    buffer, buffered = [], 0
+
+    def _spill():
+        path = os.path.join(directory, f'run_{len(paths)}.bin')
+        run = pd.concat(buffer, ignore_index=True).sort_values(key, kind='mergesort', ignore_index=True)
+        with open(path, 'wb') as file:
+            for start in range(0, len(run.index), BLOCK_SIZE):
+                pickle.dump(_encode(run.iloc[start:start + BLOCK_SIZE]), file, protocol=pickle.HIGHEST_PROTOCOL)
+        log.debug('wrote run %d with %d rows', len(paths), len(run.index))
+        paths.append(path)
+        buffer.clear()
+
+    for chunk in chunks:
+        buffer.append(chunk)
+        buffered += int(chunk.memory_usage(deep=True).sum())
+        if buffered >= max_memory:
+            _spill()
+            buffered = 0
+
+    if buffer:
+        _spill()
+
+    return paths
+
+
+def _encode(frame: pd.DataFrame) -> Mapping[str, np.ndarray]:
+    """Encode the columns of a frame as arrays, with the strings as fixed-width UTF-8 bytes."""
+    return {
+        column: (
+            np.char.encode(values.to_numpy(dtype=str), 'utf-8')
+            if values.dtype == object else
+            values.to_numpy()
+        )
+        for column, values in frame.items()
+    }
+
+
+def _decode(block: Mapping[str, np.ndarray]) -> pd.DataFrame:
+    """Decode a block into a frame."""
+    return pd.DataFrame({
+        column: (
+            np.char.decode(values, 'utf-8').astype(object)
+            if values.dtype.kind == 'S' else
+            values
+        )
+        for column, values in block.items()
+    })
+
+
+def _iterate_blocks(path: str) -> Iterator[Mapping[str, np.ndarray]]:
+    """Iterate over the blocks of a run."""
+    with open(path, 'rb') as file:
+        while True:
+            try:
+                yield pickle.load(file)
+            except EOFError:
+                return
+
+
+def _merge_runs(paths: List[str], key: str) -> Iterable[pd.DataFrame]:
+    """Merge sorted runs, holding one block of each in memory."""
+    runs = [_iterate_blocks(path) for path in paths]
+    blocks = {i: next(run, None) for i, run in enumerate(runs)}
+    blocks = {i: block for i, block in blocks.items() if block is not None}
+
+    while blocks:
+        # No row that's still on disk can come before the smallest of the last keys of the current blocks
+        bound = min(block[key][-1] for block in blocks.values())
+
+        parts = []
+        for i, block in list(blocks.items()):
+            end = int(np.searchsorted(block[key], bound, side='right'))
+            parts.append({column: values[:end] for column, values in block.items()})
+
+            if end < len(block[key]):
+                blocks[i] = {column: values[end:] for column, values in block.items()}
+                continue
+
+            block = next(runs[i], None)
+            if block is None:
+                del blocks[i]
+            else:
+                blocks[i] = block
+
+        merged = {
+            column: np.concatenate([part[column] for part in parts])
+            for column in parts[0]
+        }
+        order = np.argsort(merged[key], kind='stable')
+        yield _decode({column: values[order] for column, values in merged.items()})
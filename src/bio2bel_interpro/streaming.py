@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+
+"""Convert the InterPro source files to BEL without loading them into a database.
+
+Only the entries and their hierarchy are kept in memory. The protein mappings are streamed in chunks, which are
+converted by a pool of worker processes and written out in order as they're finished.
+
+Two output formats are supported:
+
+``nodelink``
+    Node-link JSON lines. The first line is ``{"graph": {...}}`` with the graph's metadata, and each following line
+    is either ``{"node": {...}}`` or ``{"link": {...}}``. Nodes are written before any of the links that reference
+    them, and links reference nodes by their ``id``, which is the SHA-512 of the node like in
+    :func:`pybel.to_json`.
+``bel``
+    A BEL script, like :func:`pybel.to_bel`.
+
+The statements are the same as the ones in :meth:`bio2bel_interpro.Manager.to_bel`, except that every entry is
+written as a node, even if it's not part of the hierarchy or annotated to any proteins, and that the mappings of the
+entries to GO terms are left out.
+"""
+
+import json
+import logging
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, Mapping, Optional, TextIO, Tuple
+
+import pandas as pd
+
+from pybel import BELGraph, to_bel_lines, to_json
+from pybel.constants import IS_A, PYBEL_AUTOEVIDENCE, RELATION
+from pybel.dsl import protein
+from .constants import BEL_FORMATS, CHUNKSIZE, MODULE_NAME
+
+__all__ = [
+    'write_bel',
+    'write_bel_path',
+]
+
+log = logging.getLogger(__name__)
+
+#: A dictionary from InterPro identifiers to how each is referenced in the output. Set in the worker processes.
+_ENTRY_REFERENCES = {}
+
+
+def write_bel_path(path: str, fmt: str = 'nodelink', **kwargs) -> Mapping[str, int]:
+    """Write the InterPro hierarchy and annotations as BEL to the given path.
+
+    :param path: The path of the output file
+    :param fmt: Either ``nodelink`` or ``bel``
+    :param kwargs: Keyword arguments to pass to :func:`write_bel`
+    :return: The numbers of entries, proteins, and edges written
+    """
+    with open(path, 'w') as file:
+        return write_bel(file, fmt=fmt, **kwargs)
+
+
+def write_bel(
+        file: TextIO,
+        fmt: str = 'nodelink',
+        entries_url: Optional[str] = None,
+        tree_url: Optional[str] = None,
+        proteins_url: Optional[str] = None,
+        chunksize: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        force_download: bool = False,
+) -> Mapping[str, int]:
+    """Write the InterPro hierarchy and annotations as BEL, streaming directly from the source files.
+
+    :param file: A writable file or file-like
+    :param fmt: Either ``nodelink`` or ``bel``
+    :param entries_url: The path to the InterPro entries file
+    :param tree_url: The path to the InterPro tree file
+    :param proteins_url: The path to the protein mappings, sorted by UniProt identifier
+    :param chunksize: The number of protein mappings to read at a time
+    :param max_workers: The number of worker processes for the protein mappings. If 0, converts them in this
+     process. Defaults to the number of CPUs.
+    :param force_download: Should the data be re-downloaded?
+    :return: The numbers of entries, proteins, and edges written
+    """
+    if fmt not in BEL_FORMATS:
+        raise ValueError(f'invalid format: {fmt}. Should be one of {BEL_FORMATS}')
+
+    from .parser.entries import get_entries_df
+    from .parser.proteins import get_proteins_chunks
+    from .parser.tree import get_interpro_tree
+
+    entries = _get_entry_nodes(get_entries_df(url=entries_url, force_download=force_download))
+    tree = get_interpro_tree(path=tree_url, force_download=force_download)
+    hierarchy = _get_hierarchy(tree, entries)
+
+    counts = dict(entries=len(entries), proteins=0, edges=len(hierarchy))
+
+    references = _get_references(entries, fmt)
+    for line in _iterate_header_lines(entries, hierarchy, references, fmt):
+        print(line, file=file)
+
+    chunks = get_proteins_chunks(url=proteins_url, force_download=force_download, chunksize=chunksize or CHUNKSIZE)
+    for text, n_proteins, n_edges in _iterate_converted_chunks(chunks, references, fmt, max_workers):
+        file.write(text)
+        counts['proteins'] += n_proteins
+        counts['edges'] += n_edges
+
+    if fmt == 'bel':
+        print('UNSET SupportingText', file=file)
+        print('UNSET Citation', file=file)
+
+    return counts
+
+
+def _get_entry_nodes(df: pd.DataFrame) -> Mapping[str, protein]:
+    """Build a dictionary from InterPro identifiers to their nodes."""
+    return {
+        interpro_id: protein(namespace=MODULE_NAME, name=str(name), identifier=str(interpro_id))
+        for interpro_id, name in zip(df['ENTRY_AC'], df['ENTRY_NAME'])
+    }
+
+
+def _get_hierarchy(tree, entries: Mapping[str, protein]) -> List[Tuple[str, str]]:
+    """Get the pairs of InterPro identifiers of children and parents that are both in the entries."""
+    rv = []
+    for parent_name, child_name in tree.edges():
+        child_id = tree.nodes[child_name]['interpro_id']
+        parent_id = tree.nodes[parent_name]['interpro_id']
+
+        if child_id not in entries or parent_id not in entries:
+            log.warning('missing %s or %s', child_id, parent_id)
+            continue
+
+        rv.append((child_id, parent_id))
+
+    return rv
+
+
+def _get_references(entries: Mapping[str, protein], fmt: str) -> Mapping[str, str]:
+    """Get how each entry is referenced in the output."""
+    if fmt == 'bel':
+        return {interpro_id: node.as_bel() for interpro_id, node in entries.items()}
+
+    return {interpro_id: node.as_sha512() for interpro_id, node in entries.items()}
+
+
+def _iterate_header_lines(entries: Mapping[str, protein], hierarchy: List[Tuple[str, str]],
+                          references: Mapping[str, str], fmt: str) -> Iterable[str]:
+    """Iterate over the lines for the graph's metadata, the entries, and the hierarchy."""
+    graph = BELGraph(name='InterPro')
+    graph.namespace_pattern[MODULE_NAME] = '.*'
+    graph.namespace_pattern['uniprot'] = '.*'
+
+    if fmt == 'bel':
+        yield from to_bel_lines(graph)
+        yield '###############################################\n'
+        yield 'SET Citation = {"PubMed","Added by PyBEL","29048466"}'
+        yield f'SET SupportingText = "{PYBEL_AUTOEVIDENCE}"'
+
+    else:
+        yield json.dumps({'graph': to_json(graph)['graph']})
+        for node in entries.values():
+            yield _node_to_json(node)
+
+    for child_id, parent_id in hierarchy:
+        yield _edge_to_line(references[child_id], references[parent_id], fmt)
+
+
+def _node_to_json(node: protein) -> str:
+    return json.dumps({'node': dict(node, id=node.as_sha512(), bel=node.as_bel())})
+
+
+def _edge_to_line(source: str, target: str, fmt: str) -> str:
+    if fmt == 'bel':
+        return f'{source} {IS_A} {target}'
+
+    return json.dumps({'link': {'source': source, 'target': target, RELATION: IS_A}})
+
+
+def _iterate_converted_chunks(chunks: Iterable[pd.DataFrame], references: Mapping[str, str], fmt: str,
+                              max_workers: Optional[int]) -> Iterable[Tuple[str, int, int]]:
+    """Convert the chunks of protein mappings, in order, with a bounded number of chunks in flight."""
+    from .parser.proteins import iterate_protein_group_chunks
+
+    chunks = iterate_protein_group_chunks(chunks)
+
+    if max_workers == 0:
+        _set_entry_references(references)
+        for chunk in chunks:
+            yield _convert_chunk(chunk, fmt)
+        return
+
+    max_workers = max_workers or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_set_entry_references,
+                             initargs=(references,)) as executor:
+        futures = deque()
+        for chunk in chunks:
+            futures.append(executor.submit(_convert_chunk, chunk, fmt))
+            if len(futures) > 2 * max_workers:
+                yield futures.popleft().result()
+
+        while futures:
+            yield futures.popleft().result()
+
+
+def _set_entry_references(references: Mapping[str, str]) -> None:
+    global _ENTRY_REFERENCES
+    _ENTRY_REFERENCES = references
+
+
+def _convert_chunk(chunk: pd.DataFrame, fmt: str) -> Tuple[str, int, int]:
+    """Convert a chunk of protein mappings to text, returning it with the numbers of proteins and edges."""
+    chunk = chunk.loc[chunk['interpro_id'].isin(_ENTRY_REFERENCES.keys()), ['uniprot_id', 'interpro_id']]
+    chunk = chunk.drop_duplicates()
+
+    lines = []
+    n_proteins = 0
+    for uniprot_id, interpro_ids in chunk.groupby('uniprot_id', sort=False)['interpro_id']:
+        node = protein(namespace='uniprot', identifier=str(uniprot_id))
+        n_proteins += 1
+
+        if fmt == 'bel':
+            source = node.as_bel()
+        else:
+            source = node.as_sha512()
+            lines.append(_node_to_json(node))
+
+        lines.extend(
+            _edge_to_line(source, _ENTRY_REFERENCES[interpro_id], fmt)
+            for interpro_id in interpro_ids
+        )
+
+    lines.append('')
+    return '\n'.join(lines), n_proteins, len(chunk.index)
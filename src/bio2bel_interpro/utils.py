@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+
+"""Utilities for Bio2BEL InterPro."""
+
+from itertools import islice
+from typing import Iterable, List, TypeVar
+
+__all__ = [
+    'iterate_chunks',
+]
+
+X = TypeVar('X')
+
+
+def iterate_chunks(iterable: Iterable[X], size: int) -> Iterable[List[X]]:
+    """Split an iterable into lists of at most the given size.
+
+    >>> list(iterate_chunks(range(5), 2))
+    [[0, 1], [2, 3], [4]]
+    """
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
@@ -7,6 +7,9 @@ When installing, use the web extra like:
 .. source-code:: sh
 
     pip install bio2bel_interpro[web]
+
+Each of the server's threads gets its own session, which is closed at the end of each request. Set the
+``BIO2BEL_INTERPRO_REPLICA_CONNECTION`` environment variable to send the queries to a read replica.
 """
 
 from bio2bel_interpro.manager import Manager
@@ -15,5 +18,12 @@ manager = Manager()
 
 app = manager.get_flask_admin_app()
 
+
+@app.teardown_appcontext
+def remove_session(exception=None):
+    """Close the session of the request's thread, so each request starts with a fresh one."""
+    manager.remove_session()
+
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -9,6 +9,7 @@ __all__ = [
     'TEST_TREE_PATH',
     'TEST_INTERPRO_GO_MAPPINGS_PATH',
     'TEST_INTERPRO_PROTEIN_MAPPINGS_PATH',
+    'TEST_GO_OBO_PATH',
 ]
 
 HERE = os.path.dirname(os.path.realpath(__file__))
@@ -18,3 +19,4 @@ TEST_ENTRIES_PATH = os.path.join(RESOURCES_DIR, 'test.entry.list')
 TEST_TREE_PATH = os.path.join(RESOURCES_DIR, 'test.ParentChildTreeFile.txt')
 TEST_INTERPRO_GO_MAPPINGS_PATH = os.path.join(RESOURCES_DIR, 'test.interpro2go.txt')
 TEST_INTERPRO_PROTEIN_MAPPINGS_PATH = os.path.join(RESOURCES_DIR, 'test.protein2ipr.dat.gz')
+TEST_GO_OBO_PATH = os.path.join(RESOURCES_DIR, 'test.go.obo')
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the domain architectures of proteins."""
+
+import unittest
+
+import pandas as pd
+
+from bio2bel_interpro.architectures import get_architectures, hash_architecture
+from tests.cases import TemporaryCacheClassMixin
+
+A0A000 = 'IPR010961~IPR004839'
+A0A001 = 'IPR011527~IPR003439~IPR003593'
+
+
+class TestGetArchitectures(unittest.TestCase):
+    """Test computing the architectures of a chunk of protein mappings."""
+
+    def test_get_architectures(self):
+        """Test overlapping hits of an entry are merged, separate hits are kept, and other entries are left out."""
+        chunk = pd.DataFrame(
+            [
+                ('P1', 'IPR2', 'PF2', 50, 90),
+                ('P1', 'IPR1', 'PF1', 1, 40),
+                ('P1', 'IPR1', 'SM1', 5, 45),
+                ('P1', 'IPR1', 'PF1', 100, 140),
+                ('P1', 'IPR9', 'PR9', 1, 140),
+                ('P2', 'IPR9', 'PR9', 1, 10),
+                ('P3', 'IPR2', 'PF2', 1, 10),
+            ],
+            columns=['uniprot_id', 'interpro_id', 'xref', 'start', 'end'],
+        )
+        architectures = get_architectures(chunk, {'IPR1', 'IPR2'})
+        self.assertEqual({'P1': 'IPR1~IPR2~IPR1', 'P3': 'IPR2'}, architectures.to_dict())
+
+
+class TestArchitectures(TemporaryCacheClassMixin):
+    """Test the architectures computed while loading the proteins and the queries over them."""
+
+    def test_proteins(self):
+        """Test each protein is linked to its architecture."""
+        self.assertEqual(2, self.manager.count_architectures())
+
+        for uniprot_id, expected in (('A0A000', A0A000), ('A0A001', A0A001)):
+            with self.subTest(uniprot_id=uniprot_id):
+                architecture = self.manager.get_protein_by_uniprot_id(uniprot_id).architecture
+                self.assertEqual(expected, architecture.architecture)
+                self.assertEqual(hash_architecture(expected), architecture.architecture_hash)
+                self.assertEqual(len(expected.split('~')), architecture.length)
+
+    def test_get_proteins_by_architecture(self):
+        """Test looking up proteins by their architectures as strings or as lists."""
+        proteins = self.manager.get_proteins_by_architecture(A0A001)
+        self.assertEqual(['A0A001'], [protein.uniprot_id for protein in proteins])
+        self.assertEqual(proteins, self.manager.get_proteins_by_architecture(A0A001.split('~')))
+        self.assertEqual([], self.manager.get_proteins_by_architecture('IPR011527'))
+
+        self.assertIsNotNone(self.manager.get_architecture(A0A000))
+        self.assertIsNone(self.manager.get_architecture('IPR011527'))
+
+    def test_frequencies(self):
+        """Test counting the proteins with each architecture."""
+        frequencies = self.manager.get_architecture_frequencies()
+        self.assertEqual(
+            [(A0A000, 1), (A0A001, 1)],
+            [(architecture.architecture, count) for architecture, count in frequencies],
+        )
+        self.assertEqual(1, len(self.manager.get_architecture_frequencies(limit=1)))
+
+    def test_similar(self):
+        """Test finding the architectures that share domains with a given one."""
+        similar = self.manager.get_similar_architectures('IPR011527~IPR003439')
+        self.assertEqual([(A0A001, 0.8)], [(architecture.architecture, score) for architecture, score in similar])
+
+        self.assertEqual([], self.manager.get_similar_architectures(A0A001))
+        self.assertEqual([], self.manager.get_similar_architectures('IPR999999'))
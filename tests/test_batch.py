@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for enriching many BEL graphs with InterPro."""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from click.testing import CliRunner
+from sqlalchemy.engine import Engine
+
+import pybel
+from bio2bel_interpro.batch import AnnotationLookup, enrich_graphs, get_graph_paths, read_graph, write_graph
+from bio2bel_interpro.constants import REPLICA_CONNECTION_ENVIRONMENT
+from pybel.dsl import protein
+from tests.cases import TemporaryCacheClassMixin
+
+NAMES = {'IPR1': 'One', 'IPR2': 'Two', 'IPR3': 'Three'}
+
+
+def _make_graph(name: str) -> pybel.BELGraph:
+    graph = pybel.BELGraph(name=name, version='1.0.0')
+    graph.add_increases(
+        protein(namespace='uniprot', identifier='A0A000'),
+        protein(namespace='interpro', name='Thymidine phosphorylase', identifier='IPR013465'),
+        citation='1234',
+        evidence='Made up',
+    )
+    return graph
+
+
+class TestLookup(unittest.TestCase):
+    """Test looking up annotations in flat arrays."""
+
+    def test_lookup(self):
+        """Test that repeated pairs and unknown entries are left out, and lookups work in both directions."""
+        lookup = AnnotationLookup.from_pairs(
+            [('P2', 'IPR2'), ('P1', 'IPR1'), ('P1', 'IPR2'), ('P2', 'IPR2'), ('P3', 'IPR4')],
+            NAMES,
+        )
+        self.assertEqual(3, len(lookup))
+        self.assertEqual(
+            {'P1': [('IPR1', 'One'), ('IPR2', 'Two')], 'P2': [('IPR2', 'Two')]},
+            lookup.get_entries(['P1', 'P2', 'P3', 'P0']),
+        )
+        self.assertEqual({'IPR2': ['P1', 'P2']}, lookup.get_uniprot_ids(['IPR2', 'IPR3', 'IPR4']))
+
+    def test_empty(self):
+        """Test a lookup without any annotations."""
+        lookup = AnnotationLookup.from_pairs([], NAMES)
+        self.assertEqual({}, lookup.get_entries(['P1']))
+        self.assertEqual({}, lookup.get_uniprot_ids(['IPR1']))
+
+
+class TestBatch(TemporaryCacheClassMixin):
+    """Test enriching graphs from a directory or a manifest."""
+
+    def setUp(self):
+        """Write a few graphs in different formats to a temporary directory."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.input = os.path.join(self.directory.name, 'input')
+        self.output = os.path.join(self.directory.name, 'output')
+        os.makedirs(self.input)
+        self.paths = [os.path.join(self.input, name) for name in ('a.json', 'b.gpickle', 'c.json')]
+        for path in self.paths:
+            write_graph(_make_graph(os.path.basename(path)), path)
+
+        with open(os.path.join(self.input, 'notes.txt'), 'w') as file:
+            print('not a graph', file=file)
+
+    def tearDown(self):
+        """Remove the graphs."""
+        self.directory.cleanup()
+
+    def test_enrich_manager(self):
+        """Test enriching a graph with the manager's queries."""
+        graph = _make_graph('test')
+        self.assertEqual(6, self.manager.enrich_proteins(graph))
+        self.assertEqual(1, self.manager.enrich_interpros(graph))
+        self.assertIn(protein(namespace='uniprot', identifier='A0A001'), graph)
+
+    def test_enrich_graphs(self):
+        """Test that the graphs are enriched the same way in worker processes and in this process."""
+        self.assertEqual(self.paths, get_graph_paths(self.input))
+        lookup = self.manager.get_annotation_lookup()
+        self.assertEqual(13, len(lookup))
+
+        for max_workers in (0, 2):
+            with self.subTest(max_workers=max_workers):
+                results = list(enrich_graphs(self.paths, self.output, lookup, max_workers=max_workers))
+                self.assertEqual(sorted(self.paths), sorted(result.path for result in results))
+                self.assertEqual([None] * 3, [result.error for result in results])
+                self.assertEqual([7] * 3, [result.edges for result in results])
+
+                graph = read_graph(os.path.join(self.output, 'b.gpickle'))
+                self.assertEqual(8, graph.number_of_edges())
+
+    @mock.patch('bio2bel_interpro.batch.gc', spec=[])
+    def test_enrich_graphs_without_freeze(self, _):
+        """Test enriching graphs in worker processes on Python 3.6, which can't freeze the garbage collector."""
+        lookup = self.manager.get_annotation_lookup()
+        results = list(enrich_graphs(self.paths, self.output, lookup, max_workers=2))
+        self.assertEqual([None] * 3, [result.error for result in results])
+
+    def test_errors(self):
+        """Test that a broken graph doesn't stop the others."""
+        manifest = os.path.join(self.directory.name, 'manifest.txt')
+        with open(manifest, 'w') as file:
+            print('# graphs', file=file)
+            print('input/a.json', file=file)
+            print('input/missing.json', file=file)
+
+        paths = get_graph_paths(manifest)
+        self.assertEqual([self.paths[0], os.path.join(self.input, 'missing.json')], paths)
+
+        lookup = self.manager.get_annotation_lookup()
+        results = {result.path: result for result in enrich_graphs(paths, self.output, lookup, max_workers=0)}
+        self.assertIsNone(results[paths[0]].error)
+        self.assertIsNotNone(results[paths[1]].error)
+
+        with self.assertRaises(ValueError):
+            list(enrich_graphs(paths, self.output, lookup, enrichments=['genes']))
+
+    def test_cli(self):
+        """Test enriching graphs from the command line."""
+        result = CliRunner().invoke(
+            self.manager.get_cli(),
+            ['-c', self.connection, 'enrich-graphs', self.input, '-d', self.output, '--no-interpros'],
+        )
+        self.assertEqual(0, result.exit_code, msg=result.output)
+        self.assertEqual(['a.json', 'b.gpickle', 'c.json'], sorted(os.listdir(self.output)))
+        self.assertIn('Enriched 3 graphs (0 failed) with 18 edges', result.output)
+
+    def test_cli_replica(self):
+        """Test that the connections to the read replica are closed before forking the workers too."""
+        replica_path = os.path.join(self.directory.name, 'replica.db')
+        shutil.copy(self.path, replica_path)
+
+        with mock.patch.dict(os.environ, {REPLICA_CONNECTION_ENVIRONMENT: f'sqlite:///{replica_path}'}), \
+                mock.patch.object(Engine, 'dispose', autospec=True, side_effect=Engine.dispose) as dispose:
+            result = CliRunner().invoke(
+                self.manager.get_cli(),
+                ['-c', self.connection, 'enrich-graphs', self.input, '-d', self.output, '--no-interpros'],
+            )
+
+        self.assertEqual(0, result.exit_code, msg=result.output)
+        disposed = {engine.url.database for (engine,), _ in dispose.call_args_list}
+        self.assertEqual({self.path, replica_path}, disposed)
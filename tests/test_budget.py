@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for loading the protein mappings in chunks that fit in a memory budget."""
+
+import unittest
+
+import pandas as pd
+
+from bio2bel_interpro import budget
+from bio2bel_interpro.budget import AdaptiveChunker, iterate_adaptive_chunks, parse_memory
+from tests.cases import TemporaryCacheClassMixin
+from tests.constants import (
+    TEST_ENTRIES_PATH, TEST_INTERPRO_GO_MAPPINGS_PATH, TEST_INTERPRO_PROTEIN_MAPPINGS_PATH, TEST_TREE_PATH,
+)
+
+MB = 2 ** 20
+
+
+class TestChunker(unittest.TestCase):
+    """Test choosing chunk sizes from measurements."""
+
+    def test_parse_memory(self):
+        """Test parsing amounts of memory."""
+        self.assertEqual(512 * MB, parse_memory('512MB'))
+        self.assertEqual(2 * 2 ** 30, parse_memory('2 GiB'))
+        with self.assertRaises(ValueError):
+            parse_memory('lots')
+
+    def test_grow(self):
+        """Test that the chunks grow by at most a factor of two towards the budget."""
+        chunker = AdaptiveChunker('1000MB', chunksize=10000, baseline=100 * MB)
+        # 10,000 rows taking 100 MB means about 70,000 rows fit in 80% of the budget
+        self.assertEqual(20000, chunker.update(10000, 1.0, rss=200 * MB))
+        self.assertEqual(40000, chunker.update(20000, 1.0, rss=300 * MB))
+        self.assertEqual(70000, chunker.update(40000, 2.0, rss=500 * MB))
+
+    def test_shrink(self):
+        """Test that the chunks are halved over the high water mark."""
+        chunker = AdaptiveChunker('1000MB', chunksize=40000, baseline=100 * MB)
+        self.assertEqual(20000, chunker.update(40000, 1.0, rss=950 * MB))
+        self.assertEqual(budget.MIN_CHUNKSIZE, AdaptiveChunker(1, chunksize=1500, baseline=0).update(1500, 1.0, rss=2))
+
+    def test_throughput(self):
+        """Test that growing the chunks is undone when it makes the throughput drop."""
+        chunker = AdaptiveChunker('1000MB', chunksize=10000, baseline=100 * MB)
+        self.assertEqual(20000, chunker.update(10000, 1.0, rss=101 * MB))
+        # Twice the rows in three times the time
+        self.assertEqual(10000, chunker.update(20000, 3.0, rss=102 * MB))
+        self.assertEqual(10000, chunker.ceiling)
+        self.assertEqual(10000, chunker.update(10000, 1.0, rss=102 * MB))
+
+    def test_iterate(self):
+        """Test that the chunk size is read before each chunk."""
+        frame = pd.DataFrame({'a': range(10)})
+
+        class Reader:
+            position = 0
+
+            def get_chunk(self, size):
+                if self.position >= len(frame.index):
+                    raise StopIteration
+                chunk = frame.iloc[self.position:self.position + size]
+                self.position += size
+                return chunk
+
+        chunker = AdaptiveChunker(MB, chunksize=2, baseline=0)
+        sizes = []
+        for chunk in iterate_adaptive_chunks(Reader(), chunker):
+            sizes.append(len(chunk.index))
+            chunker.chunksize += 1
+        self.assertEqual([2, 3, 4, 1], sizes)
+
+
+class TestPopulateBudget(TemporaryCacheClassMixin):
+    """Test populating the proteins with a memory budget."""
+
+    @classmethod
+    def populate(cls):
+        """Populate the database with the proteins loaded with a memory budget."""
+        cls.manager._populate_entries(entry_url=TEST_ENTRIES_PATH, tree_url=TEST_TREE_PATH)
+        cls.manager._populate_go(path=TEST_INTERPRO_GO_MAPPINGS_PATH)
+        cls.manager.refresh_stats()
+        cls.manager._populate_proteins(url=TEST_INTERPRO_PROTEIN_MAPPINGS_PATH, max_memory='64GB')
+
+    def test_proteins(self):
+        """Test that the proteins were loaded and the session was cleared afterwards."""
+        self.assertEqual(0, len(self.manager.session.identity_map))
+        self.assertEqual(2, self.manager.count_proteins())
+        self.assertEqual(17, self.manager.count_annotations())
+        self.assertEqual('IPR010961~IPR004839', str(self.manager.get_protein_by_uniprot_id('A0A000').architecture))
+        architecture = self.manager.get_architecture('IPR011527~IPR003439~IPR003593')
+        self.assertEqual(['IPR003439', 'IPR003593', 'IPR011527'], sorted(e.interpro_id for e in architecture.entries))
+
+    def test_summarize(self):
+        """Test that loading the proteins on their own refreshed the counts used to summarize."""
+        self.assertEqual(dict(interpros=44, annotations=17, proteins=2, go_terms=3), self.manager.summarize())
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the compact entry catalog."""
+
+import pickle
+import sys
+
+from bio2bel_interpro.catalog import EntryCatalog, EntryRecord
+from tests.cases import TemporaryCacheClassMixin
+from tests.constants import TEST_ENTRIES_PATH, TEST_INTERPRO_GO_MAPPINGS_PATH, TEST_TREE_PATH
+
+
+class TestCatalog(TemporaryCacheClassMixin):
+    """Test the entry catalog built from the database and from the source files."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Populate the database and build the catalog from it."""
+        super().setUpClass()
+        cls.catalog = cls.manager.get_entry_catalog()
+
+    def test_records(self):
+        """Test the catalog has a compact record for every entry."""
+        self.assertEqual(44, len(self.catalog))
+        self.assertIn('IPR013465', self.catalog)
+
+        entry = self.catalog.get_interpro_by_interpro_id('IPR013465')
+        self.assertIsInstance(entry, EntryRecord)
+        self.assertFalse(hasattr(entry, '__dict__'))
+        self.assertEqual('Thymidine phosphorylase', entry.name)
+        self.assertEqual('Family', entry.type)
+        self.assertEqual('IPR018090', entry.parent_id)
+        self.assertEqual(('0006213', '0009032'), entry.go_ids)
+
+        self.assertIs(sys.intern('Thymidine phosphorylase'), entry.name)
+        self.assertIs(sys.intern('pyrimidine nucleoside metabolic process'), self.catalog.go_names['0006213'])
+
+    def test_hash(self):
+        """Test that equal records have equal hashes, so they can be put in sets."""
+        entry = self.catalog.get_interpro_by_interpro_id('IPR013465')
+        copy = EntryRecord(entry.interpro_id, entry.name, entry.type, entry.parent_id, entry.go_ids)
+        self.assertEqual(entry, copy)
+        self.assertEqual(hash(entry), hash(copy))
+        self.assertEqual(1, len({entry, copy}))
+
+    def test_immutable(self):
+        """Test that records can't be changed, since that would change their hashes."""
+        entry = self.catalog.get_interpro_by_interpro_id('IPR013465')
+        with self.assertRaises(AttributeError):
+            entry.name = 'changed'
+        with self.assertRaises(AttributeError):
+            del entry.parent_id
+        self.assertEqual('Thymidine phosphorylase', entry.name)
+        self.assertEqual(entry, pickle.loads(pickle.dumps(entry)))
+
+    def test_lookups(self):
+        """Test the lookups give the same entries as the manager's."""
+        for model in self.manager.list_interpros():
+            entry = self.catalog.get_interpro_by_interpro_id(model.interpro_id)
+            self.assertEqual(model.name, entry.name)
+            self.assertIs(entry, self.catalog.get_interpro_by_name(model.name))
+            self.assertEqual(
+                None if model.parent is None else model.parent.interpro_id,
+                entry.parent_id,
+            )
+            self.assertEqual(
+                sorted(child.interpro_id for child in model.children),
+                sorted(child.interpro_id for child in self.catalog.get_children(model.interpro_id)),
+            )
+
+        self.assertIsNone(self.catalog.get_interpro_by_interpro_id('IPR999999'))
+        self.assertIsNone(self.catalog.get_interpro_by_name('nope'))
+        self.assertEqual(
+            {'IPR013465'},
+            set(self.catalog.get_interpros_by_ids(['IPR013465', 'IPR999999'])),
+        )
+
+    def test_hierarchy(self):
+        """Test getting parents, descendants, and GO terms."""
+        self.assertEqual('IPR018090', self.catalog.get_parent('IPR013465').interpro_id)
+        self.assertIsNone(self.catalog.get_parent('IPR000053'))
+        self.assertEqual(
+            {'IPR000053', 'IPR013466', 'IPR017713', 'IPR028579', 'IPR018090', 'IPR013465'},
+            set(self.catalog.get_descendant_ids('IPR000053')),
+        )
+        go_term = self.manager.get_go_by_go_identifier('0016763')
+        self.assertEqual([('0016763', go_term.name)], self.catalog.get_go_terms('IPR013466'))
+
+    def test_from_files(self):
+        """Test building the catalog from the source files gives the same records."""
+        catalog = EntryCatalog.from_files(
+            entries_url=TEST_ENTRIES_PATH,
+            tree_url=TEST_TREE_PATH,
+            go_mapping_path=TEST_INTERPRO_GO_MAPPINGS_PATH,
+        )
+        self.assertEqual(
+            sorted(self.catalog, key=str),
+            sorted(catalog, key=str),
+        )
+
+    def test_pickle(self):
+        """Test pickling the catalog as parallel lists and rebuilding its indexes."""
+        catalog = pickle.loads(pickle.dumps(self.catalog))
+        self.assertEqual(list(self.catalog), list(catalog))
+        self.assertEqual(self.catalog.go_names, catalog.go_names)
+        self.assertEqual('IPR018090', catalog.get_parent('IPR013465').interpro_id)
+
+        entry = catalog.get_interpro_by_interpro_id('IPR013465')
+        self.assertIs(sys.intern('Thymidine phosphorylase'), entry.name)
+        self.assertIs(sys.intern('IPR018090'), entry.parent_id)
+        self.assertIs(sys.intern('0006213'), entry.go_ids[0])
+        self.assertIs(sys.intern('pyrimidine nucleoside metabolic process'), catalog.go_names['0006213'])
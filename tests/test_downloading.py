@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for downloading the source files."""
+
+import hashlib
+import os
+import tempfile
+import threading
+import unittest
+from functools import partial
+from http.server import HTTPServer, SimpleHTTPRequestHandler
+from unittest import mock
+
+from bio2bel_interpro.downloading import ChecksumError, Source, download, download_all, get_cached_path, open_text
+from bio2bel_interpro.parser.interpro_to_go import get_interpro_go_mappings
+from bio2bel_interpro.parser.tree import get_interpro_tree
+from tests.constants import RESOURCES_DIR, TEST_INTERPRO_GO_MAPPINGS_PATH, TEST_TREE_PATH
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+TREE_NAME = os.path.basename(TEST_TREE_PATH)
+GO_NAME = os.path.basename(TEST_INTERPRO_GO_MAPPINGS_PATH)
+
+
+class RangeRequestHandler(SimpleHTTPRequestHandler):
+    """Serve files from the test resources, supporting requests for a range of bytes."""
+
+    def send_head(self):
+        """Send the headers, with a partial content status if a range was requested."""
+        header = self.headers.get('Range')
+        if header is None:
+            return super().send_head()
+
+        path = self.translate_path(self.path)
+        size = os.path.getsize(path)
+        start = int(header[len('bytes='):].split('-')[0])
+        if start >= size:
+            self.send_response(416)
+            self.send_header('Content-Range', f'bytes */{size}')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return None
+
+        file = open(path, 'rb')
+        file.seek(start)
+        self.send_response(206)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Range', f'bytes {start}-{size - 1}/{size}')
+        self.send_header('Content-Length', str(size - start))
+        self.end_headers()
+        return file
+
+    def log_message(self, *args):
+        """Don't log requests."""
+
+
+class MockFTP:
+    """Serve files from the test resources like :class:`ftplib.FTP`, supporting restarts."""
+
+    #: The connections that were opened
+    instances = []
+
+    def __init__(self, host: str):
+        """Connect to the fake host."""
+        self.host = host
+        self.rests = []
+
+    def __enter__(self):  # noqa: D105
+        MockFTP.instances.append(self)
+        return self
+
+    def __exit__(self, *args):  # noqa: D105
+        pass
+
+    def login(self):
+        """Log in anonymously."""
+
+    def voidcmd(self, command: str):
+        """Accept any command."""
+
+    def size(self, path: str) -> int:
+        """Get the size of a test resource."""
+        return os.path.getsize(os.path.join(RESOURCES_DIR, os.path.basename(path)))
+
+    def retrbinary(self, command: str, callback, blocksize: int = 8192, rest=None):
+        """Send a test resource to the callback in blocks, starting from the restart offset."""
+        self.rests.append(rest)
+        with open(os.path.join(RESOURCES_DIR, os.path.basename(command[len('RETR '):])), 'rb') as file:
+            file.seek(rest or 0)
+            for block in iter(lambda: file.read(blocksize), b''):
+                callback(block)
+
+
+class TestDownloading(unittest.TestCase):
+    """Test downloading from a local HTTP server."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Start an HTTP server for the test resources in a background thread."""
+        cls.server = HTTPServer(('127.0.0.1', 0), partial(RangeRequestHandler, directory=RESOURCES_DIR))
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f'http://127.0.0.1:{cls.server.server_port}'
+
+    @classmethod
+    def tearDownClass(cls):
+        """Stop the HTTP server."""
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        """Make a temporary directory to download into."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.tree_path = os.path.join(self.directory.name, TREE_NAME)
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.directory.cleanup()
+
+    def _read(self, path: str) -> str:
+        with open_text(path) as file:
+            return file.read()
+
+    def test_download(self):
+        """Test downloading a file and using the cached copy."""
+        url = f'{self.base_url}/{TREE_NAME}'
+        path = download(url, self.tree_path)
+        self.assertEqual(self.tree_path, path)
+        self.assertEqual(self._read(TEST_TREE_PATH), self._read(path))
+        self.assertFalse(os.path.exists(f'{self.tree_path}.part'))
+
+        with open(path, 'w') as file:
+            print('cached', file=file)
+
+        self.assertEqual(path, download(url, self.tree_path))
+        self.assertEqual('cached\n', self._read(path))
+
+        download(url, self.tree_path, force_download=True)
+        self.assertEqual(self._read(TEST_TREE_PATH), self._read(path))
+
+    def test_resume(self):
+        """Test that a partially downloaded file is resumed from where it stopped."""
+        with open(TEST_TREE_PATH, 'rb') as file:
+            content = file.read()
+
+        # If the server sent the whole file again, the start would be duplicated
+        with open(f'{self.tree_path}.part', 'wb') as file:
+            file.write(content[:100])
+
+        path = download(f'{self.base_url}/{TREE_NAME}', self.tree_path)
+
+        with open(path, 'rb') as file:
+            self.assertEqual(content, file.read())
+
+    def test_resume_complete(self):
+        """Test that a partially downloaded file that is already complete is used when the server answers 416."""
+        with open(TEST_TREE_PATH, 'rb') as file:
+            content = file.read()
+
+        with open(f'{self.tree_path}.part', 'wb') as file:
+            file.write(content)
+
+        path = download(f'{self.base_url}/{TREE_NAME}', self.tree_path)
+
+        with open(path, 'rb') as file:
+            self.assertEqual(content, file.read())
+
+    def test_resume_too_long(self):
+        """Test that a partially downloaded file that is longer than the file on the server is downloaded again."""
+        with open(TEST_TREE_PATH, 'rb') as file:
+            content = file.read()
+
+        with open(f'{self.tree_path}.part', 'wb') as file:
+            file.write(content + b'garbage')
+
+        path = download(f'{self.base_url}/{TREE_NAME}', self.tree_path)
+
+        with open(path, 'rb') as file:
+            self.assertEqual(content, file.read())
+
+    def test_force_download_part(self):
+        """Test that forcing a download doesn't resume from a stale partially downloaded file."""
+        with open(f'{self.tree_path}.part', 'wb') as file:
+            file.write(b'stale')
+
+        path = download(f'{self.base_url}/{TREE_NAME}', self.tree_path, force_download=True)
+        self.assertEqual(self._read(TEST_TREE_PATH), self._read(path))
+
+    @mock.patch('ftplib.FTP', MockFTP)
+    def test_resume_ftp(self):
+        """Test that a partially downloaded file is resumed over FTP, and not downloaded again once complete."""
+        MockFTP.instances = []
+        with open(TEST_TREE_PATH, 'rb') as file:
+            content = file.read()
+
+        with open(f'{self.tree_path}.part', 'wb') as file:
+            file.write(content[:100])
+
+        path = download(f'ftp://ftp.example.org/pub/{TREE_NAME}', self.tree_path)
+        with open(path, 'rb') as file:
+            self.assertEqual(content, file.read())
+        self.assertEqual([100], MockFTP.instances[0].rests)
+
+        os.remove(path)
+        with open(f'{self.tree_path}.part', 'wb') as file:
+            file.write(content)
+
+        path = download(f'ftp://ftp.example.org/pub/{TREE_NAME}', self.tree_path)
+        with open(path, 'rb') as file:
+            self.assertEqual(content, file.read())
+        self.assertEqual([], MockFTP.instances[1].rests)
+
+        with open(f'{self.tree_path}.part', 'wb') as file:
+            file.write(b'stale')
+
+        path = download(f'ftp://ftp.example.org/pub/{TREE_NAME}', self.tree_path, force_download=True)
+        with open(path, 'rb') as file:
+            self.assertEqual(content, file.read())
+        self.assertEqual([None], MockFTP.instances[2].rests)
+
+    @mock.patch('ftplib.FTP', MockFTP)
+    def test_resume_ftp_too_long(self):
+        """Test that a partial file longer than the file on the FTP server is downloaded again, checking the MD5."""
+        MockFTP.instances = []
+        with open(TEST_TREE_PATH, 'rb') as file:
+            content = file.read()
+
+        with open(f'{self.tree_path}.part', 'wb') as file:
+            file.write(content + b'garbage')
+
+        md5 = hashlib.md5(content).hexdigest()
+        path = download(f'ftp://ftp.example.org/pub/{TREE_NAME}', self.tree_path, md5=md5)
+        with open(path, 'rb') as file:
+            self.assertEqual(content, file.read())
+        self.assertEqual([None], MockFTP.instances[0].rests)
+
+        # A partial file of the right size is only used if its checksum matches
+        os.remove(path)
+        with open(f'{self.tree_path}.part', 'wb') as file:
+            file.write(b'x' * len(content))
+        with self.assertRaises(ChecksumError):
+            download(f'ftp://ftp.example.org/pub/{TREE_NAME}', self.tree_path, md5=md5)
+        self.assertFalse(os.path.exists(f'{self.tree_path}.part'))
+
+    def test_checksum(self):
+        """Test that the MD5 checksum is verified."""
+        with open(TEST_TREE_PATH, 'rb') as file:
+            md5 = hashlib.md5(file.read()).hexdigest()
+
+        url = f'{self.base_url}/{TREE_NAME}'
+        with self.assertRaises(ChecksumError):
+            download(url, self.tree_path, md5='0' * 32)
+        self.assertIsNone(get_cached_path(self.tree_path))
+        self.assertFalse(os.path.exists(f'{self.tree_path}.part'))
+
+        self.assertEqual(self.tree_path, download(url, self.tree_path, md5=md5))
+
+    def _help_test_compression(self, compression: str, suffix: str):
+        path = download(f'{self.base_url}/{TREE_NAME}', self.tree_path, compression=compression)
+        self.assertEqual(self.tree_path + suffix, path)
+        self.assertEqual(path, get_cached_path(self.tree_path))
+        self.assertFalse(os.path.exists(self.tree_path))
+
+        self.assertEqual(self._read(TEST_TREE_PATH), self._read(path))
+
+        graph = get_interpro_tree(path=path)
+        self.assertEqual(get_interpro_tree(path=TEST_TREE_PATH).number_of_edges(), graph.number_of_edges())
+
+    def test_gzip(self):
+        """Test compressing a file with gzip at rest."""
+        self._help_test_compression('gzip', '.gz')
+
+    @unittest.skipIf(zstandard is None, 'zstandard is not installed')
+    def test_zstd(self):
+        """Test compressing a file with zstd at rest."""
+        self._help_test_compression('zstd', '.zst')
+
+    def test_download_all(self):
+        """Test downloading several sources concurrently, including one with a checksum."""
+        with open(TEST_INTERPRO_GO_MAPPINGS_PATH, 'rb') as file:
+            md5 = hashlib.md5(file.read()).hexdigest()
+
+        md5_path = os.path.join(self.directory.name, 'go.md5')
+        with open(md5_path, 'w') as file:
+            print(md5, GO_NAME, file=file)
+
+        go_path = os.path.join(self.directory.name, GO_NAME)
+        sources = {
+            'tree': Source(f'{self.base_url}/{TREE_NAME}', self.tree_path),
+            'go': Source(f'{self.base_url}/{GO_NAME}', go_path, md5_url=md5_path, md5_path=md5_path),
+        }
+
+        paths = download_all(sources=sources, compression='gzip')
+        self.assertEqual({'tree': f'{self.tree_path}.gz', 'go': f'{go_path}.gz'}, paths)
+        self.assertEqual(
+            get_interpro_go_mappings(TEST_INTERPRO_GO_MAPPINGS_PATH),
+            get_interpro_go_mappings(paths['go']),
+        )
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the enrichment analysis of InterPro entries and GO terms."""
+
+import unittest
+
+import numpy as np
+
+from bio2bel_interpro.enrichment import benjamini_hochberg
+from tests.cases import TemporaryCacheClassMixin
+
+
+class TestBenjaminiHochberg(unittest.TestCase):
+    """Test the vectorized Benjamini-Hochberg correction."""
+
+    def test_groups(self):
+        """Test that several groups are corrected independently."""
+        q_values = benjamini_hochberg(
+            np.array([1, 0, 1, 0, 1, 1]),
+            np.array([0.01, 1e-30, 0.04, 0.5, 0.03, 0.2]),
+            n_tests=4,
+        )
+        np.testing.assert_allclose([0.04, 4e-30, 0.16 / 3, 1.0, 0.16 / 3, 0.2], q_values)
+
+
+class TestEnrichment(TemporaryCacheClassMixin):
+    """Test the enrichment analysis over the test database."""
+
+    def test_protein_entry_matrix(self):
+        """Test the shape and contents of the protein × entry incidence matrix."""
+        incidence = self.manager.get_protein_entry_matrix()
+        self.assertEqual((2, 44), incidence.shape)
+        self.assertEqual(13, incidence.matrix.nnz)
+        self.assertIs(incidence, self.manager.get_protein_entry_matrix(), msg='matrix should be cached')
+
+        propagated = self.manager.get_protein_entry_matrix(propagate=True)
+        self.assertEqual(13 + 3, propagated.matrix.nnz)
+
+    def test_entry_enrichment(self):
+        """Test the over-representation of InterPro entries."""
+        df = self.manager.get_entry_enrichment(['A0A001'])
+        self.assertEqual(7, len(df.index))
+
+        row = df[df.identifier == 'IPR003439'].iloc[0]
+        self.assertEqual('ABC transporter-like', row['name'])
+        self.assertEqual(1, row.query_count)
+        self.assertEqual(1, row.background_count)
+        self.assertEqual(2, row.background_size)
+        self.assertAlmostEqual(0.5, row.p_value)
+
+    def test_entry_enrichment_propagated(self):
+        """Test the over-representation of InterPro entries, propagated up the hierarchy."""
+        df = self.manager.get_entry_enrichment(['A0A001'], propagate=True)
+        row = df[df.identifier == 'IPR000053'].iloc[0]
+        self.assertEqual(2, row.background_count)
+        self.assertAlmostEqual(1.0, row.p_value)
+
+    def test_entry_enrichment_background(self):
+        """Test the over-representation of InterPro entries with a custom background."""
+        df = self.manager.get_entry_enrichment(['A0A001'], background=['A0A001'])
+        self.assertTrue((df.background_size == 1).all())
+        self.assertTrue(np.allclose(1.0, df.p_value))
+
+    def test_entry_enrichments(self):
+        """Test calculating the over-representation of InterPro entries for several query sets at once."""
+        df = self.manager.get_entry_enrichments({
+            'a': ['A0A000'],
+            'b': ['A0A001'],
+            'c': ['P28482'],
+        })
+        self.assertEqual({'a', 'b'}, set(df['query']))
+        self.assertEqual(6, (df['query'] == 'a').sum())
+
+    def test_go_enrichment(self):
+        """Test the over-representation of GO terms."""
+        df = self.manager.get_go_enrichment(['A0A001'])
+        self.assertEqual({'0009032', '0006213'}, set(df.identifier))
+        self.assertTrue(np.allclose(0.5, df.p_value))
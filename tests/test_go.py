@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the GO hierarchy and looking up entries by GO terms."""
+
+import unittest
+
+from bio2bel_interpro.models import GoClosure
+from bio2bel_interpro.parser.go import get_go_ontology
+from tests.cases import TemporaryCacheClassMixin
+from tests.constants import TEST_GO_OBO_PATH
+
+
+class TestParser(unittest.TestCase):
+    """Test parsing the Gene Ontology from an OBO file."""
+
+    def test_ontology(self):
+        """Test that obsolete terms are left out and that part_of relationships are kept."""
+        terms, edges = get_go_ontology(TEST_GO_OBO_PATH)
+        self.assertNotIn('0000005', terms)
+        self.assertEqual(('transferase activity', 'molecular_function'), terms['0016740'])
+        self.assertIn(('0016757', '0016740'), edges)
+        self.assertIn(('0006213', '0008152'), edges)
+
+
+class TestGoHierarchy(TemporaryCacheClassMixin):
+    """Test looking up entries by GO terms and their descendants."""
+
+    @classmethod
+    def populate(cls):
+        """Populate the database with the GO hierarchy."""
+        super().populate()
+        cls.manager.populate_go_hierarchy(TEST_GO_OBO_PATH)
+
+    def test_closure(self):
+        """Test that the mapped terms got their namespaces and ancestors, and that the distances are the shortest."""
+        self.assertEqual('molecular_function', self.manager.get_go_by_go_identifier('0016763').namespace)
+        self.assertIsNotNone(self.manager.get_go_by_go_identifier('0003674'))
+
+        closure = GoClosure.__table__
+        ancestor = self.manager.get_go_by_go_identifier('0008152')
+        descendant = self.manager.get_go_by_go_identifier('0006213')
+        distance = self.manager.session.query(GoClosure.distance).filter(
+            closure.c.ancestor_id == ancestor.id,
+            closure.c.descendant_id == descendant.id,
+        ).scalar()
+        self.assertEqual(1, distance)
+
+        self.assertEqual(self.manager.count_go_terms(), self.manager.summarize()['go_terms'])
+
+        count = self.manager.count_go_closure()
+        self.assertEqual(count, self.manager.populate_go_hierarchy(TEST_GO_OBO_PATH))
+        self.assertEqual(count, self.manager.count_go_closure())
+
+    def test_entries(self):
+        """Test looking up the entries mapped to GO terms or their descendants."""
+        rv = self.manager.get_entries_for_go_terms(['GO:0016740', '0008152', 'GO:0005575'])
+        self.assertEqual({'GO:0016740', '0008152'}, set(rv))
+        self.assertEqual(['IPR013465', 'IPR013466'], [entry.interpro_id for entry in rv['GO:0016740']])
+        self.assertEqual(['IPR013465'], [entry.interpro_id for entry in rv['0008152']])
+
+        self.assertEqual({}, self.manager.get_entries_for_go_terms(['GO:0016740'], include_descendants=False))
+        rv = self.manager.get_entries_for_go_terms(['0016763'], include_descendants=False)
+        self.assertEqual(['IPR013466'], [entry.interpro_id for entry in rv['0016763']])
+
+    def test_entries_budget(self):
+        """Test that checking for the GO hierarchy doesn't count all of the pairs in its closure."""
+        with self.manager.profile(explain=False) as report:
+            self.manager.get_entries_for_go_terms(['GO:0016740'])
+            self.manager.get_go_entry_index(use_roaring=False)
+        self.assertNotIn('_count_model', report.callers, msg=str(report))
+
+    def test_index(self):
+        """Test the bitmaps of the entries for each GO term."""
+        index = self.manager.get_go_entry_index(use_roaring=False)
+        self.assertEqual(['IPR013465', 'IPR013466'], sorted(index.get_interpro_ids(index.get('0003824'))))
+        self.assertEqual(['IPR013465'], index.get_labels(index.get('0008150')))
+        self.assertEqual(0, len(index.get('0005575')))
+
+    def test_bel(self):
+        """Test that the mappings to GO terms are associations in BEL, with activities for molecular functions."""
+        graph = self.manager.to_bel()
+        statements = {
+            graph.edge_to_bel(u, v, data)
+            for u, v, data in graph.edges(data=True)
+            if data['relation'] == 'association'
+        }
+        self.assertIn(
+            'p(interpro:"Thymidine phosphorylase") association bp(go:"pyrimidine nucleoside metabolic process")',
+            statements,
+        )
+        self.assertIn(
+            'p(interpro:"Thymidine phosphorylase/AMP phosphorylase") association '
+            'act(p(interpro:"Thymidine phosphorylase/AMP phosphorylase"), '
+            'ma(go:"transferase activity, transferring pentosyl groups"))',
+            statements,
+        )
+
+        term = self.manager.get_go_by_go_identifier('0006213')
+        self.assertEqual('bp(go:"pyrimidine nucleoside metabolic process")', term.as_bel().as_bel())
+
+        term = self.manager.get_go_by_go_identifier('0016763')
+        with self.assertRaises(ValueError):
+            term.as_bel()
+
+    def test_cli(self):
+        """Test loading the GO hierarchy from the command line."""
+        from click.testing import CliRunner
+
+        result = CliRunner().invoke(self.manager.get_cli(), ['-c', self.connection, 'load-go', TEST_GO_OBO_PATH])
+        self.assertEqual(0, result.exit_code, msg=result.output)
+        self.assertIn(f'{self.manager.count_go_closure()} pairs', result.output)
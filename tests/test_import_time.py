@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the import-time budget of Bio2BEL InterPro."""
+
+import subprocess
+import sys
+import unittest
+from typing import Iterable, List, Mapping, Tuple
+
+#: Budget in microseconds for the cumulative time of ``import bio2bel_interpro``
+PACKAGE_IMPORT_BUDGET = 100_000
+
+#: Budget in microseconds for the cumulative time of the imports needed to run ``--help`` on the CLI
+CLI_IMPORT_BUDGET = 2_000_000
+
+#: Modules that should not be imported by ``import bio2bel_interpro``
+HEAVY_MODULES = ['bio2bel', 'compath_utils', 'networkx', 'pandas', 'pybel', 'sqlalchemy', 'tqdm']
+
+
+def _get_import_times(*args: str) -> List[Tuple[str, int, bool]]:
+    """Run Python with ``-X importtime`` and return triples of module name, cumulative microseconds, and top-level."""
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', *args],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    return list(_iterate_import_times(proc.stderr.splitlines()))
+
+
+def _iterate_import_times(lines: Iterable[str]) -> Iterable[Tuple[str, int, bool]]:
+    for line in lines:
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        yield name.strip(), int(cumulative), not name.startswith('  ')
+
+
+def _get_cumulative(import_times: List[Tuple[str, int, bool]]) -> Mapping[str, int]:
+    return {name: cumulative for name, cumulative, _ in import_times}
+
+
+def _get_total(import_times: List[Tuple[str, int, bool]]) -> int:
+    return sum(cumulative for _, cumulative, top_level in import_times if top_level)
+
+
+class TestImportTime(unittest.TestCase):
+    """Test that the heavy dependencies are only loaded by the code paths that need them."""
+
+    def test_package_import(self):
+        """Test that importing the package doesn't load the manager or its dependencies."""
+        import_times = _get_cumulative(_get_import_times('-c', 'import bio2bel_interpro'))
+
+        for module in HEAVY_MODULES:
+            self.assertNotIn(module, import_times)
+        self.assertNotIn('bio2bel_interpro.manager', import_times)
+
+        self.assertLess(import_times['bio2bel_interpro'], PACKAGE_IMPORT_BUDGET)
+
+    def test_cli_help(self):
+        """Test that showing the CLI help doesn't load the parsers."""
+        import_times = _get_import_times('-m', 'bio2bel_interpro', '--help')
+        cumulative = _get_cumulative(import_times)
+
+        self.assertIn('bio2bel_interpro.manager', cumulative)
+        self.assertNotIn('bio2bel_interpro.parser', cumulative)
+
+        self.assertLess(_get_total(import_times), CLI_IMPORT_BUDGET)
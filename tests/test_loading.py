@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the presets for loading models with their relationships."""
+
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import Query
+
+from bio2bel_interpro import Manager
+from bio2bel_interpro.loading import get_loading_options
+from tests.cases import TemporaryCacheClassMixin
+
+
+class TestLoading(TemporaryCacheClassMixin):
+    """Test loading relationships up front with presets, and strict mode."""
+
+    def setUp(self):
+        """Make a manager in strict mode with its own session on the test database."""
+        self.strict_manager = Manager(connection=self.connection, strict_loading=True)
+
+    def tearDown(self):
+        """Close the strict manager's session."""
+        self.strict_manager.session.close()
+
+    def test_invalid_preset(self):
+        """Test that presets have to exist and match the model that's looked up."""
+        with self.assertRaises(ValueError):
+            get_loading_options('nope')
+
+        with self.assertRaises(ValueError):
+            self.manager.get_interpro_by_interpro_id('IPR013465', load='protein')
+
+    def test_dynamic_annotations(self):
+        """Test the annotations of an entry are a query rather than a list."""
+        entry = self.manager.get_interpro_by_interpro_id('IPR004839')
+        self.assertIsInstance(entry.annotations, Query)
+        self.assertEqual(['A0A000'], [annotation.protein.uniprot_id for annotation in entry.annotations])
+
+    def test_entry_preset(self):
+        """Test the entry preset loads the hierarchy and GO terms up front."""
+        with self.strict_manager.profile(explain=False) as report:
+            entries = self.strict_manager.get_interpros_by_ids(['IPR013465', 'IPR018090'], load='entry')
+            entry = entries['IPR018090']
+            self.assertEqual('IPR000053', entry.parent.interpro_id)
+            self.assertEqual(['IPR013465'], [child.interpro_id for child in entry.children])
+            self.assertEqual('Family', entry.type.name)
+            self.assertEqual(
+                ['0006213', '0009032'],
+                sorted(go_term.go_id for go_term in entries['IPR013465'].go_terms),
+            )
+
+        self.assertEqual(3, report.count, msg=str(report))
+
+        # The relationships of the parents weren't loaded up front
+        with self.assertRaises(InvalidRequestError):
+            entry.parent.children
+
+    def test_protein_preset(self):
+        """Test the protein preset loads the annotations and their entries up front."""
+        with self.strict_manager.profile(explain=False) as report:
+            protein = self.strict_manager.get_protein_by_uniprot_id('A0A001', load='protein')
+            self.assertEqual('IPR011527~IPR003439~IPR003593', protein.architecture.architecture)
+            interpro_ids = {annotation.entry.interpro_id for annotation in protein.annotations}
+            self.assertIn('IPR003439', interpro_ids)
+            self.assertTrue(all(annotation.protein is protein for annotation in protein.annotations))
+
+        self.assertEqual(2, report.count, msg=str(report))
+
+    def test_strict(self):
+        """Test that lazy loads raise errors in strict mode, but not by default."""
+        entry = self.strict_manager.get_interpro_by_interpro_id('IPR013465')
+        with self.assertRaises(InvalidRequestError):
+            entry.go_terms
+
+        protein = self.strict_manager.get_proteins_by_uniprot_ids(['A0A000'])['A0A000'][0]
+        with self.assertRaises(InvalidRequestError):
+            protein.annotations
+
+        entry = self.manager.get_interpro_by_interpro_id('IPR013465')
+        self.assertEqual(2, len(entry.go_terms))
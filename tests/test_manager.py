@@ -7,15 +7,16 @@ This file does NOT test the existence of the InterPro hierarchy.
 
 import unittest
 
+from bio2bel_interpro.models import EntryStats
 from pybel import BELGraph
 from pybel.constants import IS_A, RELATION
 from pybel.dsl import protein
 from tests.cases import TemporaryCacheClassMixin
 
 mapk1_hgnc = protein(namespace='hgnc', name='MAPK1', identifier='6871')
-mapk1_uniprot = protein(namespace='uniprot', name='MK01_HUMAN', identifier='P28482')
+a0a000_uniprot = protein(namespace='uniprot', identifier='A0A000')
 
-interpro_identifiers = [
+mapk1_interpro_identifiers = [
     'IPR011009',  # . Kinase-like_dom.
     'IPR003527',  # . MAP_kinase_CS.
     'IPR008349',  # . MAPK_ERK1/2.
@@ -24,12 +25,21 @@ interpro_identifiers = [
     'IPR008271',  # . Ser/Thr_kinase_AS.
 ]
 
-interpro_family_nodes = [
+mapk1_interpro_family_nodes = [
     protein(
         namespace='interpro',
         identifier=identifier,
     )
-    for identifier in interpro_identifiers
+    for identifier in mapk1_interpro_identifiers
+]
+
+a0a000_interpro_identifiers = [
+    'IPR004839',  # . Aminotransferase, class I/classII
+    'IPR010961',  # . Tetrapyrrole biosynthesis, 5-aminolevulinic acid synthase
+    'IPR015421',  # . Pyridoxal phosphate-dependent transferase, major domain
+    'IPR015422',  # . Pyridoxal phosphate-dependent transferase domain 1
+    'IPR015424',  # . Pyridoxal phosphate-dependent transferase
+    'IPR013466',  # . Thymidine phosphorylase/AMP phosphorylase
 ]
 
 
@@ -48,25 +58,95 @@ class TestManager(TemporaryCacheClassMixin):
         self.assertEqual(len(result.children), 1)
         self.assertIn(child, result.children)
 
-    @unittest.skip
+    def test_get_interpros_by_ids(self):
+        """Test getting several InterPro entries at once."""
+        result = self.manager.get_interpros_by_ids(['IPR000011', 'IPR018075', 'IPR999999'])
+        self.assertEqual({'IPR000011', 'IPR018075'}, set(result))
+        self.assertEqual('Ubiquitin-activating enzyme E1', result['IPR018075'].name)
+
+    def test_get_proteins_by_uniprot_ids(self):
+        """Test getting several proteins at once."""
+        result = self.manager.get_proteins_by_uniprot_ids(['A0A000', 'A0A001', 'P28482'])
+        self.assertEqual({'A0A000', 'A0A001'}, set(result))
+        self.assertEqual(1, len(result['A0A000']))
+
+    def test_get_entries_for_proteins(self):
+        """Test getting the InterPro entries for several proteins at once."""
+        result = self.manager.get_entries_for_proteins(['A0A000', 'A0A001'])
+        self.assertEqual(
+            {'IPR004839', 'IPR010961', 'IPR015421', 'IPR015422', 'IPR015424', 'IPR013466'},
+            {entry.interpro_id for entry in result['A0A000']},
+        )
+        self.assertEqual(6, len(result['A0A000']), msg='duplicate annotations should be collapsed')
+        self.assertEqual(7, len(result['A0A001']))
+
+    def test_get_proteins_for_entries(self):
+        """Test getting the proteins for several InterPro entries at once."""
+        result = self.manager.get_proteins_for_entries(['IPR000053', 'IPR013465', 'IPR003439'])
+        self.assertNotIn('IPR000053', result)
+        self.assertEqual(['A0A001'], [protein.uniprot_id for protein in result['IPR013465']])
+        self.assertEqual(['A0A001'], [protein.uniprot_id for protein in result['IPR003439']])
+
+    def test_get_proteins_for_entries_with_descendants(self):
+        """Test getting the proteins for several InterPro entries and their descendants at once."""
+        result = self.manager.get_proteins_for_entries(['IPR000053', 'IPR018090'], include_descendants=True)
+        self.assertEqual({'A0A000', 'A0A001'}, {protein.uniprot_id for protein in result['IPR000053']})
+        self.assertEqual(['A0A001'], [protein.uniprot_id for protein in result['IPR018090']])
+
+    def test_entry_stats(self):
+        """Test the precomputed entry-level aggregates."""
+        stats = self.manager.get_entry_stats('IPR013465')
+        self.assertIsNotNone(stats)
+        self.assertEqual(1, stats.protein_count)
+        self.assertEqual(1, stats.annotation_count)
+        self.assertEqual(1, stats.descendant_protein_count)
+        self.assertEqual(2, stats.go_term_count)
+
+        stats = self.manager.get_entry_stats('IPR015422')
+        self.assertEqual(1, stats.protein_count)
+        self.assertEqual(2, stats.annotation_count)
+
+    def test_entry_stats_descendants(self):
+        """Test the precomputed entry-level aggregates include the proteins of descendants."""
+        result = self.manager.get_entry_stats_by_ids(['IPR000053', 'IPR018090', 'IPR999999'])
+        self.assertEqual({'IPR000053', 'IPR018090'}, set(result))
+        self.assertEqual(0, result['IPR000053'].protein_count)
+        self.assertEqual(2, result['IPR000053'].descendant_protein_count)
+        self.assertEqual(1, result['IPR018090'].descendant_protein_count)
+
+    def test_refresh_stats_incrementally(self):
+        """Test refreshing the aggregates of a single entry and its ancestors."""
+        self.manager.refresh_stats(['IPR013465'])
+        self.assertEqual(2, self.manager.get_entry_stats('IPR000053').descendant_protein_count)
+        self.assertEqual(44, len(self.manager.session.query(EntryStats).all()))
+
+    def test_refresh_stats_budget(self):
+        """Test that the proteins of all subtrees are counted with one query, rather than one for each parent."""
+        with self.manager.profile(explain=False) as report:
+            self.manager.refresh_stats()
+        self.assertEqual(1, report.callers['_count_descendant_proteins'].count, msg=str(report))
+        self.assertEqual(2, self.manager.get_entry_stats('IPR000053').descendant_protein_count)
+
     def test_enrich_uniprot(self):
         """Test enriching UniProt entries."""
         graph = BELGraph()
-        graph.add_node_from_data(mapk1_uniprot)
+        graph.add_node_from_data(a0a000_uniprot)
 
         self.assertEqual(1, graph.number_of_nodes())
         self.assertEqual(0, graph.number_of_edges())
 
-        self.manager.enrich_proteins(graph)
+        self.assertEqual(len(a0a000_interpro_identifiers), self.manager.enrich_proteins(graph))
 
-        for interpro_family_node in interpro_family_nodes:
+        for interpro_id in a0a000_interpro_identifiers:
+            entry = self.manager.get_interpro_by_interpro_id(interpro_id)
+            interpro_family_node = protein(namespace='interpro', name=entry.name, identifier=interpro_id)
             self.assertIn(interpro_family_node, graph)
-            self.assertIn(interpro_family_node, graph[mapk1_uniprot])
-            v = list(graph[mapk1_uniprot][interpro_family_node].values())[0]
+            self.assertIn(interpro_family_node, graph[a0a000_uniprot])
+            v = list(graph[a0a000_uniprot][interpro_family_node].values())[0]
             self.assertIn(RELATION, v)
             self.assertEqual(IS_A, v[RELATION])
 
-    @unittest.skip
+    @unittest.skip('HGNC proteins are not mapped to UniProt, and MAPK1 is not in the test data')
     def test_enrich_hgnc(self):
         """Test that the enrich_proteins function gets the interpro entries in the graph."""
         graph = BELGraph()
@@ -77,7 +157,7 @@ class TestManager(TemporaryCacheClassMixin):
 
         self.manager.enrich_proteins(graph)
 
-        for interpro_family_node in interpro_family_nodes:
+        for interpro_family_node in mapk1_interpro_family_nodes:
             self.assertIn(interpro_family_node, graph)
             self.assertIn(interpro_family_node, graph[mapk1_hgnc])
             v = list(graph[mapk1_hgnc][interpro_family_node].values())[0]
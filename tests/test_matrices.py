@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the sparse protein × entry matrices."""
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from bio2bel_interpro.matrices import iterate_annotation_blocks, load_incidence_matrix, stack_blocks
+from tests.cases import TemporaryCacheClassMixin
+
+
+class TestBlocks(unittest.TestCase):
+    """Test building matrices from chunks of annotations."""
+
+    def test_chunk_boundaries(self):
+        """Test that proteins split across chunks end up in a single row."""
+        annotations = np.array([
+            # protein, entry, start, end
+            [10, 1, 1, 10],
+            [10, 2, 1, 10],
+            [10, 2, 5, 20],
+            [12, 1, 1, 5],
+            [13, 2, 1, 5],
+            [13, 1, 3, 4],
+        ])
+        protein_ids = np.array([10, 11, 12, 13])
+        entry_ids = np.array([1, 2])
+
+        for chunksize in (1, 2, 4, 6):
+            chunks = [annotations[i:i + chunksize] for i in range(0, len(annotations), chunksize)]
+            blocks = iterate_annotation_blocks(chunks, protein_ids, entry_ids, values='coverage')
+            matrix = stack_blocks(blocks, shape=(4, 2)).toarray()
+            np.testing.assert_array_equal([[10, 20], [0, 0], [5, 0], [2, 5]], matrix)
+
+
+class TestMatrices(TemporaryCacheClassMixin):
+    """Test building and exporting the protein × entry matrix from the database."""
+
+    def test_counts(self):
+        """Test a matrix with the number of annotations."""
+        incidence = self.manager.get_protein_entry_matrix(values='count')
+        self.assertEqual(17, incidence.matrix.sum())
+
+        row = incidence.row_index['A0A000']
+        self.assertEqual(2, incidence.matrix[row, incidence.column_index['IPR015422']])
+
+    def test_coverage(self):
+        """Test a matrix with the number of covered residues."""
+        incidence = self.manager.get_protein_entry_matrix(values='coverage')
+        a0a000, a0a001 = incidence.row_index['A0A000'], incidence.row_index['A0A001']
+        self.assertEqual(130, incidence.matrix[a0a000, incidence.column_index['IPR015422']])
+        self.assertEqual(230, incidence.matrix[a0a001, incidence.column_index['IPR003439']])
+        self.assertEqual(273, incidence.matrix[a0a001, incidence.column_index['IPR011527']])
+
+    def test_coverage_propagated(self):
+        """Test a matrix with the number of covered residues, propagated up the hierarchy."""
+        incidence = self.manager.get_protein_entry_matrix(values='coverage', propagate=True)
+        a0a001 = incidence.row_index['A0A001']
+        self.assertEqual(434, incidence.matrix[a0a001, incidence.column_index['IPR000053']])
+
+    def test_export(self):
+        """Test exporting the matrix and loading it back with memory mapping."""
+        expected = self.manager.get_protein_entry_matrix(values='count')
+
+        with tempfile.TemporaryDirectory() as directory:
+            self.manager.export_protein_entry_matrix(directory, values='count')
+            self.assertEqual(
+                {'data.npy', 'indices.npy', 'indptr.npy', 'labels.npz'},
+                set(os.listdir(directory)),
+            )
+
+            incidence = load_incidence_matrix(directory)
+            for array in (incidence.matrix.data, incidence.matrix.indices, incidence.matrix.indptr):
+                self.assertFalse(array.flags.owndata, msg='arrays should be memory mapped, not copied')
+            self.assertEqual(expected.shape, incidence.shape)
+            self.assertEqual(list(expected.row_labels), list(incidence.row_labels))
+            self.assertEqual(list(expected.column_labels), list(incidence.column_labels))
+            self.assertEqual(0, (expected.matrix != incidence.matrix).nnz)
+            del incidence
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the precomputed transitive memberships of proteins in InterPro entries."""
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from bio2bel_interpro.memberships import MembershipIndex, make_bitmap
+from bio2bel_interpro.models import Annotation, Membership
+from tests.cases import TemporaryCacheClassMixin
+
+
+class TestMembershipIndex(unittest.TestCase):
+    """Test set operations on bitmaps without a database."""
+
+    def setUp(self):
+        """Build a small index."""
+        self.index = MembershipIndex.from_pairs(
+            [('A', 1), ('A', 2), ('A', 3), ('B', 2), ('B', 4), ('C', 3)],
+            labels=np.array(['', 'P1', 'P2', 'P3', 'P4']),
+            use_roaring=False,
+        )
+
+    def test_operations(self):
+        """Test union, intersection, difference, and selecting cohorts."""
+        self.assertEqual([1, 2, 3, 4], self.index.union('A', 'B').tolist())
+        self.assertEqual([2], self.index.intersection('A', 'B').tolist())
+        self.assertEqual([1], self.index.difference('A', 'B', 'C').tolist())
+        self.assertEqual([], self.index.union('X').tolist())
+        self.assertEqual(
+            ['P1', 'P2'],
+            self.index.get_uniprot_ids(self.index.select(include=['A', 'B'], require=['A'], exclude=['C'])),
+        )
+
+    def test_save(self):
+        """Test saving and loading the bitmaps."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'memberships.npz')
+            self.index.save(path)
+            index = MembershipIndex.load(path)
+
+        self.assertEqual(set(self.index.bitmaps), set(index.bitmaps))
+        self.assertEqual([2, 4], list(index.get('B')))
+        self.assertEqual(['P2', 'P4'], index.get_uniprot_ids(index.get('B')))
+
+    def test_roaring(self):
+        """Test making Roaring bitmaps if pyroaring is installed."""
+        try:
+            import pyroaring  # noqa: F401
+        except ImportError:
+            with self.assertRaises(ImportError):
+                make_bitmap([1], use_roaring=True)
+        else:
+            self.assertEqual([1, 2], list(make_bitmap([2, 1, 2], use_roaring=True)))
+
+
+class TestMemberships(TemporaryCacheClassMixin):
+    """Test building the memberships after loading the proteins."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Populate the database and build the memberships."""
+        super().setUpClass()
+        cls.count = cls.manager.build_memberships()
+
+    def test_build(self):
+        """Test the memberships include the annotated entries and all of their ancestors."""
+        self.assertEqual(self.count, self.manager.count_memberships())
+
+        direct = {
+            (annotation.entry.interpro_id, annotation.protein.uniprot_id)
+            for annotation in self.manager._list_model(Annotation)
+        }
+        memberships = {
+            (membership.entry.interpro_id, membership.protein.uniprot_id): membership.distance
+            for membership in self.manager._list_model(Membership)
+        }
+        self.assertTrue(direct.issubset(memberships))
+        self.assertTrue(all(memberships[pair] == 0 for pair in direct))
+        self.assertLess(0, max(memberships.values()))
+
+        expected = set()
+        for interpro_id, uniprot_id in direct:
+            entry = self.manager.get_interpro_by_interpro_id(interpro_id)
+            while entry is not None:
+                expected.add((entry.interpro_id, uniprot_id))
+                entry = entry.parent
+        self.assertEqual(expected, set(memberships))
+
+    def test_get_proteins_for_entries(self):
+        """Test the memberships give the same proteins as walking the hierarchy."""
+        interpro_ids = [entry.interpro_id for entry in self.manager.list_interpros()]
+        from_memberships = self.manager.get_proteins_for_entries(interpro_ids, include_descendants=True)
+        self.assertEqual(
+            {
+                interpro_id: sorted(protein.uniprot_id for protein in proteins)
+                for interpro_id, proteins in from_memberships.items()
+            },
+            {
+                interpro_id: sorted(uniprot_ids)
+                for interpro_id, uniprot_ids in self._walk(interpro_ids).items()
+            },
+        )
+
+    def test_get_proteins_for_entries_budget(self):
+        """Test that checking for the memberships doesn't count all of them."""
+        with self.manager.profile(explain=False) as report:
+            self.manager.get_proteins_for_entries(['IPR000053'], include_descendants=True)
+        self.assertEqual(2, report.count, msg=str(report))
+        self.assertNotIn('_count_model', report.callers)
+
+    def _walk(self, interpro_ids):
+        rv = {}
+        for interpro_id in interpro_ids:
+            stack = [self.manager.get_interpro_by_interpro_id(interpro_id)]
+            uniprot_ids = set()
+            while stack:
+                entry = stack.pop()
+                uniprot_ids.update(annotation.protein.uniprot_id for annotation in entry.annotations)
+                stack.extend(entry.children)
+            if uniprot_ids:
+                rv[interpro_id] = uniprot_ids
+        return rv
+
+    def test_index(self):
+        """Test loading the memberships as bitmaps."""
+        index = self.manager.get_membership_index(use_roaring=False)
+        for interpro_id in index.bitmaps:
+            self.assertEqual(
+                sorted(protein.uniprot_id for protein in self.manager.get_proteins_for_entries(
+                    [interpro_id],
+                    include_descendants=True,
+                )[interpro_id]),
+                index.get_uniprot_ids(index.get(interpro_id)),
+            )
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for generating the BEL namespace in bulk."""
+
+from io import StringIO
+
+from bel_resources import write_namespace
+
+from bio2bel_interpro.models import Entry
+from tests.cases import TemporaryCacheClassMixin
+
+
+class TestNamespace(TemporaryCacheClassMixin):
+    """Test uploading and writing the namespace."""
+
+    def test_upload(self):
+        """Test uploading the namespace, which is a no-op until the entries change."""
+        namespace = self.manager.upload_bel_namespace()
+        self.assertEqual(44, namespace.entries.count())
+        self.assertEqual(
+            sorted(self.manager._get_namespace_values()),
+            sorted((entry.identifier, entry.name) for entry in namespace.entries),
+        )
+
+        with self.manager.profile(explain=False) as report:
+            self.assertIs(namespace, self.manager.upload_bel_namespace())
+        self.assertEqual(2, report.count, msg=str(report))
+        self.assertEqual(2, report.get_count('upload_bel_namespace'))
+
+        entry = self.manager.get_interpro_by_interpro_id('IPR013465')
+        name = entry.name
+        entry.name = 'Renamed thymidine phosphorylase'
+        self.manager.session.commit()
+        try:
+            version = namespace.version
+            namespace = self.manager.upload_bel_namespace()
+            self.assertNotEqual(version, namespace.version)
+            self.manager.session.expire_all()
+            self.assertEqual(44, namespace.entries.count())
+            self.assertIn(
+                ('IPR013465', 'Renamed thymidine phosphorylase'),
+                {(entry.identifier, entry.name) for entry in namespace.entries},
+            )
+        finally:
+            entry.name = name
+            self.manager.session.commit()
+            self.manager.upload_bel_namespace()
+
+    def test_write(self):
+        """Test streaming the namespace file gives the same values as writing it with bel_resources."""
+        file = StringIO()
+        self.manager.write_bel_namespace(file)
+
+        expected = StringIO()
+        write_namespace(
+            values={entry.interpro_id: Entry.bel_encoding for entry in self.manager.list_interpros()},
+            namespace_name='InterPro',
+            namespace_keyword='interpro',
+            file=expected,
+        )
+
+        self.assertEqual(
+            expected.getvalue().split('[Values]')[1],
+            file.getvalue().split('[Values]')[1],
+        )
+        self.assertIn('Keyword=interpro', file.getvalue())
+
+        file = StringIO()
+        self.manager.write_bel_namespace(file, use_names=True)
+        self.assertIn('\nThymidine phosphorylase|P\n', file.getvalue())
@@ -19,3 +19,10 @@ class TestTreeParser(unittest.TestCase):
     def test_length(self):
         """Test the number of mappings."""
         self.assertEqual(3, len(self.interpro_go_mapping))
+
+    def test_names(self):
+        """Test the GO terms' names don't keep the prefix from the file."""
+        self.assertIn(
+            ('IPR013465', '0009032', 'thymidine phosphorylase activity'),
+            self.interpro_go_mapping,
+        )
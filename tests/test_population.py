@@ -2,7 +2,12 @@
 
 """Tests for population of the database."""
 
+import os
+import tempfile
+
+from bio2bel_interpro import Manager
 from tests.cases import TemporaryCacheClassMixin
+from tests.constants import TEST_ENTRIES_PATH, TEST_INTERPRO_GO_MAPPINGS_PATH, TEST_TREE_PATH
 
 
 class TestPopulation(TemporaryCacheClassMixin):
@@ -15,3 +20,30 @@ class TestPopulation(TemporaryCacheClassMixin):
     def test_proteins(self):
         """Count the number of proteins."""
         self.assertEqual(2, self.manager.count_proteins())
+
+    def test_summarize(self):
+        """Test the summary is read from the precomputed counts."""
+        self.assertEqual(
+            dict(interpros=44, annotations=17, proteins=2, go_terms=3),
+            self.manager.summarize(),
+        )
+
+    def test_populate_or_raise(self):
+        """Test that populating with errors raised doesn't hide a failed load."""
+        with tempfile.TemporaryDirectory() as directory:
+            manager = Manager(connection=f'sqlite:///{os.path.join(directory, "interpro.db")}')
+            manager.create_all()
+            kwargs = dict(
+                entries_url=TEST_ENTRIES_PATH,
+                tree_url=TEST_TREE_PATH,
+                go_mapping_path=TEST_INTERPRO_GO_MAPPINGS_PATH,
+                populate_proteins=True,
+                proteins_url=os.path.join(directory, 'missing.dat'),
+            )
+
+            manager.populate(**kwargs)  # the error is only recorded
+            with self.assertRaises(FileNotFoundError):
+                manager.populate_or_raise(**kwargs)
+
+            manager.session.close()
+            manager.engine.dispose()
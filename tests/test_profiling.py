@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for profiling the SQL statements a manager runs."""
+
+from tests.cases import TemporaryCacheClassMixin
+
+
+class TestProfiling(TemporaryCacheClassMixin):
+    """Test counting, timing, and attributing statements, and keeping statement budgets."""
+
+    def test_to_bel_budget(self):
+        """Test that converting to BEL runs a constant number of statements, rather than some for each entry."""
+        self.manager.to_bel()  # makes the namespace the first time
+
+        with self.manager.profile() as report:
+            graph = self.manager.to_bel()
+
+        self.assertLess(0, graph.number_of_edges())
+        self.assertLessEqual(report.count, 5, msg=str(report))
+        self.assertEqual(report.count, report.get_count('to_bel'))
+        self.assertIn('_get_default_namespace', report.callers)
+        self.assertIn('list_interpros', report.callers)
+
+    def test_lookup_budget(self):
+        """Test looking up entries by their identifiers runs one statement for each chunk of identifiers."""
+        interpro_ids = [entry.interpro_id for entry in self.manager.list_interpros()]
+
+        with self.manager.profile() as report:
+            self.manager.get_interpros_by_ids(interpro_ids)
+
+        self.assertEqual(1, report.count)
+        self.assertEqual(1, report.get_count('get_interpros_by_ids'))
+
+    def test_slowest(self):
+        """Test the slowest statements are kept with their parameters and query plans, and the report is summarized."""
+        with self.manager.profile(slowest=2) as report:
+            self.manager.get_interpro_by_interpro_id('IPR013465')
+            self.manager.get_interpro_by_name('Thymidine phosphorylase')
+            self.manager.count_proteins()
+
+        self.assertEqual(3, report.count)
+        slowest = report.get_slowest()
+        self.assertEqual(2, len(slowest))
+        self.assertGreaterEqual(slowest[0].duration, slowest[1].duration)
+        for record in slowest:
+            self.assertTrue(record.statement.lstrip().upper().startswith('SELECT'))
+            self.assertIsNotNone(record.plan)
+
+        summary = report.to_dict()
+        self.assertEqual(3, summary['count'])
+        self.assertEqual(
+            {'get_interpro_by_interpro_id', 'get_interpro_by_name', 'count_proteins'},
+            set(summary['operations']),
+        )
+        self.assertIn('3 statements', str(report))
+
+    def test_stops_listening(self):
+        """Test that statements after the block aren't counted."""
+        with self.manager.profile(explain=False) as report:
+            self.manager.count_interpros()
+        self.manager.count_interpros()
+
+        self.assertEqual(1, report.count)
@@ -0,0 +1,349 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for keeping several InterPro releases side by side."""
+
+import gzip
+import os
+import tempfile
+
+from bio2bel_interpro.models import Annotation, Entry, Membership
+from tests.cases import TemporaryCacheClassMixin
+from tests.constants import (
+    TEST_ENTRIES_PATH, TEST_INTERPRO_GO_MAPPINGS_PATH, TEST_INTERPRO_PROTEIN_MAPPINGS_PATH, TEST_TREE_PATH,
+)
+
+REMOVED_ENTRY = 'IPR013466'
+RENAMED_ENTRY = 'IPR000008'
+#: The entry and GO term of the mapping that's moved to the renamed entry in the second release
+MOVED_GO_MAPPING = 'IPR013465', 'GO:0006213'
+
+
+def _write_second_release(directory: str):
+    """Write the entries, protein mappings, and mappings to GO of a second release, which remove, rename, change, and
+    add some.
+    """
+    entries_path = os.path.join(directory, 'entry.list')
+    with open(TEST_ENTRIES_PATH) as file, open(entries_path, 'w') as out:
+        for line in file:
+            if line.startswith(REMOVED_ENTRY):
+                continue
+            if line.startswith(RENAMED_ENTRY):
+                line = line.replace('C2 domain', 'C2 domain, renamed')
+            out.write(line)
+
+    proteins_path = os.path.join(directory, 'protein2ipr.dat')
+    with gzip.open(TEST_INTERPRO_PROTEIN_MAPPINGS_PATH, 'rt') as file, open(proteins_path, 'w') as out:
+        for line in file:
+            if REMOVED_ENTRY in line:
+                continue
+            if line.startswith('A0A001\tIPR013465'):
+                line = line.replace('\t435', '\t436')
+            out.write(line)
+        out.write('A0A002\tIPR003439\tABC transporter-like\tPF00005\t10\t150\n')
+
+    go_mapping_path = os.path.join(directory, 'interpro2go')
+    with open(TEST_INTERPRO_GO_MAPPINGS_PATH) as file, open(go_mapping_path, 'w') as out:
+        for line in file:
+            if REMOVED_ENTRY in line:
+                continue
+            if line.startswith(f'InterPro:{MOVED_GO_MAPPING[0]}') and MOVED_GO_MAPPING[1] in line:
+                line = line.replace(MOVED_GO_MAPPING[0], RENAMED_ENTRY)
+            out.write(line)
+
+    return entries_path, proteins_path, go_mapping_path
+
+
+class TestReleases(TemporaryCacheClassMixin):
+    """Test loading a second release as differences from the first."""
+
+    @classmethod
+    def populate(cls):
+        """Populate the database with two releases of test data."""
+        cls.manager.populate(
+            entries_url=TEST_ENTRIES_PATH,
+            tree_url=TEST_TREE_PATH,
+            go_mapping_path=TEST_INTERPRO_GO_MAPPINGS_PATH,
+            proteins_url=TEST_INTERPRO_PROTEIN_MAPPINGS_PATH,
+            populate_proteins=True,
+            release='1',
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            entries_path, proteins_path, go_mapping_path = _write_second_release(directory)
+            cls.manager.populate(
+                entries_url=entries_path,
+                tree_url=TEST_TREE_PATH,
+                go_mapping_path=go_mapping_path,
+                proteins_url=proteins_path,
+                populate_proteins=True,
+                release='2',
+            )
+
+    def test_releases(self):
+        """Test the releases are listed in order, and that loading one again fails."""
+        self.assertEqual(['1', '2'], [release.name for release in self.manager.list_releases()])
+        with self.assertRaises(ValueError):
+            self.manager._add_release('2')
+        with self.assertRaises(ValueError):
+            self.manager.count_interpros(release='3')
+
+    def test_delta(self):
+        """Test that only the changed annotations were written."""
+        # The removed and the changed annotations were closed, and the changed and the added ones were inserted
+        self.assertEqual(19, self.manager.session.query(Annotation).count())
+        self.assertEqual(17, self.manager.count_annotations(release='1'))
+        self.assertEqual(17, self.manager.count_annotations())
+        self.assertEqual(3, self.manager.count_proteins())
+
+        release_id = self.manager.get_release_by_name('2').id
+        query = self.manager.session.query(Annotation)
+        self.assertEqual(2, query.filter(Annotation.valid_from_id == release_id).count())
+        self.assertEqual(2, query.filter(Annotation.valid_to_id == release_id).count())
+
+    def test_entries(self):
+        """Test looking up entries in each release."""
+        self.assertEqual(44, self.manager.count_interpros(release='1'))
+        self.assertEqual(43, self.manager.count_interpros())
+        self.assertEqual(44, self.manager.session.query(Entry).count())
+
+        self.assertIsNotNone(self.manager.get_interpro_by_interpro_id(REMOVED_ENTRY, release='1'))
+        self.assertIsNone(self.manager.get_interpro_by_interpro_id(REMOVED_ENTRY))
+        self.assertEqual('C2 domain, renamed', self.manager.get_interpro_by_interpro_id(RENAMED_ENTRY).name)
+        with self.assertRaises(ValueError):
+            self.manager.get_interpro_by_interpro_id(RENAMED_ENTRY, release='1')
+        with self.assertRaises(ValueError):
+            self.manager.list_interpros(release='1')
+
+    def test_stats(self):
+        """Test that only the aggregates of the entries that the second release changed were refreshed."""
+        changed = self.manager.session.query(Entry.interpro_id).filter(Entry.id.in_(self.manager._changed_entry_ids))
+        self.assertEqual(
+            {REMOVED_ENTRY, MOVED_GO_MAPPING[0], RENAMED_ENTRY, 'IPR003439'},
+            {interpro_id for interpro_id, in changed},
+        )
+        self.assertEqual(0, self.manager.get_entry_stats(REMOVED_ENTRY).annotation_count)
+        self.assertEqual(1, self.manager.get_entry_stats(RENAMED_ENTRY).go_term_count)
+        self.assertEqual(17, self.manager.summarize()['annotations'])
+
+    def test_go_mappings(self):
+        """Test looking up the mappings to GO in each release."""
+        interpro_id, go_id = MOVED_GO_MAPPING
+
+        old = self.manager.get_entries_for_go_terms([go_id], include_descendants=False, release='1')
+        self.assertEqual([interpro_id], [entry.interpro_id for entry in old[go_id]])
+
+        new = self.manager.get_entries_for_go_terms([go_id], include_descendants=False)
+        self.assertEqual([RENAMED_ENTRY], [entry.interpro_id for entry in new[go_id]])
+        self.assertEqual({go_id[len('GO:'):]}, {go_term.go_id for go_term in new[go_id][0].go_terms})
+
+        catalog = self.manager.get_entry_catalog()
+        self.assertNotIn(go_id[len('GO:'):], {go for go, _ in catalog.get_go_terms(interpro_id)})
+
+    def test_lookups(self):
+        """Test that the lookups, the namespace, the catalog, and the summary default to the latest release."""
+        removed = self.manager.get_interpro_by_interpro_id(REMOVED_ENTRY, release='1')
+        self.assertIsNotNone(self.manager.get_interpro_by_name(removed.name, release='1'))
+        self.assertIsNone(self.manager.get_interpro_by_name(removed.name))
+
+        self.assertNotIn(REMOVED_ENTRY, {interpro_id for interpro_id, _ in self.manager._get_namespace_values()})
+        self.assertNotIn(REMOVED_ENTRY, self.manager.get_entry_catalog())
+        # The renamed entry can't be shown with the name it had in the first release
+        with self.assertRaises(ValueError):
+            self.manager.get_entry_catalog(release='1')
+        self.assertNotIn(removed, self.manager.search_entries(removed.name))
+
+        self.assertEqual(44, self.manager.summarize(release='1')['interpros'])
+        self.assertEqual(43, self.manager.summarize()['interpros'])
+
+    def test_proteins(self):
+        """Test looking up the annotations of proteins in each release."""
+        old = self.manager.get_entries_for_proteins(['A0A000', 'A0A002'], release='1')
+        self.assertEqual({'A0A000'}, set(old))
+        self.assertIn(REMOVED_ENTRY, {entry.interpro_id for entry in old['A0A000']})
+
+        new = self.manager.get_entries_for_proteins(['A0A000', 'A0A002'])
+        self.assertEqual({'A0A000', 'A0A002'}, set(new))
+        self.assertNotIn(REMOVED_ENTRY, {entry.interpro_id for entry in new['A0A000']})
+
+        self.assertIn(REMOVED_ENTRY, self.manager.get_proteins_for_entries([REMOVED_ENTRY], release='1'))
+        self.assertEqual({}, dict(self.manager.get_proteins_for_entries([REMOVED_ENTRY])))
+
+
+class TestFailedRelease(TemporaryCacheClassMixin):
+    """Test that a release that fails to load is removed again, so that it can be loaded later."""
+
+    @classmethod
+    def populate(cls):
+        """Populate the database with the first release of test data."""
+        cls.manager.populate(
+            entries_url=TEST_ENTRIES_PATH,
+            tree_url=TEST_TREE_PATH,
+            go_mapping_path=TEST_INTERPRO_GO_MAPPINGS_PATH,
+            proteins_url=TEST_INTERPRO_PROTEIN_MAPPINGS_PATH,
+            populate_proteins=True,
+            release='1',
+        )
+
+    def test_loaded_release(self):
+        """Test that loading a release again is only recorded as a failure by populate, and otherwise raises."""
+        releases = [release.name for release in self.manager.list_releases()]
+        self.manager.populate(entries_url=TEST_ENTRIES_PATH, tree_url=TEST_TREE_PATH, release='1')
+        self.assertEqual(releases, [release.name for release in self.manager.list_releases()])
+        self.assertEqual(17, self.manager.count_annotations(release='1'))
+
+        with self.assertRaises(ValueError):
+            self.manager.populate_or_raise(entries_url=TEST_ENTRIES_PATH, tree_url=TEST_TREE_PATH, release='1')
+
+    def test_failed_release(self):
+        """Test that a release whose proteins fail to load is discarded, and that it can be loaded again."""
+        interpro_id, go_id = MOVED_GO_MAPPING
+
+        with tempfile.TemporaryDirectory() as directory:
+            entries_path, proteins_path, go_mapping_path = _write_second_release(directory)
+            self.manager.populate(
+                entries_url=entries_path,
+                tree_url=TEST_TREE_PATH,
+                go_mapping_path=go_mapping_path,
+                proteins_url=os.path.join(directory, 'missing.dat'),
+                populate_proteins=True,
+                release='2',
+            )
+
+            self.assertEqual(['1'], [release.name for release in self.manager.list_releases()])
+            self.assertEqual(44, self.manager.count_interpros())
+            self.assertEqual(17, self.manager.count_annotations())
+            self.assertEqual('C2 domain', self.manager.get_interpro_by_interpro_id(RENAMED_ENTRY, release='1').name)
+            self.assertIsNotNone(self.manager.get_interpro_by_interpro_id(REMOVED_ENTRY))
+            entries = self.manager.get_entries_for_go_terms([go_id], include_descendants=False)
+            self.assertEqual([interpro_id], [entry.interpro_id for entry in entries[go_id]])
+
+            self.manager.populate_or_raise(
+                entries_url=entries_path,
+                tree_url=TEST_TREE_PATH,
+                go_mapping_path=go_mapping_path,
+                proteins_url=proteins_path,
+                populate_proteins=True,
+                release='2',
+            )
+
+        self.assertEqual(['1', '2'], [release.name for release in self.manager.list_releases()])
+        self.assertEqual(43, self.manager.count_interpros())
+        self.assertEqual(17, self.manager.count_annotations(release='1'))
+        self.assertEqual('C2 domain, renamed', self.manager.get_interpro_by_interpro_id(RENAMED_ENTRY).name)
+
+
+class TestEntriesOnlyRelease(TemporaryCacheClassMixin):
+    """Test loading a release that only has entries, which removes an entry that has annotations."""
+
+    @classmethod
+    def populate(cls):
+        """Populate the database with the test data, then the entries of a second release."""
+        cls.manager.populate(
+            entries_url=TEST_ENTRIES_PATH,
+            tree_url=TEST_TREE_PATH,
+            go_mapping_path=TEST_INTERPRO_GO_MAPPINGS_PATH,
+            proteins_url=TEST_INTERPRO_PROTEIN_MAPPINGS_PATH,
+            populate_proteins=True,
+            release='1',
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            entries_path, _, _ = _write_second_release(directory)
+            cls.manager.populate(
+                entries_url=entries_path,
+                tree_url=TEST_TREE_PATH,
+                go_mapping_path=TEST_INTERPRO_GO_MAPPINGS_PATH,
+                release='2',
+            )
+
+    def test_annotations(self):
+        """Test that the annotations of the removed entry were closed with it."""
+        self.assertEqual(17, self.manager.count_annotations(release='1'))
+        self.assertEqual(16, self.manager.count_annotations())
+        self.assertEqual(16, self.manager.summarize()['annotations'])
+
+    def test_to_bel(self):
+        """Test converting to BEL only uses the annotations of the entries in the latest release."""
+        graph = self.manager.to_bel()
+        self.assertNotIn(REMOVED_ENTRY, {node.get('identifier') for node in graph})
+
+
+class TestShardedRelease(TemporaryCacheClassMixin):
+    """Test loading the proteins in shards after an entry was removed in a later release."""
+
+    @classmethod
+    def populate(cls):
+        """Populate the database with the entries of two releases, then the proteins in shards."""
+        cls.manager.populate(
+            entries_url=TEST_ENTRIES_PATH,
+            tree_url=TEST_TREE_PATH,
+            go_mapping_path=TEST_INTERPRO_GO_MAPPINGS_PATH,
+            release='1',
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            entries_path, _, go_mapping_path = _write_second_release(directory)
+            cls.manager.populate(
+                entries_url=entries_path,
+                tree_url=TEST_TREE_PATH,
+                go_mapping_path=go_mapping_path,
+                release='2',
+            )
+        cls.manager._populate_proteins(url=TEST_INTERPRO_PROTEIN_MAPPINGS_PATH, chunksize=3, n_shards=2)
+
+    def test_removed_entry(self):
+        """Test that no annotations were mapped onto the removed entry."""
+        removed = self.manager.session.query(Entry).filter(Entry.interpro_id == REMOVED_ENTRY).one()
+        self.assertEqual(0, self.manager.session.query(Annotation).filter(Annotation.entry_id == removed.id).count())
+        self.assertEqual(16, self.manager.count_annotations())
+
+
+class TestMembershipsRelease(TemporaryCacheClassMixin):
+    """Test that the memberships follow the hierarchy when a later release only changes the entries."""
+
+    @classmethod
+    def populate(cls):
+        """Populate the database with the proteins and memberships, then a release that moves an entry."""
+        cls.manager.populate(
+            entries_url=TEST_ENTRIES_PATH,
+            tree_url=TEST_TREE_PATH,
+            go_mapping_path=TEST_INTERPRO_GO_MAPPINGS_PATH,
+            proteins_url=TEST_INTERPRO_PROTEIN_MAPPINGS_PATH,
+            populate_proteins=True,
+            build_memberships=True,
+            release='1',
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            tree_path = os.path.join(directory, 'ParentChildTreeFile.txt')
+            with open(TEST_TREE_PATH) as file, open(tree_path, 'w') as out:
+                for line in file:
+                    if line.startswith('----IPR013465'):
+                        continue
+                    out.write(line)
+                    if line.startswith('IPR000011'):
+                        out.write('--IPR013465::Thymidine phosphorylase::\n')
+            cls.manager.populate(
+                entries_url=TEST_ENTRIES_PATH,
+                tree_url=tree_path,
+                go_mapping_path=TEST_INTERPRO_GO_MAPPINGS_PATH,
+                release='2',
+            )
+
+    def test_memberships(self):
+        """Test the memberships were built again for the moved entry's new ancestors."""
+        self.assertEqual('IPR000011', self.manager.get_interpro_by_interpro_id('IPR013465').parent.interpro_id)
+
+        memberships = {
+            (membership.entry.interpro_id, membership.protein.uniprot_id)
+            for membership in self.manager._list_model(Membership)
+        }
+        self.assertIn(('IPR000011', 'A0A001'), memberships)
+        self.assertNotIn(('IPR018090', 'A0A001'), memberships)
+
+    def test_stats(self):
+        """Test the aggregates of the moved entry's former and new ancestors were refreshed."""
+        self.assertEqual(0, self.manager.get_entry_stats('IPR018090').descendant_protein_count)
+        self.assertEqual(1, self.manager.get_entry_stats('IPR000011').descendant_protein_count)
+
+    def test_moved_hierarchy(self):
+        """Test the descendants of the entries in the first release can't be shown with the latest hierarchy."""
+        with self.assertRaises(ValueError):
+            self.manager.get_proteins_for_entries(['IPR000011'], include_descendants=True, release='1')
+        self.assertIn('IPR000011', self.manager.get_proteins_for_entries(['IPR000011'], include_descendants=True))
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for routing queries to a read replica and for the connection options."""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+from sqlalchemy.exc import OperationalError
+
+from bio2bel_interpro import Manager
+from bio2bel_interpro.models import Entry, Type
+from bio2bel_interpro.routing import RoutingSession, build_engine
+from tests.constants import TEST_ENTRIES_PATH, TEST_INTERPRO_GO_MAPPINGS_PATH, TEST_TREE_PATH
+
+
+class TestStatementTimeout(unittest.TestCase):
+    """Test cancelling statements that take too long."""
+
+    def test_sqlite(self):
+        """Test that SQLite statements are interrupted after the timeout, and that quick ones aren't."""
+        engine = build_engine('sqlite://', statement_timeout=0.05)
+        self.assertEqual(1, engine.execute('SELECT 1').scalar())
+        with self.assertRaises(OperationalError):
+            engine.execute(
+                'WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < 100000000) '
+                'SELECT max(x) FROM c'
+            ).scalar()
+
+
+class TestRouting(unittest.TestCase):
+    """Test routing between two SQLite files that stand in for a primary and a read replica."""
+
+    def setUp(self):
+        """Populate the primary, then copy it to the replica like replication would."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.primary_path = os.path.join(self.directory.name, 'primary.db')
+        self.replica_path = os.path.join(self.directory.name, 'replica.db')
+
+        # The replica is empty while populating, so any query sent to it would fail
+        sqlite3.connect(self.replica_path).close()
+        self.manager = Manager(
+            connection=f'sqlite:///{self.primary_path}',
+            replica_connection=f'sqlite:///{self.replica_path}',
+            pool_pre_ping=True,
+        )
+        self.manager.populate_or_raise(
+            entries_url=TEST_ENTRIES_PATH,
+            tree_url=TEST_TREE_PATH,
+            go_mapping_path=TEST_INTERPRO_GO_MAPPINGS_PATH,
+        )
+        self.manager.remove_session()
+        shutil.copy(self.primary_path, self.replica_path)
+
+    def tearDown(self):
+        """Remove the databases."""
+        self.manager.remove_session()
+        self.manager.engine.dispose()
+        self.manager.replica_engine.dispose()
+        self.directory.cleanup()
+
+    def _rename_on_primary(self, interpro_id: str, name: str) -> None:
+        with sqlite3.connect(self.primary_path) as connection:
+            connection.execute(f'UPDATE {Entry.__tablename__} SET name = ? WHERE interpro_id = ?', (name, interpro_id))
+
+    def _get_name(self, interpro_id: str) -> str:
+        return self.manager.session.query(Entry.name).filter(Entry.interpro_id == interpro_id).scalar()
+
+    def test_options(self):
+        """Test that the options are passed to both engines."""
+        self.assertIsInstance(self.manager.session(), RoutingSession)
+        self.assertTrue(self.manager.engine.pool._pre_ping)
+        self.assertTrue(self.manager.replica_engine.pool._pre_ping)
+
+    def test_reads(self):
+        """Test that queries go to the replica unless the primary is asked for."""
+        self.assertEqual(44, self.manager.count_interpros())
+        self._rename_on_primary('IPR000008', 'Renamed')
+
+        self.assertEqual('C2 domain', self._get_name('IPR000008'))
+        with self.manager.primary():
+            self.assertEqual('Renamed', self._get_name('IPR000008'))
+        self.manager.session.rollback()
+        self.assertEqual('C2 domain', self._get_name('IPR000008'))
+
+    def test_read_own_writes(self):
+        """Test that a transaction reads from the primary once it wrote something, until it ends."""
+        self.manager.session.add(Type(name='Test'))
+        self.manager.session.flush()
+        self.assertIsNotNone(self.manager.session.query(Type).filter(Type.name == 'Test').one_or_none())
+
+        self.manager.session.commit()
+        self.assertIsNone(self.manager.session.query(Type).filter(Type.name == 'Test').one_or_none())
+
+        with sqlite3.connect(self.primary_path) as connection:
+            statement = f'SELECT count(*) FROM {Type.__tablename__} WHERE name = ?'
+            self.assertEqual(1, connection.execute(statement, ('Test',)).fetchone()[0])
+
+    def test_profile(self):
+        """Test that statements sent to the replica are profiled."""
+        with self.manager.profile(explain=False) as report:
+            self.manager.count_interpros()
+        self.assertEqual(1, report.count)
+
+    def test_scoped(self):
+        """Test that each thread gets its own session."""
+        sessions = []
+        thread = threading.Thread(target=lambda: sessions.append(self.manager.session()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(self.manager.session(), sessions[0])
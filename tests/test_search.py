@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for searching entries and GO terms by name."""
+
+import unittest
+
+from bio2bel_interpro.models import SearchToken
+from bio2bel_interpro.search import MIN_PREFIX_LENGTH, PREFIX_SIMILARITY, TokenMatcher
+from tests.cases import TemporaryCacheClassMixin
+
+
+class TestTokenMatcher(unittest.TestCase):
+    """Test matching query tokens against a vocabulary."""
+
+    def test_match(self):
+        """Test exact, misspelled, and prefix matches."""
+        matcher = TokenMatcher(['kinase', 'kinases', 'phosphatase', 'domain', 'abc'])
+
+        self.assertEqual({'kinase': 1.0, 'kinases': 1 - 1 / 7}, matcher.match('kinase'))
+        self.assertIn('phosphatase', matcher.match('phosphatse'))
+        self.assertIn('phosphatase', matcher.match('phosph'))
+        self.assertEqual({'abc': 1.0}, matcher.match('abc'))
+        self.assertEqual({}, matcher.match('abd'))
+
+    def test_match_short_prefix(self):
+        """Test that prefixes as short as the minimum length match, and shorter ones don't."""
+        matcher = TokenMatcher(['kinase', 'kinases', 'phosphatase'])
+
+        self.assertEqual({'kinase': PREFIX_SIMILARITY, 'kinases': PREFIX_SIMILARITY}, matcher.match('kin'))
+        self.assertEqual(MIN_PREFIX_LENGTH, len('kin'))
+        self.assertEqual({}, matcher.match('ki'))
+
+
+class TestSearch(TemporaryCacheClassMixin):
+    """Test searching the populated database."""
+
+    def test_index(self):
+        """Test the tokens are indexed for both entries and GO terms."""
+        self.assertLess(0, self.manager.session.query(SearchToken).filter(SearchToken.entry_id.isnot(None)).count())
+        self.assertLess(0, self.manager.session.query(SearchToken).filter(SearchToken.go_term_id.isnot(None)).count())
+
+    def test_search_entries(self):
+        """Test searching entries ranks the exact match first and tolerates typos."""
+        for query in ('Thymidine phosphorylase', 'thymidin phosphorylse', 'IPR013465'):
+            with self.subTest(query=query):
+                entries = self.manager.search_entries(query, limit=3)
+                self.assertEqual(3 if query != 'IPR013465' else 1, len(entries))
+                self.assertEqual('IPR013465', entries[0].interpro_id)
+
+        names = {entry.name for entry in self.manager.search_entries('ABC transport')}
+        self.assertEqual(
+            {
+                'ABC transporter-like',
+                'ABC transporter, conserved site',
+                'ABC transporter type 1, transmembrane domain',
+                'ABC transporter type 1, transmembrane domain superfamily',
+            },
+            names,
+        )
+
+        self.assertIn('IPR013465', {entry.interpro_id for entry in self.manager.search_entries('thy')})
+        self.assertEqual([], self.manager.search_entries('zzzz'))
+        self.assertEqual([], self.manager.search_entries('  '))
+
+    def test_search_go_terms(self):
+        """Test searching GO terms by name and by identifier."""
+        go_terms = self.manager.search_go_terms('pentosyl transferase')
+        self.assertEqual(['0016763'], [go_term.go_id for go_term in go_terms])
+
+        go_terms = self.manager.search_go_terms('GO:0009032')
+        self.assertEqual(['thymidine phosphorylase activity'], [go_term.name for go_term in go_terms])
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for loading the proteins in parallel shards."""
+
+import pandas as pd
+
+from bio2bel_interpro.models import Annotation, Entry, Protein
+from tests.cases import TemporaryCacheClassMixin
+from tests.constants import (
+    TEST_ENTRIES_PATH, TEST_INTERPRO_GO_MAPPINGS_PATH, TEST_INTERPRO_PROTEIN_MAPPINGS_PATH, TEST_TREE_PATH,
+)
+
+
+class TestSharding(TemporaryCacheClassMixin):
+    """Test loading the proteins with two shards, where each protein is split across the source's chunks."""
+
+    @classmethod
+    def populate(cls):
+        """Populate the database, loading the proteins in shards."""
+        cls.manager.populate(
+            entries_url=TEST_ENTRIES_PATH,
+            tree_url=TEST_TREE_PATH,
+            go_mapping_path=TEST_INTERPRO_GO_MAPPINGS_PATH,
+        )
+        cls.manager._populate_proteins(url=TEST_INTERPRO_PROTEIN_MAPPINGS_PATH, chunksize=3, n_shards=2)
+        cls.manager.refresh_stats()
+
+    def test_summarize(self):
+        """Test the counts are the same as when loading in a single process."""
+        self.assertEqual(dict(interpros=44, annotations=17, proteins=2, go_terms=3), self.manager.summarize())
+
+    def test_annotations(self):
+        """Test the merged annotations are the same as the ones in the source."""
+        df = pd.read_csv(TEST_INTERPRO_PROTEIN_MAPPINGS_PATH, sep='\t', header=None, usecols=[0, 1, 3, 4, 5])
+        expected = sorted(map(tuple, df.values.tolist()))
+
+        annotations = (
+            self.manager.session
+            .query(Protein.uniprot_id, Entry.interpro_id, Annotation.xref, Annotation.start, Annotation.end)
+            .select_from(Annotation)
+            .join(Protein)
+            .join(Entry)
+        )
+        self.assertEqual(expected, sorted(annotations))
+
+    def test_protein_ids(self):
+        """Test that each protein has one row with a new database identifier."""
+        proteins = self.manager.session.query(Protein.id, Protein.uniprot_id).order_by(Protein.id).all()
+        self.assertEqual([(1, 'A0A000'), (2, 'A0A001')], proteins)
+
+    def test_architectures(self):
+        """Test the staged architectures are merged and linked to their proteins and entries."""
+        self.assertEqual(2, self.manager.count_architectures())
+
+        protein = self.manager.get_protein_by_uniprot_id('A0A001')
+        self.assertEqual('IPR011527~IPR003439~IPR003593', protein.architecture.architecture)
+        self.assertEqual(
+            ['IPR003439', 'IPR003593', 'IPR011527'],
+            sorted(entry.interpro_id for entry in protein.architecture.entries),
+        )
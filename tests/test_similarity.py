@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for finding proteins with similar InterPro compositions."""
+
+import gzip
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from bio2bel_interpro.models import LshBucket, ProteinSignature
+from bio2bel_interpro.similarity import estimate_similarities, get_band_hashes, get_jaccard, get_signatures
+from tests.cases import TemporaryCacheClassMixin
+from tests.constants import (
+    TEST_ENTRIES_PATH, TEST_INTERPRO_GO_MAPPINGS_PATH, TEST_INTERPRO_PROTEIN_MAPPINGS_PATH, TEST_TREE_PATH,
+)
+
+
+class TestMinHash(unittest.TestCase):
+    """Test MinHash signatures and LSH buckets without a database."""
+
+    def test_estimate(self):
+        """Test that the estimated similarities are close to the exact ones."""
+        rng = np.random.RandomState(0)
+        base = set(rng.choice(10000, size=200, replace=False).tolist())
+        others = [set(list(base)[:n]) | set(range(20000, 20000 + 200 - n)) for n in (200, 150, 100, 0)]
+
+        protein_ids = np.repeat(np.arange(5), [len(base)] + [len(other) for other in others])
+        entry_ids = np.array([*sorted(base), *(x for other in others for x in sorted(other))])
+        proteins, signatures = get_signatures(protein_ids, entry_ids, num_perm=256)
+
+        self.assertEqual(list(range(5)), proteins.tolist())
+        estimates = estimate_similarities(signatures[0], signatures[1:])
+        for estimate, other in zip(estimates, others):
+            self.assertAlmostEqual(get_jaccard(base, other), estimate, delta=0.1)
+
+    def test_bands(self):
+        """Test that identical signatures share all of their buckets and that the bands have to fit."""
+        _, signatures = get_signatures(np.array([1, 1, 2, 2, 3]), np.array([4, 5, 5, 4, 6]), num_perm=16)
+        buckets = get_band_hashes(signatures, bands=4)
+        self.assertEqual((3, 4), buckets.shape)
+        self.assertEqual(buckets[0].tolist(), buckets[1].tolist())
+        self.assertNotEqual(buckets[0].tolist(), buckets[2].tolist())
+        with self.assertRaises(ValueError):
+            get_band_hashes(signatures, bands=5)
+
+
+class TestSimilarProteins(TemporaryCacheClassMixin):
+    """Test looking up similar proteins."""
+
+    @classmethod
+    def populate(cls):
+        """Populate the database with proteins that copy all or some of the annotations of the test proteins."""
+        cls.directory = tempfile.TemporaryDirectory()
+        path = os.path.join(cls.directory.name, 'protein2ipr.dat')
+        with gzip.open(TEST_INTERPRO_PROTEIN_MAPPINGS_PATH, 'rt') as file:
+            lines = file.readlines()
+
+        first = [line for line in lines if line.startswith('A0A000')]
+        with open(path, 'w') as out:
+            out.writelines(lines)
+            # The same entries as A0A000
+            out.writelines(line.replace('A0A000', 'A0A002') for line in first)
+            # Five of the six entries of A0A000
+            out.writelines(line.replace('A0A000', 'A0A003') for line in first if 'IPR013466' not in line)
+
+        cls.manager.populate(
+            entries_url=TEST_ENTRIES_PATH,
+            tree_url=TEST_TREE_PATH,
+            go_mapping_path=TEST_INTERPRO_GO_MAPPINGS_PATH,
+            proteins_url=path,
+            populate_proteins=True,
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        """Remove the protein mappings."""
+        super().tearDownClass()
+        cls.directory.cleanup()
+
+    def test_similar(self):
+        """Test that the similar proteins are found with their similarities."""
+        self.assertEqual(4, self.manager.build_similarity_index(num_perm=64, bands=16, chunksize=2))
+        self.assertEqual(4 * 16, self.manager.session.query(LshBucket).count())
+
+        similar = self.manager.get_similar_proteins('A0A000')
+        self.assertEqual(['A0A002', 'A0A003'], [protein.uniprot_id for protein, _, _ in similar])
+
+        (_, estimate, exact), (_, _, partial_exact) = similar
+        self.assertEqual(1.0, estimate)
+        self.assertEqual(1.0, exact)
+        self.assertAlmostEqual(5 / 6, partial_exact)
+
+        self.assertEqual(1, len(self.manager.get_similar_proteins('A0A000', limit=1)))
+        self.assertEqual([], self.manager.get_similar_proteins('nope'))
+
+        # Checking for the signatures doesn't count all of them
+        with self.manager.profile(explain=False) as report:
+            self.manager.get_similar_proteins('A0A000')
+        self.assertNotIn('_count_model', report.callers, msg=str(report))
+
+    def test_build_on_demand(self):
+        """Test that the index is built when it's first needed."""
+        self.manager.session.query(LshBucket).delete()
+        self.manager.session.query(ProteinSignature).delete()
+        self.manager.session.commit()
+
+        self.assertEqual([], self.manager.get_similar_proteins('A0A001'))
+        self.assertEqual(4, self.manager.session.query(ProteinSignature).count())
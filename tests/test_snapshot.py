@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for building read-only SQLite snapshots."""
+
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from sqlalchemy.exc import OperationalError
+
+from bio2bel_interpro import Manager
+from bio2bel_interpro.models import Type
+from bio2bel_interpro.snapshot import build_snapshot
+from tests.constants import (
+    TEST_ENTRIES_PATH, TEST_INTERPRO_GO_MAPPINGS_PATH, TEST_INTERPRO_PROTEIN_MAPPINGS_PATH, TEST_TREE_PATH,
+)
+
+
+class TestSnapshot(unittest.TestCase):
+    """Test building a snapshot and reading it with a read-only manager."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Build a snapshot from the test data."""
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.directory.name, 'interpro.db')
+        cls.connection = build_snapshot(
+            cls.path,
+            entries_url=TEST_ENTRIES_PATH,
+            tree_url=TEST_TREE_PATH,
+            go_mapping_path=TEST_INTERPRO_GO_MAPPINGS_PATH,
+            proteins_url=TEST_INTERPRO_PROTEIN_MAPPINGS_PATH,
+            populate_proteins=True,
+        )
+        cls.manager = Manager(connection=f'sqlite:///{cls.path}', read_only=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        """Remove the snapshot."""
+        cls.manager.session.close()
+        cls.manager.engine.dispose()
+        cls.directory.cleanup()
+
+    def test_file(self):
+        """Test the snapshot is moved into place and is read-only."""
+        self.assertEqual(['interpro.db'], os.listdir(self.directory.name))
+        self.assertEqual(0, os.stat(self.path).st_mode & 0o222)
+
+        with self.assertRaises(FileExistsError):
+            build_snapshot(self.path)
+
+    def test_failure(self):
+        """Test that the temporary file is removed when building a snapshot fails."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'interpro.db')
+            with self.assertRaises(FileNotFoundError):
+                build_snapshot(path, entries_url=os.path.join(directory, 'missing.list'), tree_url=TEST_TREE_PATH)
+            self.assertEqual([], os.listdir(directory))
+
+    def test_protein_failure(self):
+        """Test that a snapshot isn't published when loading the proteins fails after the entries were loaded."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'interpro.db')
+            with self.assertRaises(FileNotFoundError):
+                build_snapshot(
+                    path,
+                    entries_url=TEST_ENTRIES_PATH,
+                    tree_url=TEST_TREE_PATH,
+                    go_mapping_path=TEST_INTERPRO_GO_MAPPINGS_PATH,
+                    proteins_url=os.path.join(directory, 'missing.dat'),
+                    populate_proteins=True,
+                )
+            self.assertEqual([], os.listdir(directory))
+
+    def test_indexes(self):
+        """Test the deferred indexes were built and the tables were analyzed."""
+        connection = sqlite3.connect(self.connection[len('sqlite:///'):], uri=True)
+        try:
+            indexes = {name for name, in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+            statistics = connection.execute('SELECT count(*) FROM sqlite_stat1').fetchone()[0]
+        finally:
+            connection.close()
+
+        self.assertIn('ix_interpro_entry_interpro_id', indexes)
+        self.assertIn('ix_interpro_annotation_entry_id', indexes)
+        self.assertLess(0, statistics)
+
+    def test_read(self):
+        """Test reading from the snapshot."""
+        self.assertEqual(dict(interpros=44, annotations=17, proteins=2, go_terms=3), self.manager.summarize())
+
+        entry = self.manager.get_interpro_by_interpro_id('IPR013465')
+        self.assertIsNotNone(entry)
+        self.assertEqual('Thymidine phosphorylase', entry.name)
+
+    def test_write(self):
+        """Test that the snapshot can't be written to."""
+        self.manager.session.add(Type(name='new type'))
+        with self.assertRaises(OperationalError):
+            self.manager.session.commit()
+        self.manager.session.rollback()
+
+    def test_invalid_connection(self):
+        """Test that only SQLite files can be opened as read-only."""
+        with self.assertRaises(ValueError):
+            Manager(connection='sqlite://', read_only=True)
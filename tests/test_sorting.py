@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for sorting protein mappings externally."""
+
+import gzip
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from bio2bel_interpro import sorting
+from bio2bel_interpro.sorting import UnsortedError, check_sorted_chunks, sort_chunks
+from tests.cases import TemporaryCacheClassMixin
+from tests.constants import (
+    TEST_ENTRIES_PATH, TEST_INTERPRO_GO_MAPPINGS_PATH, TEST_INTERPRO_PROTEIN_MAPPINGS_PATH, TEST_TREE_PATH,
+)
+
+
+def _make_chunks(frame: pd.DataFrame, chunksize: int):
+    return [frame.iloc[start:start + chunksize] for start in range(0, len(frame.index), chunksize)]
+
+
+class TestSorting(unittest.TestCase):
+    """Test checking and sorting chunks without a database."""
+
+    def setUp(self):
+        """Make a shuffled table."""
+        rng = random.Random(0)
+        uniprot_ids = [f'P{rng.randrange(200):05}' for _ in range(500)]
+        self.frame = pd.DataFrame({
+            'uniprot_id': uniprot_ids,
+            'interpro_id': [f'IPR{i:06}' for i in range(500)],
+            'start': range(500),
+        })
+
+    def test_check(self):
+        """Test that sort violations are found within and across chunks."""
+        ordered = self.frame.sort_values('uniprot_id', kind='mergesort')
+        self.assertEqual(500, sum(len(chunk.index) for chunk in check_sorted_chunks(_make_chunks(ordered, 50))))
+
+        with self.assertRaises(UnsortedError):
+            list(check_sorted_chunks(_make_chunks(self.frame, 50)))
+
+        across = [ordered.iloc[250:], ordered.iloc[:250]]
+        with self.assertRaises(UnsortedError):
+            list(check_sorted_chunks(across))
+
+    @mock.patch.object(sorting, 'BLOCK_SIZE', 7)
+    def test_sort(self):
+        """Test sorting with a memory budget that makes a run of each chunk and runs with many blocks."""
+        with tempfile.TemporaryDirectory() as directory:
+            chunks = list(sort_chunks(_make_chunks(self.frame, 60), max_memory=1, chunksize=45, directory=directory))
+            self.assertEqual([], os.listdir(directory))
+
+        self.assertTrue(all(len(chunk.index) == 45 for chunk in chunks[:-1]))
+
+        result = pd.concat(chunks, ignore_index=True)
+        self.assertTrue(result['uniprot_id'].is_monotonic_increasing)
+        self.assertEqual(
+            sorted(self.frame.itertuples(index=False)),
+            sorted(result.itertuples(index=False)),
+        )
+        self.assertEqual(object, result['uniprot_id'].dtype)
+
+
+class TestPopulateUnsorted(TemporaryCacheClassMixin):
+    """Test populating the proteins from unsorted mappings."""
+
+    @classmethod
+    def populate(cls):
+        """Populate the database with the test protein mappings in reverse."""
+        cls.directory = tempfile.TemporaryDirectory()
+        path = os.path.join(cls.directory.name, 'protein2ipr.dat')
+        with gzip.open(TEST_INTERPRO_PROTEIN_MAPPINGS_PATH, 'rt') as file, open(path, 'w') as out:
+            out.writelines(reversed(file.readlines()))
+
+        cls.manager._populate_entries(entry_url=TEST_ENTRIES_PATH, tree_url=TEST_TREE_PATH)
+        cls.manager._populate_go(path=TEST_INTERPRO_GO_MAPPINGS_PATH)
+        cls.manager._populate_proteins(url=path, chunksize=4, sort_memory=1)
+
+    @classmethod
+    def tearDownClass(cls):
+        """Remove the unsorted mappings."""
+        super().tearDownClass()
+        cls.directory.cleanup()
+
+    def test_proteins(self):
+        """Test that each protein was only loaded once, with all of its annotations."""
+        self.assertEqual(2, self.manager.count_proteins())
+        self.assertEqual(17, self.manager.count_annotations())
+
+        entries = self.manager.get_entries_for_proteins(['A0A000', 'A0A001'])
+        self.assertEqual(6, len(entries['A0A000']))
+        self.assertEqual(7, len(entries['A0A001']))
+        self.assertEqual('IPR010961~IPR004839', str(self.manager.get_protein_by_uniprot_id('A0A000').architecture))
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for converting the source files to BEL without a database."""
+
+import json
+from io import StringIO
+
+from bio2bel_interpro.streaming import write_bel
+from tests.cases import TemporaryCacheClassMixin
+from tests.constants import TEST_ENTRIES_PATH, TEST_INTERPRO_PROTEIN_MAPPINGS_PATH, TEST_TREE_PATH
+
+
+class TestStreaming(TemporaryCacheClassMixin):
+    """Test that streaming the source files gives the same statements as the database."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Populate the database and get the statements from its BEL graph."""
+        super().setUpClass()
+        graph = cls.manager.to_bel()
+        cls.statements = {
+            f'{u.as_bel()} {data["relation"]} {v.as_bel()}'
+            for u, v, data in graph.edges(data=True)
+            if data['relation'] == 'isA'
+        }
+
+    def _write(self, fmt: str, max_workers: int = 0, chunksize: int = 4) -> str:
+        file = StringIO()
+        counts = write_bel(
+            file,
+            fmt=fmt,
+            entries_url=TEST_ENTRIES_PATH,
+            tree_url=TEST_TREE_PATH,
+            proteins_url=TEST_INTERPRO_PROTEIN_MAPPINGS_PATH,
+            chunksize=chunksize,
+            max_workers=max_workers,
+        )
+        self.assertEqual(dict(entries=44, proteins=2, edges=len(self.statements)), counts)
+        return file.getvalue()
+
+    def _help_test_bel(self, text: str):
+        lines = text.splitlines()
+        self.assertEqual('UNSET Citation', lines[-1])
+        self.assertEqual(self.statements, {line for line in lines if ' isA ' in line})
+
+    def test_bel(self):
+        """Test writing a BEL script in this process."""
+        self._help_test_bel(self._write('bel'))
+
+    def test_bel_workers(self):
+        """Test writing a BEL script with worker processes, where proteins are split across chunks."""
+        self._help_test_bel(self._write('bel', max_workers=2, chunksize=3))
+
+    def test_nodelink(self):
+        """Test writing node-link JSON lines."""
+        lines = [json.loads(line) for line in self._write('nodelink').splitlines()]
+
+        self.assertIn('graph', lines[0])
+        self.assertEqual('InterPro', lines[0]['graph']['document_metadata']['name'])
+
+        nodes = {}
+        statements = set()
+        for line in lines[1:]:
+            if 'node' in line:
+                nodes[line['node']['id']] = line['node']['bel']
+            else:
+                link = line['link']
+                # Nodes are written before the links that reference them
+                statements.add(f'{nodes[link["source"]]} {link["relation"]} {nodes[link["target"]]}')
+
+        self.assertEqual(self.statements, statements)
+        self.assertEqual(44 + 2, len(nodes))